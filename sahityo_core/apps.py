@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class SahityoCoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sahityo_core"
+
+    def ready(self):
+        from django.conf import settings
+
+        from sahityo_core import signals  # noqa: F401
+        from sahityo_core.catalog import warm_catalog_registry
+
+        # Querying inside ready() is discouraged (and breaks before migrate),
+        # so the catalog is warmed as the worker's first request starts.
+        request_started.connect(warm_catalog_registry, dispatch_uid='warm_catalog_registry')
+        if settings.STATUS_TIMER_ENABLED:
+            from sahityo_core.status_timer import start_status_timer_thread
+
+            request_started.connect(start_status_timer_thread, dispatch_uid='start_status_timer_thread')
@@ -0,0 +1,200 @@
+"""
+Tag-based response caching.
+
+Every cached entry depends on one or more tags (sector:<id>, stage:<id>,
+unit:<id>, catalog). Each tag has a generation stored in the cache and the
+entry's key embeds the generations of all its tags, so invalidating a tag
+is a single cache write that orphans every dependent entry; orphaned bytes
+simply age out. Model signals (sahityo_core.signals) invalidate the tags
+touched by each write once the transaction commits.
+
+Generations live in the configured cache, so invalidation reaches other
+worker processes whenever that cache is shared (file-based, redis, ...).
+
+cached_swr() adds request coalescing for hot reads: within a process only
+one thread builds a given entry while identical requests wait for its
+result, and once an entry exists readers are served the last value while
+a single background rebuild catches up with invalidated tags.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CATALOG = 'catalog'
+
+_MISSING = object()
+
+
+def sector_tag(sector_id):
+    return f'sector:{sector_id}'
+
+
+def stage_tag(stage_id):
+    return f'stage:{stage_id}'
+
+
+def unit_tag(unit_id):
+    return f'unit:{unit_id}'
+
+
+def _generation_key(tag):
+    return f'tag:{tag}'
+
+
+def _new_generation():
+    # A clock-based value rather than cache.incr(): the file-based backend's
+    # incr is a non-atomic get/set across processes, and a generation lost to
+    # eviction or a restart must never come back as a number already used.
+    return time.time_ns()
+
+
+def tag_versions(tags):
+    keys = [_generation_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _new_generation(), None)
+            version = cache.get(key)
+        versions.append(version)
+    return versions
+
+
+def tag_version(tag):
+    return tag_versions([tag])[0]
+
+
+def invalidate_tags(*tags):
+    generation = _new_generation()
+    cache.set_many({_generation_key(tag): generation for tag in tags}, None)
+
+
+def invalidate_tags_on_commit(*tags):
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def tagged_key(name, tags):
+    versions = '.'.join(str(version) for version in tag_versions(tags))
+    return f'{name}@{versions}'
+
+
+def cached(name, tags, builder, timeout):
+    """
+    Return the entry for name built against the current generation of tags,
+    calling builder() on a miss.
+    """
+    key = tagged_key(name, tags)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers with the
+    same key block and share the leader's result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        return self._lead(key, flight, fn)
+
+    def start(self, key, fn):
+        """
+        Run fn in a background thread unless a call with the same key is
+        in flight; checking and claiming the key is one step, so only one
+        thread is started. Returns whether it was.
+        """
+        with self._lock:
+            if key in self._flights:
+                return False
+            flight = self._flights[key] = _Flight()
+        threading.Thread(target=self._lead_detached, args=(key, flight, fn), name=f'single-flight:{key}', daemon=True).start()
+        return True
+
+    def _lead(self, key, flight, fn):
+        try:
+            flight.value = fn()
+            return flight.value
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _lead_detached(self, key, flight, fn):
+        try:
+            self._lead(key, flight, fn)
+        except Exception:
+            logger.exception('Background call for %s failed', key)
+
+
+_single_flight = SingleFlight()
+
+
+def _rebuild(name, tags, builder, timeout):
+    # Generations are read before building, so an invalidation that lands
+    # mid-build leaves the stored entry stale rather than wrongly fresh.
+    versions = tag_versions(tags)
+    value = builder()
+    cache.set(name, (versions, value), timeout)
+    return value
+
+
+def _rebuild_in_background(name, tags, builder, timeout):
+    def run():
+        try:
+            # A failure is logged by SingleFlight; readers keep getting the
+            # stale value and the next read retries
+            return _rebuild(name, tags, builder, timeout)
+        finally:
+            connections.close_all()
+
+    _single_flight.start(name, run)
+
+
+def cached_swr(name, tags, builder, timeout):
+    """
+    Like cached(), but coalesces concurrent builds of the same entry and
+    serves the previous value while it is rebuilt after an invalidation.
+    Only a cold miss makes the caller wait.
+    """
+    entry = cache.get(name)
+    if entry is None:
+        return _single_flight.do(name, lambda: _rebuild(name, tags, builder, timeout))
+
+    versions, value = entry
+    if versions != tag_versions(tags):
+        _rebuild_in_background(name, tags, builder, timeout)
+    return value
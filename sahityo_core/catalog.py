@@ -0,0 +1,90 @@
+"""
+In-process registry of categories and competitions.
+
+The catalog barely changes during a festival, so every worker keeps a copy
+in memory and views resolve names by id instead of joining. current()
+compares the loaded copy with the shared catalog tag generation (see
+sahityo_core.cache) and reloads when any worker has invalidated it; call
+it once per request and do all lookups on the returned snapshot.
+"""
+import threading
+
+from django.core.signals import request_started
+from django.db import DatabaseError
+
+from sahityo_core.cache import CATALOG, tag_version
+from sahityo_core.models import Category, Competition
+
+
+class CatalogSnapshot:
+    def __init__(self, version, categories, competitions, competitions_by_category):
+        self.version = version
+        self._categories = categories
+        self._competitions = competitions
+        self._competitions_by_category = competitions_by_category
+
+    def categories(self):
+        return list(self._categories.values())
+
+    def category(self, category_id):
+        return self._categories.get(str(category_id))
+
+    def competition(self, competition_id):
+        return self._competitions.get(str(competition_id))
+
+    def competitions(self):
+        return list(self._competitions.values())
+
+    def competitions_in_category(self, category_id):
+        return list(self._competitions_by_category.get(str(category_id), []))
+
+
+class CatalogRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _load(self, version):
+        categories = {}
+        for category_id, name in Category.objects.values_list('id', 'name'):
+            categories[str(category_id)] = {'id': str(category_id), 'name': name}
+
+        competitions = {}
+        competitions_by_category = {category_id: [] for category_id in categories}
+        for competition_id, name, category_id in Competition.objects.values_list('id', 'name', 'category_id'):
+            competition = {
+                'id': str(competition_id),
+                'name': name,
+                'category': categories[str(category_id)],
+            }
+            competitions[competition['id']] = competition
+            competitions_by_category[str(category_id)].append(competition)
+
+        return CatalogSnapshot(version, categories, competitions, competitions_by_category)
+
+    def current(self):
+        # The version is read before loading: an invalidation racing with the
+        # load leaves the snapshot on the older version, so the next call reloads.
+        version = tag_version(CATALOG)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = self._snapshot = self._load(version)
+        return snapshot
+
+    def warm(self):
+        try:
+            self.current()
+        except DatabaseError:
+            # Tables may not exist yet (fresh checkout, before migrate).
+            pass
+
+
+catalog_registry = CatalogRegistry()
+
+
+def warm_catalog_registry(sender, **kwargs):
+    request_started.disconnect(dispatch_uid='warm_catalog_registry')
+    catalog_registry.warm()
@@ -0,0 +1,146 @@
+"""
+Cross-stage clash detection: a unit taking part in two competitions whose
+slots overlap on different stages.
+
+A unit takes part in a scheduled competition when one of its participants
+is marked present for it. Every unit gets a ParticipantPresent row for
+every competition, so the row alone says nothing; callers checking a new
+slot name the units entering it themselves. ClashIndex keeps one IntervalIndex per unit
+over the sector's schedule, so checking a proposed slot for a set of units
+costs O(log n) per unit, and O(log n) more per clash found. all_clashes() sweeps the
+timelines of every stage at once instead of comparing stages pairwise.
+
+The index for a sector and date is built from two queries and cached
+under the sector's tag, which schedule and presence writes invalidate.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+
+from sahityo_core.cache import cached, sector_tag
+from sahityo_core.models import ParticipantPresent, ScheduledCompetition
+from sahityo_core.timeline import IntervalIndex
+
+
+class ClashIndex:
+    def __init__(self, competitions, participants):
+        """
+        competitions: [(id, stage_id, date, start, end)]
+        participants: [(scheduled_competition_id, unit_id)]
+        """
+        # A competition without both times occupies no slot
+        self.competitions = {
+            id: (stage_id, date, start, end) for id, stage_id, date, start, end in competitions
+            if start is not None and end is not None
+        }
+        self.units = defaultdict(set)
+        for competition_id, unit_id in participants:
+            if competition_id in self.competitions:
+                self.units[competition_id].add(unit_id)
+
+        entries = defaultdict(list)
+        for competition_id, unit_ids in self.units.items():
+            stage_id, date, start, end = self.competitions[competition_id]
+            for unit_id in unit_ids:
+                entries[unit_id].append((start, end, competition_id))
+        self.unit_timelines = {unit_id: IntervalIndex(unit_entries) for unit_id, unit_entries in entries.items()}
+
+    def clashes_for(self, stage_id, start, end, unit_ids, exclude=None):
+        """
+        {unit_id: [competition_id, ...]} for the units that would be on
+        another stage during [start, end).
+        """
+        clashes = {}
+        for unit_id in unit_ids:
+            timeline = self.unit_timelines.get(unit_id)
+            if timeline is None:
+                continue
+            competition_ids = [
+                competition_id for other_start, other_end, competition_id in timeline.overlapping(start, end)
+                if competition_id != exclude and self.competitions[competition_id][0] != stage_id
+            ]
+            if competition_ids:
+                clashes[unit_id] = competition_ids
+        return clashes
+
+    def all_clashes(self):
+        """
+        Every pair of overlapping competitions on different stages that share
+        units, found with one sweep over all stages in start order.
+        """
+        clashes = []
+        active = []
+        # Start times are absolute, so they order competitions of every date;
+        # the date may be missing and takes no part
+        ordered = sorted(self.competitions.items(), key=lambda item: item[1][2])
+        for competition_id, (stage_id, date, start, end) in ordered:
+            active = [item for item in active if item[1][3] > start]
+            for other_id, (other_stage_id, other_date, other_start, other_end) in active:
+                if other_stage_id == stage_id:
+                    continue
+                unit_ids = self.units[competition_id] & self.units[other_id]
+                if unit_ids:
+                    clashes.append({
+                        'scheduled_competition_ids': [other_id, competition_id],
+                        'stage_ids': [other_stage_id, stage_id],
+                        'date': date.isoformat() if date else None,
+                        'overlap_start': start.isoformat(),
+                        'overlap_end': min(end, other_end).isoformat(),
+                        'unit_ids': sorted(unit_ids),
+                    })
+            active.append((competition_id, (stage_id, date, start, end)))
+        return clashes
+
+
+def build_clash_index(sector_id, date=None):
+    competitions = ScheduledCompetition.objects.filter(sector_id=sector_id)
+    participants = ParticipantPresent.objects.filter(scheduled_competition__sector_id=sector_id).filter(
+        Q(participant_1_present=True) | Q(participant_2_present=True)
+    )
+    if date is not None:
+        competitions = competitions.filter(date=date)
+        participants = participants.filter(scheduled_competition__date=date)
+    return ClashIndex(
+        [
+            (str(id), str(stage_id), competition_date, start, end)
+            for id, stage_id, competition_date, start, end
+            in competitions.values_list('id', 'stage_id', 'date', 'start_time', 'end_time')
+        ],
+        [
+            (str(competition_id), str(unit_id))
+            for competition_id, unit_id in participants.values_list('scheduled_competition_id', 'unit_id')
+        ],
+    )
+
+
+def get_clash_index(sector_id, date=None):
+    return cached(
+        f'clash-index:{sector_id}:{date}',
+        [sector_tag(sector_id)],
+        lambda: build_clash_index(sector_id, date),
+        settings.SCHEDULE_CACHE_TIMEOUT,
+    )
+
+
+def clash_warnings(clashes):
+    """
+    Response-friendly form of ClashIndex.clashes_for().
+    """
+    return [
+        {'unit_id': unit_id, 'scheduled_competition_ids': competition_ids}
+        for unit_id, competition_ids in clashes.items()
+    ]
+
+
+def clash_check_fields(clashes, unit_ids):
+    """
+    The clash fields of a schedule write response. clash_check is
+    'no_participants' when no unit was known to check, so an empty
+    clash_warnings is not mistaken for a clean check.
+    """
+    return {
+        'clash_warnings': clash_warnings(clashes),
+        'clash_check': 'checked' if unit_ids else 'no_participants',
+        'clash_checked_units': sorted(unit_ids),
+    }
@@ -0,0 +1,52 @@
+"""
+Normalized compact representation for schedule lists (?format=compact).
+
+Instead of repeating nested category/competition/sector objects in every
+row, a compact document carries one array per row plus lookup tables that
+rows reference by index, and datetimes as epoch seconds:
+
+    {
+        "format": "compact",
+        "columns": ["id", "competition", "sector", "start_time", ...],
+        "rows": [["<uuid>", 0, 0, 1754035200, ...], ...],
+        "competitions": [["<uuid>", "Speech", 0], ...],   # id, name, category
+        "categories": [["<uuid>", "Lower Primary"], ...],  # id, name
+        "sectors": [["<uuid>", "Kasaragod"], ...]          # id, name
+    }
+"""
+
+
+def epoch(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+class CompactTable:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.rows = []
+        self._lookups = {}
+
+    def ref(self, table, key, *values):
+        """
+        Index of key in lookup table, adding [key, *values] on first use.
+        """
+        index, rows = self._lookups.setdefault(table, ({}, []))
+        key = str(key)
+        if key not in index:
+            index[key] = len(rows)
+            rows.append([key, *values])
+        return index[key]
+
+    def competition_ref(self, competition):
+        category = competition['category']
+        category_index = self.ref('categories', category['id'], category['name'])
+        return self.ref('competitions', competition['id'], competition['name'], category_index)
+
+    def add(self, *values):
+        self.rows.append(list(values))
+
+    def as_data(self, **extra):
+        data = {'format': 'compact', **extra, 'columns': self.columns, 'rows': self.rows}
+        for table, (index, rows) in self._lookups.items():
+            data[table] = rows
+        return data
@@ -0,0 +1,95 @@
+"""
+Response compression helpers shared by CompressionMiddleware, the cached
+response paths and the public snapshots.
+
+gzip is always available; brotli is used when the optional `brotli`
+package is installed. Bodies below RESPONSE_COMPRESSION_MIN_SIZE are left
+alone since the framing overhead outweighs the gain.
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+BROTLI = 'br'
+
+_accept_encoding_re = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def available_encodings():
+    return (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+
+def min_size():
+    return getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 512)
+
+
+def compress(content, encoding):
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=5)
+    if encoding == GZIP:
+        return gzip.compress(content, compresslevel=6, mtime=0)
+    return content
+
+
+def accepted_encoding(request, encodings=None):
+    """
+    Pick the best encoding the client accepts among encodings (default: all
+    available, preferring brotli).
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = set()
+    for token in header.split(','):
+        match = _accept_encoding_re.match(token)
+        if not match:
+            continue
+        name, quality = match.group(1).lower(), match.group(2)
+        try:
+            if quality is not None and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name)
+    for encoding in encodings or available_encodings():
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return IDENTITY
+
+
+def precompress(content):
+    """
+    Return every variant of content worth storing in a cache entry.
+    """
+    variants = {IDENTITY: content}
+    if len(content) >= min_size():
+        for encoding in available_encodings():
+            compressed = compress(content, encoding)
+            if len(compressed) < len(content):
+                variants[encoding] = compressed
+    return variants
+
+
+def encoded_response(request, variants, content_type, status=200):
+    """
+    Build a response from precompressed variants; CompressionMiddleware
+    leaves responses that already carry Content-Encoding untouched.
+    """
+    encoding = accepted_encoding(request)
+    content = variants.get(encoding)
+    if content is None:
+        encoding, content = IDENTITY, variants[IDENTITY]
+    response = HttpResponse(content, content_type=content_type, status=status)
+    if encoding != IDENTITY:
+        response['Content-Encoding'] = encoding
+    if len(variants) > 1:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
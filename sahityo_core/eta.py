@@ -0,0 +1,119 @@
+"""
+Predicted reporting and start times.
+
+Every status transition records its actual time on the ScheduledCompetition
+(reported_at, started_at, finished_at) and folds the delay against the plan
+into the stage's StageDrift for that date, an exponentially weighted
+average updated in O(1):
+
+    delay = alpha * latest_delay + (1 - alpha) * delay
+
+Predictions for the stage's upcoming competitions apply the current drift
+to their planned times and never start one before the predicted end of the
+competition ahead of it on the stage. They are computed on first read after
+a transition and cached under the stage tag, which that transition bumps,
+so polling reads cost one cache hit.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from sahityo_core.cache import cached, stage_tag
+from sahityo_core.models import ScheduledCompetition, StageDrift
+
+UPCOMING_STATUSES = ('not_started', 'reporting')
+
+
+def _fold(average, samples, delay):
+    if not samples:
+        return delay
+    alpha = settings.ETA_DRIFT_ALPHA
+    return alpha * delay + (1 - alpha) * average
+
+
+def record_transition(competition, new_status, now=None):
+    """
+    Set the actual transition time for new_status on competition (unsaved)
+    and update the stage drift. Call inside the transaction that saves it.
+    Returns the fields to add to save(update_fields=...).
+    """
+    now = now or timezone.now()
+    if new_status == 'not_started':
+        competition.reported_at = competition.started_at = competition.finished_at = None
+        return ['reported_at', 'started_at', 'finished_at']
+    if new_status == 'finished':
+        competition.finished_at = now
+        return ['finished_at']
+
+    drift, created = StageDrift.objects.select_for_update().get_or_create(
+        stage_id=competition.stage_id, date=competition.date or timezone.localdate(competition.start_time),
+    )
+    if new_status == 'reporting':
+        competition.reported_at = now
+        delay = (now - competition.reporting_time).total_seconds()
+        drift.reporting_delay = _fold(drift.reporting_delay, drift.reporting_samples, delay)
+        drift.reporting_samples += 1
+        fields = ['reported_at']
+    else:
+        competition.started_at = now
+        delay = (now - competition.start_time).total_seconds()
+        drift.start_delay = _fold(drift.start_delay, drift.start_samples, delay)
+        drift.start_samples += 1
+        fields = ['started_at']
+    drift.save()
+    return fields
+
+
+def build_stage_etas(stage_id, date):
+    drift = StageDrift.objects.filter(stage_id=stage_id, date=date).first()
+    reporting_delay = timedelta(seconds=drift.reporting_delay if drift else 0)
+    start_delay = timedelta(seconds=drift.start_delay if drift else 0)
+
+    competitions = ScheduledCompetition.objects.filter(stage_id=stage_id, date=date).order_by('start_time').values_list(
+        'id', 'competition_id', 'status', 'reporting_time', 'start_time', 'end_time', 'reported_at', 'started_at',
+    )
+    etas = []
+    previous_end = None
+    for id, competition_id, state, reporting_time, start_time, end_time, reported_at, started_at in competitions:
+        if state == 'ongoing':
+            previous_end = (started_at or start_time) + (end_time - start_time)
+            continue
+        if state not in UPCOMING_STATUSES:
+            continue
+        predicted_start = start_time + start_delay
+        if previous_end is not None and predicted_start < previous_end:
+            predicted_start = previous_end
+        if state == 'reporting' and reported_at:
+            predicted_reporting = reported_at
+        else:
+            # Keep the planned lead when the start is pushed back, but never
+            # report after the start
+            predicted_reporting = max(reporting_time + reporting_delay, predicted_start - (start_time - reporting_time))
+            predicted_reporting = min(predicted_reporting, predicted_start)
+        previous_end = predicted_start + (end_time - start_time)
+        etas.append({
+            'id': str(id),
+            'competition_id': str(competition_id),
+            'status': state,
+            'reporting_time': reporting_time.isoformat(),
+            'start_time': start_time.isoformat(),
+            'predicted_reporting_time': predicted_reporting.isoformat(),
+            'predicted_start_time': predicted_start.isoformat(),
+        })
+    return {
+        'stage_id': str(stage_id),
+        'date': date.isoformat(),
+        'reporting_delay_seconds': round(reporting_delay.total_seconds()),
+        'start_delay_seconds': round(start_delay.total_seconds()),
+        'etas': etas,
+    }
+
+
+def get_stage_etas(stage_id, date):
+    return cached(
+        f'etas:{stage_id}:{date}',
+        [stage_tag(stage_id)],
+        lambda: build_stage_etas(stage_id, date),
+        settings.SCHEDULE_CACHE_TIMEOUT,
+    )
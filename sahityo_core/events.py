@@ -0,0 +1,48 @@
+"""
+Application-level schedule events.
+
+Bulk operations (queryset update(), raw SQL) send no model signals, so they
+announce what changed with schedule_changed once their transaction has
+committed. Receivers get:
+
+    kind        what happened, e.g. 'shifted'
+    sector_id   the sector whose schedule changed
+    stage_id    the stage, or None when several stages changed
+    date        the festival date, or None
+    ids         ids of the ScheduledCompetitions affected
+
+sahityo_core.signals invalidates the matching cache tags; anything that
+pushes updates to clients can connect here too.
+
+status_changed is sent once per status transition of a ScheduledCompetition,
+manual or automatic (see sahityo_core.transitions), with
+scheduled_competition_id, sector_id, stage_id, date, old_status,
+new_status and automatic.
+"""
+from django.db import transaction
+from django.dispatch import Signal
+
+from sahityo_core.models import ScheduledCompetition
+
+schedule_changed = Signal()
+status_changed = Signal()
+
+
+def send_schedule_changed_on_commit(kind, sector_id, stage_id=None, date=None, ids=()):
+    ids = [str(id) for id in ids]
+    transaction.on_commit(lambda: schedule_changed.send(
+        sender=kind, kind=kind, sector_id=sector_id, stage_id=stage_id, date=date, ids=ids,
+    ))
+
+
+def send_status_changed_on_commit(competition, old_status, automatic=False):
+    payload = {
+        'scheduled_competition_id': str(competition.id),
+        'sector_id': competition.sector_id,
+        'stage_id': competition.stage_id,
+        'date': competition.date,
+        'old_status': old_status,
+        'new_status': competition.status,
+        'automatic': automatic,
+    }
+    transaction.on_commit(lambda: status_changed.send(sender=ScheduledCompetition, **payload))
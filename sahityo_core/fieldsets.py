@@ -0,0 +1,91 @@
+"""
+Sparse fieldsets for read endpoints: ?fields=id,status,start_time
+
+Nested objects are selected whole by name (participants) or field by field
+with a dotted path (participants.id,participants.participant_1_present).
+Views describe their fields once and use the selection both to build the
+payload and to narrow the SQL columns, so unrequested joins and datetime
+formatting are skipped entirely.
+"""
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class FieldSelection:
+    """
+    allowed maps each field name to None (a plain field) or to a nested
+    allowed mapping. selected is None when everything is selected.
+    """
+
+    def __init__(self, allowed, selected=None):
+        self.allowed = allowed
+        self.selected = selected
+
+    @classmethod
+    def from_request(cls, request, allowed, param='fields'):
+        raw = request.query_params.get(param)
+        if not raw:
+            return cls(allowed)
+
+        selected = {}
+        unknown = []
+        for path in filter(None, (part.strip() for part in raw.split(','))):
+            level_allowed, level_selected = allowed, selected
+            names = path.split('.')
+            for depth, name in enumerate(names):
+                if name not in level_allowed:
+                    unknown.append(path)
+                    break
+                last = depth == len(names) - 1
+                if level_allowed[name] is None and not last:
+                    unknown.append(path)  # a plain field has no subfields
+                    break
+                if last:
+                    level_selected[name] = None
+                    break
+                if name in level_selected and level_selected[name] is None:
+                    break  # already selected whole
+                level_allowed = level_allowed[name]
+                level_selected = level_selected.setdefault(name, {})
+        if unknown:
+            raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+        return cls(allowed, selected)
+
+    def __contains__(self, name):
+        return self.selected is None or name in self.selected
+
+    def nested(self, name):
+        if self.selected is None or self.selected.get(name) is None:
+            return FieldSelection(self.allowed[name])
+        return FieldSelection(self.allowed[name], self.selected[name])
+
+    def pick(self, builders):
+        """
+        Build a dict from {name: zero-argument callable}, calling only the
+        selected ones, in the order the view declares them.
+        """
+        return {name: build() for name, build in builders.items() if name in self}
+
+    def columns(self, column_map, always=()):
+        """
+        Model columns needed for the selected fields, for QuerySet.only().
+        """
+        columns = list(always)
+        for name, names in column_map.items():
+            if name in self:
+                columns.extend(column for column in names if column not in columns)
+        return columns
+
+    def cache_key(self):
+        if self.selected is None:
+            return '*'
+        return ','.join(sorted(self._paths(self.selected)))
+
+    def _paths(self, selected, prefix=''):
+        for name, nested in selected.items():
+            if nested is None:
+                yield prefix + name
+            else:
+                yield from self._paths(nested, f'{prefix}{name}.')
@@ -0,0 +1,99 @@
+"""
+Sector-wide schedule integrity report.
+
+ScheduledCompetition.clean() only guards one save at a time, so rows
+written through bulk paths, the admin or older code can still break its
+rules. sector_integrity_report() checks a whole sector at once:
+
+- the schedule is loaded with one query and every stage/date timeline is
+  swept once for overlapping slots, more than one ongoing or reporting
+  competition, and slots that end before they start;
+- presence rows are checked with set-based SQL: competitions missing rows
+  for some of their sector's units, and rows for units of another sector;
+- competitions whose stage belongs to another sector.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import F
+
+from sahityo_core.models import ParticipantPresent, ScheduledCompetition, Sector, Unit
+from sahityo_core.timeline import find_overlaps
+
+SINGLE_STATUSES = ('ongoing', 'reporting')
+
+
+def _missing_presence(sector_id):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT sc.id, COUNT(*)
+            FROM {qn(ScheduledCompetition._meta.db_table)} sc
+            INNER JOIN {qn(Unit._meta.db_table)} u ON u.sector_id = sc.sector_id
+            WHERE sc.sector_id = %s AND NOT EXISTS (
+                SELECT 1 FROM {qn(ParticipantPresent._meta.db_table)} p
+                WHERE p.scheduled_competition_id = sc.id AND p.unit_id = u.id
+            )
+            GROUP BY sc.id
+            """,
+            [Sector._meta.pk.get_db_prep_value(sector_id, connection)],
+        )
+        rows = cursor.fetchall()
+    to_python = ScheduledCompetition._meta.pk.to_python
+    return [
+        {'scheduled_competition_id': str(to_python(competition_id)), 'missing_units': count}
+        for competition_id, count in rows
+    ]
+
+
+def sector_integrity_report(sector_id):
+    timelines = defaultdict(list)
+    statuses = defaultdict(list)
+    invalid_times = []
+    competitions = ScheduledCompetition.objects.filter(sector_id=sector_id).values_list(
+        'id', 'stage_id', 'date', 'status', 'start_time', 'end_time'
+    )
+    total = 0
+    for competition_id, stage_id, date, state, start, end in competitions:
+        total += 1
+        competition_id = str(competition_id)
+        if end <= start:
+            invalid_times.append(competition_id)
+        timelines[(str(stage_id), date)].append((start, end, competition_id))
+        if state in SINGLE_STATUSES:
+            statuses[(str(stage_id), date, state)].append(competition_id)
+
+    overlaps = [
+        {'stage_id': stage_id, 'date': date.isoformat() if date else None, 'scheduled_competition_ids': list(pair)}
+        for (stage_id, date), entries in timelines.items()
+        for pair in find_overlaps(entries)
+    ]
+    duplicate_statuses = [
+        {'stage_id': stage_id, 'date': date.isoformat() if date else None, 'status': state, 'scheduled_competition_ids': ids}
+        for (stage_id, date, state), ids in statuses.items()
+        if len(ids) > 1
+    ]
+
+    stage_sector_mismatches = [
+        str(id) for id in ScheduledCompetition.objects.filter(sector_id=sector_id)
+        .exclude(stage__sector_id=F('sector_id')).values_list('id', flat=True)
+    ]
+    orphan_presence = [
+        str(id) for id in ParticipantPresent.objects.filter(scheduled_competition__sector_id=sector_id)
+        .exclude(unit__sector_id=F('scheduled_competition__sector_id')).values_list('id', flat=True)
+    ]
+    missing_presence = _missing_presence(sector_id)
+
+    return {
+        'sector_id': str(sector_id),
+        'ok': not (overlaps or duplicate_statuses or invalid_times or stage_sector_mismatches
+                   or orphan_presence or missing_presence),
+        'scheduled_competitions': total,
+        'overlaps': overlaps,
+        'duplicate_statuses': duplicate_statuses,
+        'invalid_times': invalid_times,
+        'stage_sector_mismatches': stage_sector_mismatches,
+        'missing_presence': missing_presence,
+        'orphan_presence': orphan_presence,
+    }
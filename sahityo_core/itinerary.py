@@ -0,0 +1,57 @@
+"""
+A unit's whole festival plan: every scheduled competition of its sector
+across all stages and dates, in date/time order, with the unit's presence
+flags.
+
+The document is built from two queries (the unit's presence rows, then the
+sector's schedule read with a server-side iterator) and streamed as JSON
+row by row. Stage and competition names come from the cached topology and
+catalog. Its ETag is derived from the generations of the cache tags that
+every write to those rows bumps, so a repeat fetch is answered with 304
+without touching the database.
+"""
+import hashlib
+
+from sahityo_core.cache import CATALOG, sector_tag, tagged_key, unit_tag
+from sahityo_core.models import ParticipantPresent, ScheduledCompetition
+from sahityo_core.renderers import dumps
+
+
+def itinerary_etag(sector_id, unit_id):
+    key = tagged_key(f'itinerary:{sector_id}:{unit_id}', [sector_tag(sector_id), unit_tag(unit_id), CATALOG])
+    return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def stream_itinerary(sector_id, unit, stages, catalog):
+    """
+    Yield the JSON document in chunks; unit and stages are topology entries.
+    """
+    presence = {
+        str(competition_id): (participant_1_present, participant_2_present)
+        for competition_id, participant_1_present, participant_2_present in ParticipantPresent.objects.filter(
+            unit_id=unit['id']
+        ).values_list('scheduled_competition_id', 'participant_1_present', 'participant_2_present')
+    }
+    stages = {stage['id']: {'id': stage['id'], 'name': stage['name']} for stage in stages}
+    competitions = ScheduledCompetition.objects.filter(sector_id=sector_id).order_by(
+        'date', 'start_time'
+    ).values_list('id', 'competition_id', 'stage_id', 'date', 'reporting_time', 'start_time', 'end_time', 'status')
+
+    yield b'{"unit":' + dumps({'id': unit['id'], 'name': unit['name']}) + b',"itinerary":['
+    separator = b''
+    for id, competition_id, stage_id, date, reporting_time, start_time, end_time, state in competitions.iterator(chunk_size=500):
+        participant_1_present, participant_2_present = presence.get(str(id), (False, False))
+        yield separator + dumps({
+            'id': str(id),
+            'competition': catalog.competition(competition_id),
+            'stage': stages.get(str(stage_id)),
+            'date': date.isoformat() if date else None,
+            'reporting_time': reporting_time.isoformat(),
+            'start_time': start_time.isoformat(),
+            'end_time': end_time.isoformat(),
+            'status': state,
+            'participant_1_present': participant_1_present,
+            'participant_2_present': participant_2_present,
+        })
+        separator = b','
+    yield b']}'
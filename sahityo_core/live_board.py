@@ -0,0 +1,125 @@
+"""
+Sector live board: what is ongoing and reporting on every stage of a sector
+for a date, plus every unit's presence flags for those competitions.
+
+Hundreds of unit apps poll get_stages_with_competition_details for the same
+sector and date, so the board is built once per sector/date (coalesced, see
+sahityo_core.cache.cached_swr) and each request only projects its unit.
+"""
+from django.conf import settings
+
+from sahityo_core.cache import CATALOG, cached_swr, sector_tag
+from sahityo_core.catalog import catalog_registry
+from sahityo_core.models import ScheduledCompetition, ParticipantPresent
+from sahityo_core.topology import get_sector_topology
+
+LIVE_STATUSES = ('ongoing', 'reporting')
+
+
+def build_live_board(sector_id, date):
+    topology = get_sector_topology(sector_id)
+    stages = topology['stages'] if topology else []
+    catalog = catalog_registry.current()
+
+    live = {}
+    scheduled_competitions = ScheduledCompetition.objects.filter(
+        stage_id__in=[stage['id'] for stage in stages],
+        date=date,
+        status__in=LIVE_STATUSES,
+    ).order_by('pk').only('id', 'stage_id', 'competition_id', 'status', 'date', 'reporting_time', 'start_time', 'end_time')
+    for sc in scheduled_competitions:
+        # Keep the first row per stage and status, as .first() did
+        live.setdefault((str(sc.stage_id), sc.status), sc)
+
+    presence = {}
+    rows = ParticipantPresent.objects.filter(
+        scheduled_competition_id__in=[sc.id for sc in live.values()]
+    ).values_list('scheduled_competition_id', 'unit_id', 'participant_1_present', 'participant_2_present')
+    for scheduled_competition_id, unit_id, participant_1_present, participant_2_present in rows:
+        presence.setdefault(str(scheduled_competition_id), {})[str(unit_id)] = (
+            participant_1_present, participant_2_present
+        )
+
+    board = []
+    for stage in stages:
+        entry = {'id': stage['id'], 'name': stage['name']}
+        for status in LIVE_STATUSES:
+            sc = live.get((stage['id'], status))
+            if sc is None:
+                entry[status] = None
+                continue
+            competition = catalog.competition(sc.competition_id)
+            entry[status] = {
+                'id': str(sc.id),
+                'name': competition['name'],
+                'category': competition['category'],
+                'status': sc.status,
+                'date': sc.date.isoformat(),
+                'reporting_time': sc.reporting_time.isoformat(),
+                'start_time': sc.start_time.isoformat(),
+                'end_time': sc.end_time.isoformat(),
+                'presence': presence.get(str(sc.id), {}),
+            }
+        board.append(entry)
+    return board
+
+
+def get_live_board(sector_id, date):
+    return cached_swr(
+        f'live-board:{sector_id}:{date}',
+        # Competition and category names come from the catalog
+        [sector_tag(sector_id), CATALOG],
+        lambda: build_live_board(sector_id, date),
+        settings.LIVE_BOARD_CACHE_TIMEOUT,
+    )
+
+
+def _unit_competition(competition, unit_id, fields):
+    participant_1_present, participant_2_present = competition['presence'].get(str(unit_id), (False, False))
+    data = {field: competition[field] for field in fields}
+    data['is_your_first_candidate_present'] = participant_1_present
+    data['is_your_second_candidate_present'] = participant_2_present
+    return data
+
+
+def unit_live_board(board, unit_id):
+    """
+    Project the sector board onto one unit, in the response shape of
+    get_stages_with_competition_details.
+    """
+    response_data = []
+    for stage in board:
+        stage_data = {
+            "id": stage['id'],
+            "name": stage['name'],
+            "ongoing_competition": None,
+            "reporting_competition": None,
+            "reporting_time": None,
+            "date": None,
+            "start_time": None,
+            "end_time": None
+        }
+
+        ongoing = stage['ongoing']
+        if ongoing:
+            stage_data["ongoing_competition"] = _unit_competition(
+                ongoing, unit_id, ('id', 'name', 'category', 'status', 'start_time', 'end_time')
+            )
+            stage_data["reporting_time"] = ongoing['reporting_time']
+            stage_data["date"] = ongoing['date']
+            stage_data["start_time"] = ongoing['start_time']
+            stage_data["end_time"] = ongoing['end_time']
+
+        reporting = stage['reporting']
+        if reporting:
+            stage_data["reporting_competition"] = _unit_competition(
+                reporting, unit_id, ('id', 'name', 'category', 'status', 'reporting_time', 'start_time', 'end_time')
+            )
+            if not stage_data["reporting_time"]:
+                stage_data["reporting_time"] = reporting['reporting_time']
+                stage_data["date"] = reporting['date']
+                stage_data["start_time"] = reporting['start_time']
+                stage_data["end_time"] = reporting['end_time']
+
+        response_data.append(stage_data)
+    return response_data
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from sahityo_core.presence import backfill_presence
+
+
+class Command(BaseCommand):
+    help = "Create the missing ParticipantPresent rows (one per unit of each scheduled competition's sector)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sector', dest='sector_id', help="Only reconcile this sector (default: all sectors).")
+
+    def handle(self, *args, **options):
+        created = backfill_presence(options['sector_id'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} participant presence rows'))
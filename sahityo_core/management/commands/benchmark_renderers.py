@@ -0,0 +1,89 @@
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import resolve
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from sahityo_core.models import Sector, Stage, Unit, ScheduledCompetition
+from sahityo_core.renderers import msgpack
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request CPU time of the polling endpoints on the fast "
+        "rendering path against DRF's default renderers and negotiation. "
+        "View-level caches stay on in both runs, so the difference is the "
+        "rendering and negotiation cost alone. With msgpack installed the "
+        "MessagePack rendering of each endpoint is measured as well."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('sector_id')
+        parser.add_argument('--date', help='YYYY-MM-DD; defaults to the first scheduled date of the sector')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def endpoint_urls(self, sector, date):
+        stage = Stage.objects.filter(sector=sector).first()
+        unit = Unit.objects.filter(sector=sector).first()
+        scheduled = ScheduledCompetition.objects.filter(sector=sector, date=date).first()
+        if not (stage and unit and scheduled):
+            raise CommandError('The sector needs at least one stage, unit and scheduled competition on the date.')
+        return {
+            'scheduled_competitions_by_stage_date': f'/api/scheduled-competitions-by-stage-date/{stage.id}/?date={date}',
+            'scheduled_competition_detail': f'/api/scheduled-competition-detail/{scheduled.id}/',
+            'get_stages_with_competition_details': f'/api/get-stages-with-competition-details/{unit.id}/{date}/?sector_id={sector.id}',
+            'get_stage_competitions_for_unit': f'/api/get-stage-competitions-for-unit/{stage.id}/{unit.id}/?sector_id={sector.id}',
+        }
+
+    def cpu_per_request(self, client, url, iterations, **headers):
+        client.get(url, **headers)  # warm caches and the catalog registry
+        start = time.process_time()
+        for _ in range(iterations):
+            response = client.get(url, **headers)
+        elapsed = time.process_time() - start
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}')
+        return elapsed / iterations * 1000, len(response.content)
+
+    def handle(self, *args, **options):
+        try:
+            sector = Sector.objects.select_related('user').get(id=options['sector_id'])
+        except Sector.DoesNotExist:
+            raise CommandError('Sector not found')
+
+        date = options['date'] or ScheduledCompetition.objects.filter(
+            sector=sector, date__isnull=False
+        ).order_by('date').values_list('date', flat=True).first()
+        if date is None:
+            raise CommandError('The sector has no scheduled competitions')
+
+        client = APIClient()
+        client.force_authenticate(sector.user)
+        iterations = options['iterations']
+
+        header = f"{'endpoint':40} {'default ms':>11} {'fast ms':>9} {'speedup':>8} {'bytes':>8}"
+        if msgpack is not None:
+            header += f" {'msgpack ms':>11} {'msgpack bytes':>14}"
+        self.stdout.write(header)
+        for name, url in self.endpoint_urls(sector, date).items():
+            view = resolve(urlsplit(url).path).func.cls
+            fast = (view.renderer_classes, view.content_negotiation_class)
+
+            view.renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+            view.content_negotiation_class = DefaultContentNegotiation
+            try:
+                default_ms, size = self.cpu_per_request(client, url, iterations, HTTP_ACCEPT='application/json')
+            finally:
+                view.renderer_classes, view.content_negotiation_class = fast
+
+            fast_ms, _ = self.cpu_per_request(client, url, iterations, HTTP_ACCEPT='application/json')
+            line = f'{name:40} {default_ms:11.3f} {fast_ms:9.3f} {default_ms / fast_ms:7.2f}x {size:8d}'
+            if msgpack is not None:
+                msgpack_ms, msgpack_size = self.cpu_per_request(
+                    client, url, iterations, HTTP_ACCEPT='application/msgpack'
+                )
+                line += f' {msgpack_ms:11.3f} {msgpack_size:14d}'
+            self.stdout.write(line)
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sahityo_core import snapshots
+
+
+class Command(BaseCommand):
+    help = "Regenerate every static public-api snapshot under PUBLIC_SNAPSHOTS_DIR."
+
+    def handle(self, *args, **options):
+        snapshots.publish_all()
+        self.stdout.write(self.style.SUCCESS(f'Public snapshots written to {settings.PUBLIC_SNAPSHOTS_DIR}'))
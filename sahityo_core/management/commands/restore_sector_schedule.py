@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from sahityo_core.schedule_reset import restore_schedule_archive
+
+
+class Command(BaseCommand):
+    help = "Restore the scheduled competitions and participant presence saved by a sector reset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help="Path of a .json.gz archive under SCHEDULE_ARCHIVE_DIR.")
+
+    def handle(self, *args, **options):
+        competitions, participants, skipped = restore_schedule_archive(options['archive'])
+        for competition_id, reason in skipped:
+            self.stderr.write(self.style.WARNING(f'Skipped scheduled competition {competition_id}: {reason}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Restored {competitions} scheduled competitions and {participants} participant presence rows'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from sahityo_core.status_timer import StatusTimer
+
+
+class Command(BaseCommand):
+    help = "Apply scheduled status transitions (reporting, ongoing, finished) as their times arrive."
+
+    def handle(self, *args, **options):
+        timer = StatusTimer()
+        self.stdout.write(f'Status timer running as {timer.holder}')
+        try:
+            timer.run()
+        except KeyboardInterrupt:
+            timer.stop()
@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from sahityo_core.integrity import sector_integrity_report
+from sahityo_core.models import Sector
+
+
+class Command(BaseCommand):
+    help = "Report schedule conflicts and presence inconsistencies, as JSON, for one or all sectors."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sector', dest='sector_id', help="Only check this sector (default: all sectors).")
+
+    def handle(self, *args, **options):
+        if options['sector_id']:
+            sector_ids = [options['sector_id']]
+        else:
+            sector_ids = Sector.objects.values_list('id', flat=True)
+        reports = [sector_integrity_report(sector_id) for sector_id in sector_ids]
+        self.stdout.write(json.dumps(reports, indent=2))
+        if not all(report['ok'] for report in reports):
+            self.stderr.write(self.style.WARNING('Integrity problems found'))
@@ -0,0 +1,60 @@
+from django.http import FileResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from sahityo_core.compression import BROTLI, accepted_encoding, available_encodings, compress, min_size
+
+_strong_etag_re = _lazy_re_compile(r'^\s*"')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Django's GZipMiddleware, with brotli for clients that prefer it.
+
+    gzip keeps Django's BREACH mitigation (a random-length filename pads the
+    compressed size) and its handling of streaming responses. Brotli has no
+    room for such padding, so it is only used for requests without
+    credentials (no Authorization header or cookies), whose responses hold
+    no per-user secrets; everything else gets padded gzip.
+
+    Left untouched: responses that already carry a Content-Encoding
+    (precompressed cache entries, see
+    sahityo_core.compression.encoded_response), responses marked
+    Cache-Control: no-transform (the token endpoints mark theirs), and
+    FileResponse bodies, which are media files.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or isinstance(response, FileResponse):
+            return response
+        if 'no-transform' in response.get('Cache-Control', '').lower():
+            return response
+        if not response.streaming and len(response.content) < min_size():
+            return response
+        if (
+            not response.streaming
+            and BROTLI in available_encodings()
+            and not carries_credentials(request)
+            and accepted_encoding(request) == BROTLI
+        ):
+            return self.brotli_response(response)
+        return super().process_response(request, response)
+
+    def brotli_response(self, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = compress(response.content, BROTLI)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        # The body changed, so a strong ETag no longer matches it byte for byte
+        etag = response.get('ETag')
+        if etag and _strong_etag_re.match(etag):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = BROTLI
+        return response
+
+
+def carries_credentials(request):
+    return bool(request.META.get('HTTP_AUTHORIZATION') or request.COOKIES)
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:04
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sahityo_core', '0008_gallery_news_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledcompetition',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledcompetition',
+            name='reported_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledcompetition',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='StageDrift',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('reporting_delay', models.FloatField(default=0)),
+                ('start_delay', models.FloatField(default=0)),
+                ('reporting_samples', models.PositiveIntegerField(default=0)),
+                ('start_samples', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drifts', to='sahityo_core.stage')),
+            ],
+            options={
+                'unique_together': {('stage', 'date')},
+            },
+        ),
+    ]
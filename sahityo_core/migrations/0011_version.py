@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sahityo_core', '0010_schedulerlease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participantpresent',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='scheduledcompetition',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sahityo_core', '0011_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulerlease',
+            name='last_run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
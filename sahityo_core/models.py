@@ -112,6 +112,14 @@ class ScheduledCompetition(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='not_started')
 
+    # Actual transition times, recorded when the status changes
+    reported_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Bumped by every write; see sahityo_core/versioning.py
+    version = models.PositiveIntegerField(default=1)
+
     class Meta:
         unique_together = ('competition', 'sector')
     
@@ -157,12 +165,50 @@ class ScheduledCompetition(models.Model):
         return f"{self.competition.name} - {self.sector.name}"
 
 
+class StageDrift(models.Model):
+    """
+    How late a stage is running on a date: exponentially weighted averages of
+    the delay between planned and actual reporting/start times.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    stage = models.ForeignKey(Stage, on_delete=models.CASCADE, related_name='drifts')
+    date = models.DateField()
+    reporting_delay = models.FloatField(default=0)  # seconds
+    start_delay = models.FloatField(default=0)  # seconds
+    reporting_samples = models.PositiveIntegerField(default=0)
+    start_samples = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('stage', 'date')
+
+    def __str__(self):
+        return f"{self.stage.name} - {self.date}"
+
+
+class SchedulerLease(models.Model):
+    """
+    Leader election for background jobs: whoever holds an unexpired lease
+    runs the job, and renews it while alive.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    holder = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+    # How far the job had got when the lease was last renewed, so a new
+    # holder can catch up from there
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.holder}"
+
+
 class ParticipantPresent(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     scheduled_competition = models.ForeignKey(ScheduledCompetition, on_delete=models.CASCADE, related_name='participants')
     unit = models.ForeignKey(Unit, on_delete=models.CASCADE)
     participant_1_present = models.BooleanField(default=False)
     participant_2_present = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,103 @@
+"""
+Reconciliation of ParticipantPresent rows.
+
+Every scheduled competition should have one presence row per unit of its
+sector. Rows are created when a competition is scheduled, but a unit added
+later has none for the competitions that already exist. backfill_presence()
+inserts every missing (scheduled competition, unit) pair of a sector with a
+single INSERT ... SELECT instead of looping over competitions in Python.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sahityo_core.cache import invalidate_tags_on_commit, sector_tag, unit_tag
+from sahityo_core.models import ParticipantPresent, ScheduledCompetition, Sector, Unit
+
+# SQL expression producing a new primary key in the column format Django
+# uses for UUIDField on each backend (char(32) hex or a native uuid).
+_UUID_SQL = {
+    'sqlite': 'lower(hex(randomblob(16)))',
+    'postgresql': 'gen_random_uuid()',
+    'mysql': "REPLACE(UUID(), '-', '')",
+}
+
+
+def invalidate_presence_on_commit(sector_ids, unit_ids=()):
+    """
+    Presence rows have no cache receivers (see sahityo_core.signals), so
+    whoever writes them bumps the sector and unit tags, once per operation.
+    """
+    invalidate_tags_on_commit(*{sector_tag(id) for id in sector_ids}, *{unit_tag(id) for id in unit_ids})
+
+
+def _backfill_sql(sector_id):
+    qn = connection.ops.quote_name
+    presence = qn(ParticipantPresent._meta.db_table)
+    scheduled = qn(ScheduledCompetition._meta.db_table)
+    unit = qn(Unit._meta.db_table)
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = f"""
+        INSERT INTO {presence} (
+            id, scheduled_competition_id, unit_id,
+            participant_1_present, participant_2_present, version, created_at, updated_at
+        )
+        SELECT {_UUID_SQL[connection.vendor]}, sc.id, u.id, %s, %s, 1, %s, %s
+        FROM {scheduled} sc
+        INNER JOIN {unit} u ON u.sector_id = sc.sector_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {presence} p
+            WHERE p.scheduled_competition_id = sc.id AND p.unit_id = u.id
+        )
+    """
+    params = [False, False, now, now]
+    if sector_id is not None:
+        sql += ' AND sc.sector_id = %s'
+        params.append(Sector._meta.pk.get_db_prep_value(sector_id, connection))
+    if connection.vendor != 'mysql':
+        # Concurrent backfills may race past NOT EXISTS on the same pair
+        sql += ' ON CONFLICT DO NOTHING'
+    return sql, params
+
+
+def _backfill_orm(sector_id):
+    # Backends without a UUID expression: find the missing pairs with one
+    # query and insert them in one batch.
+    competitions = ScheduledCompetition.objects.all()
+    if sector_id is not None:
+        competitions = competitions.filter(sector_id=sector_id)
+    existing = set(
+        ParticipantPresent.objects.filter(scheduled_competition__in=competitions)
+        .values_list('scheduled_competition_id', 'unit_id')
+    )
+    pairs = competitions.filter(sector__units__isnull=False).values_list('id', 'sector__units__id')
+    records = [
+        ParticipantPresent(scheduled_competition_id=competition_id, unit_id=unit_id)
+        for competition_id, unit_id in pairs
+        if (competition_id, unit_id) not in existing
+    ]
+    ParticipantPresent.objects.bulk_create(records, ignore_conflicts=True)
+    return len(records)
+
+
+def backfill_presence(sector_id=None):
+    """
+    Create the missing presence rows of a sector (every sector when
+    sector_id is None) and return how many were inserted.
+    """
+    with transaction.atomic():
+        if connection.vendor in _UUID_SQL:
+            with connection.cursor() as cursor:
+                cursor.execute(*_backfill_sql(sector_id))
+                created = cursor.rowcount
+        else:
+            created = _backfill_orm(sector_id)
+
+        # A raw INSERT sends no post_save signals
+        if created:
+            if sector_id is not None:
+                sector_ids = [sector_id]
+            else:
+                sector_ids = Sector.objects.values_list('id', flat=True)
+            invalidate_presence_on_commit(sector_ids)
+    return created
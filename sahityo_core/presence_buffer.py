@@ -0,0 +1,206 @@
+"""
+Write-behind buffering of presence ticks (opt in with PRESENCE_WRITE_BEHIND).
+
+Units report in bursts, and on SQLite every presence update is its own
+write transaction contending for the database lock. With the buffer on,
+the presence endpoints queue the flags they were sent instead of writing
+them; the queue is flushed in one transaction every
+PRESENCE_FLUSH_INTERVAL_MS, as soon as it holds PRESENCE_FLUSH_MAX_ITEMS
+rows, and when the process exits. Ticks for the same row are merged, so a
+row is written at most once per flush, and rows sharing the same flags are
+updated with one UPDATE.
+
+The queue lives in the process that took the request. The presence
+endpoints' responses and the scheduled competition details read in that
+process (build_scheduled_competition_details) overlay the queued flags, so
+a manager sees their own ticks right away. Every other read (the unit,
+stage and live-board endpoints, and all reads in other processes) sees
+them after the flush. Only existing rows are buffered, and a versioned (conditional)
+write flushes the row's queued ticks first and then bypasses the buffer.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from sahityo_core.models import ParticipantPresent
+from sahityo_core.presence import invalidate_presence_on_commit
+from sahityo_core.versioning import save_versioned
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_FIELDS = ('participant_1_present', 'participant_2_present')
+
+# Errors caused by the data of a tick rather than the database being busy:
+# such ticks would fail on every retry. Values are checked by
+# clean_presence_changes() on the way in, so anything else (a bug included)
+# requeues the batch instead of dropping ticks.
+DATA_ERRORS = (DataError, IntegrityError, ValidationError)
+
+
+def clean_presence_changes(changes):
+    """
+    Coerce request values (true, "true", 1, ...) to booleans the way the
+    API's serializers do, raising ValidationError for anything else, so
+    nothing unwritable reaches the queue.
+    """
+    cleaned = {}
+    for field, value in changes.items():
+        if field not in PRESENCE_FIELDS:
+            raise ValidationError(f'Unknown presence field: {field}')
+        try:
+            cleaned[field] = serializers.BooleanField().to_internal_value(value)
+        except serializers.ValidationError as e:
+            raise ValidationError(f'{field}: {e.detail[0]}')
+    return cleaned
+
+
+class PresenceBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        # (scheduled_competition_id, unit_id) -> (sector_id, {field: value})
+        self.pending = {}
+        # Taken by a flush that has not committed yet; still overlaid on reads
+        self.flushing = {}
+
+    def add(self, scheduled_competition_id, unit_id, sector_id, changes):
+        changes = clean_presence_changes(changes)
+        key = (str(scheduled_competition_id), str(unit_id))
+        with self._lock:
+            previous = self.pending.get(key, (sector_id, {}))[1]
+            self.pending[key] = (sector_id, {**previous, **changes})
+            full = len(self.pending) >= settings.PRESENCE_FLUSH_MAX_ITEMS
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='presence-buffer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self.flush()
+
+    def overlay(self, scheduled_competition_id):
+        """
+        {unit_id: {field: value}} of the queued flags for one competition.
+        """
+        competition_id = str(scheduled_competition_id)
+        with self._lock:
+            entries = [*self.flushing.items(), *self.pending.items()]
+        overlay = defaultdict(dict)
+        for (entry_competition_id, unit_id), (sector_id, changes) in entries:
+            if entry_competition_id == competition_id:
+                overlay[unit_id].update(changes)
+        return overlay
+
+    def is_pending(self, scheduled_competition_id, unit_id):
+        key = (str(scheduled_competition_id), str(unit_id))
+        with self._lock:
+            return key in self.pending or key in self.flushing
+
+    def flush(self):
+        """
+        Write every queued tick in one transaction; returns the rows queued.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self.flushing, self.pending = self.pending, {}
+                batch = self.flushing
+            if not batch:
+                return 0
+            try:
+                try:
+                    self._write(batch)
+                except DATA_ERRORS:
+                    # One bad tick must not hold back the rest: write them
+                    # one by one and drop the ones that fail
+                    logger.exception('Presence flush rejected; writing the ticks one by one')
+                    self._write_each(batch)
+            except Exception:
+                logger.exception('Presence flush failed; ticks requeued')
+                with self._lock:
+                    # Ticks queued meanwhile are newer and win
+                    for key, (sector_id, changes) in batch.items():
+                        newer = self.pending.get(key, (sector_id, {}))[1]
+                        self.pending[key] = (sector_id, {**changes, **newer})
+                    self.flushing = {}
+                raise
+            with self._lock:
+                self.flushing = {}
+            return len(batch)
+
+    def _write_each(self, batch):
+        for key in list(batch):
+            try:
+                self._write({key: batch[key]})
+            except DATA_ERRORS:
+                logger.error('Dropped presence tick %s: %s', key, batch[key][1], exc_info=True)
+            # Written or dropped; only the rest is requeued on a later failure
+            del batch[key]
+
+    def _write(self, batch):
+        # flags -> competition -> units
+        groups = defaultdict(lambda: defaultdict(list))
+        for (competition_id, unit_id), (sector_id, changes) in batch.items():
+            groups[tuple(sorted(changes.items()))][competition_id].append(unit_id)
+        now = timezone.now()
+        with transaction.atomic():
+            for changes, units_by_competition in groups.items():
+                # Rows deleted meanwhile (status reset) match nothing and are dropped
+                ParticipantPresent.objects.filter(reduce(or_, (
+                    Q(scheduled_competition_id=competition_id, unit_id__in=unit_ids)
+                    for competition_id, unit_ids in units_by_competition.items()
+                ))).update(**dict(changes), version=F('version') + 1, updated_at=now)
+            invalidate_presence_on_commit(
+                [sector_id for sector_id, changes in batch.values()],
+                [unit_id for competition_id, unit_id in batch],
+            )
+
+    def _run(self):
+        while True:
+            time.sleep(settings.PRESENCE_FLUSH_INTERVAL_MS / 1000)
+            try:
+                self.flush()
+            except Exception:
+                pass  # logged and requeued by flush()
+            finally:
+                close_old_connections()
+
+
+presence_buffer = PresenceBuffer()
+
+
+def write_presence(participant, sector_id, changes, version=None):
+    """
+    Apply changes ({field: value}) to participant, raising ValidationError
+    for values that are not booleans. With the buffer on and no
+    version they are queued and True is returned, with participant showing
+    its queued flags; otherwise they are written now (raising
+    VersionConflict on a stale version) and False is returned.
+    """
+    changes = clean_presence_changes(changes)
+    competition_id, unit_id = participant.scheduled_competition_id, participant.unit_id
+    if settings.PRESENCE_WRITE_BEHIND and version is None:
+        presence_buffer.add(competition_id, unit_id, sector_id, changes)
+        for field, value in presence_buffer.overlay(competition_id).get(str(unit_id), {}).items():
+            setattr(participant, field, value)
+        return True
+
+    if presence_buffer.is_pending(competition_id, unit_id):
+        # Check the version against the row with its queued ticks written
+        presence_buffer.flush()
+        participant.refresh_from_db(fields=[*PRESENCE_FIELDS, 'version', 'updated_at'])
+    for field, value in changes.items():
+        setattr(participant, field, value)
+    save_versioned(participant, list(changes), version)
+    invalidate_presence_on_commit([sector_id], [unit_id])
+    return False
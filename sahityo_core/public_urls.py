@@ -9,7 +9,7 @@ from sahityo_core.public_views import (
 
 urlpatterns = [
     path('add-news/', create_result_news_gallery, name='create_result_news_gallery'),
-    path('update-result/<uuid:pk>/', update_result, name='update_result'),
+    path('update-result/<uuid:competition_id>/', update_result, name='update_result'),
     path('categories/', category_with_competitions, name='category_with_competitions'),
     path('news-gallery/', top_and_all_news_gallery, name='top_and_all_news_gallery'),
     path('result/<uuid:competition_id>/', get_result_by_competition, name='get_result_by_competition'),
@@ -1,8 +1,12 @@
+from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from sahityo_core import Result, News, Gallery, Competition, Category
-from sahityo_core.serializers import ResultSerializer, NewsSerializer, GallerySerializer, CategoryCompetitionSerializer
+from sahityo_core.models import Result
+from sahityo_core.serializers import ResultSerializer, NewsSerializer, GallerySerializer
+from sahityo_core.snapshots import categories_document, news_gallery_document, result_document
+from sahityo_core.cache import CATALOG
+from sahityo_core.renderers import fast_json, cached_render
 
 @api_view(['POST'])
 def create_result_news_gallery(request):
@@ -46,13 +50,14 @@ def update_result(request, competition_id):
 
 
 @api_view(['GET'])
+@fast_json
 def category_with_competitions(request):
     """
     Get all categories with competitions.
+    Served as rendered bytes keyed on the catalog tag, so steady-state
+    requests never touch the database.
     """
-    categories = Category.objects.all()
-    serializer = CategoryCompetitionSerializer(categories, many=True)
-    return Response(serializer.data)
+    return cached_render(request, 'public-categories', [CATALOG], categories_document, settings.CATALOG_CACHE_TIMEOUT)
 
 
 @api_view(['GET'])
@@ -60,18 +65,7 @@ def top_and_all_news_gallery(request):
     """
     Get top 5 and all news and gallery items.
     """
-    top_news = News.objects.order_by('-created_at')[:5]
-    top_gallery = Gallery.objects.order_by('-created_at')[:5]
-
-    all_news = News.objects.all()
-    all_gallery = Gallery.objects.all()
-
-    return Response({
-        'top_news': NewsSerializer(top_news, many=True).data,
-        'top_gallery': GallerySerializer(top_gallery, many=True).data,
-        'all_news': NewsSerializer(all_news, many=True).data,
-        'all_gallery': GallerySerializer(all_gallery, many=True).data,
-    })
+    return Response(news_gallery_document())
 
 
 @api_view(['GET'])
@@ -79,9 +73,8 @@ def get_result_by_competition(request, competition_id):
     """
     Get result by competition ID.
     """
-    try:
-        result = Result.objects.get(competition__id=competition_id)
-    except Result.DoesNotExist:
+    data = result_document(competition_id)
+    if data is None:
         return Response({'error': 'No result found for this competition.'}, status=status.HTTP_404_NOT_FOUND)
-    
-    return Response(ResultSerializer(result).data)
+
+    return Response(data)
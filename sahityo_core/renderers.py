@@ -0,0 +1,144 @@
+"""
+Fast rendering for the high-frequency (polling) endpoints.
+
+FastJSONRenderer encodes with orjson when it is installed, which handles
+UUIDs and datetimes natively, and falls back to DRF's encoder otherwise;
+both produce the same JSON as DRF's JSONRenderer. Views opt in with
+@fast_json, which also limits them to this renderer so content negotiation
+has nothing to decide. cached_render() caches the rendered (and already
+compressed) bytes of responses that are identical for every caller.
+
+MessagePackRenderer/MessagePackParser add a binary alternative negotiated
+through Accept/Content-Type (application/msgpack) when the optional
+msgpack package is installed. Values JSON has no type for (UUIDs,
+datetimes) are encoded as the same strings the JSON renderers produce.
+"""
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from sahityo_core.cache import cached
+from sahityo_core.compression import encoded_response, precompress
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+    def dumps(data):
+        return orjson.dumps(data, default=_encoder.default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(data):
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            # Some unpack errors (FormatError, StackError) carry no message
+            raise ParseError(f'MessagePack parse error - {str(exc) or type(exc).__name__}')
+
+
+class CompactJSONRenderer(FastJSONRenderer):
+    """
+    Selected with ?format=compact; views check request.accepted_renderer.format
+    and build the normalized representation from sahityo_core.compact.
+    """
+    format = 'compact'
+
+
+class FastContentNegotiation(DefaultContentNegotiation):
+    """
+    Picks the view's first renderer without parsing Accept when the client
+    takes anything or JSON and no ?format= override was asked for.
+    """
+    default_accepts = ('', '*/*', 'application/json')
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if (
+            not format_suffix
+            and self.settings.URL_FORMAT_OVERRIDE not in request.query_params
+            and request.META.get('HTTP_ACCEPT', '') in self.default_accepts
+        ):
+            return renderers[0], renderers[0].media_type
+        return super().select_renderer(request, renderers, format_suffix)
+
+
+BINARY_RENDERER_CLASSES = [MessagePackRenderer] if msgpack is not None else []
+FAST_RENDERER_CLASSES = [FastJSONRenderer, *BINARY_RENDERER_CLASSES]
+COMPACT_RENDERER_CLASSES = [FastJSONRenderer, CompactJSONRenderer, *BINARY_RENDERER_CLASSES]
+
+
+def fast_json(func=None, compact=False):
+    """
+    Put below @api_view, like @permission_classes. With compact=True the
+    view also offers ?format=compact.
+    """
+    def decorator(func):
+        func.renderer_classes = COMPACT_RENDERER_CLASSES if compact else FAST_RENDERER_CLASSES
+        func.content_negotiation_class = FastContentNegotiation
+        return func
+
+    return decorator(func) if func is not None else decorator
+
+
+def wants_compact(request):
+    return request.accepted_renderer.format == CompactJSONRenderer.format
+
+
+def cached_render(request, name, tags, builder, timeout, status=200):
+    """
+    Render builder()'s data with the negotiated renderer and cache the bytes,
+    precompressed, per renderer format under the given invalidation tags.
+    """
+    renderer = request.accepted_renderer
+    media_type = request.accepted_media_type
+    variants = cached(
+        f'{name}:{renderer.format}',
+        tags,
+        lambda: precompress(renderer.render(builder(), media_type, {'request': request})),
+        timeout,
+    )
+    return encoded_response(request, variants, renderer.media_type, status)
@@ -0,0 +1,155 @@
+"""
+Sector schedule reset with an undo archive.
+
+reset_sector_schedule() deletes every scheduled competition of the sector,
+with its presence rows, in small batches. Each batch is its own short
+transaction, so readers and other writers interleave instead of waiting on
+one long delete: it locks a batch of competitions, appends them and their
+presence rows to a gzipped JSON archive under SCHEDULE_ARCHIVE_DIR (one
+line and one gzip member per batch, synced to disk), and deletes exactly
+those rows with raw statements. A row written while the reset runs is
+thus either in a later batch, and archived with it, or not deleted. The
+batches skip the ORM delete collector, which is safe because
+ParticipantPresent is the only model referencing ScheduledCompetition and
+is deleted alongside it.
+
+restore_schedule_archive() loads an archive back.
+"""
+import gzip
+import io
+import os
+from itertools import chain
+
+from django.conf import settings
+from django.core import serializers
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sahityo_core.cache import invalidate_tags_on_commit, sector_tag, stage_tag
+from sahityo_core.models import ParticipantPresent, ScheduledCompetition, Stage, Unit
+
+
+def _invalidate_sector_schedule(sector_id):
+    stage_ids = Stage.objects.filter(sector_id=sector_id).values_list('id', flat=True)
+    invalidate_tags_on_commit(sector_tag(sector_id), *(stage_tag(id) for id in stage_ids))
+
+
+def _archive_batch(fh, objects):
+    # Each batch is a gzip member of its own holding one JSON line; gzip
+    # readers see the members as one stream
+    with gzip.GzipFile(fileobj=fh, mode='wb') as gz:
+        stream = io.TextIOWrapper(gz, encoding='utf-8')
+        serializers.serialize('json', objects, stream=stream)
+        stream.write('\n')
+        stream.flush()
+        stream.detach()
+    fh.flush()
+    os.fsync(fh.fileno())
+
+
+def _delete_batch(sector_id, batch_size, fh):
+    competitions = list(
+        ScheduledCompetition.objects.select_for_update().filter(sector_id=sector_id).order_by('pk')[:batch_size]
+    )
+    if not competitions:
+        return 0
+    participants = ParticipantPresent.objects.filter(scheduled_competition__in=competitions).order_by('pk')
+    # Archived before the delete commits; a batch that then fails to commit
+    # is restored as rows that still exist, which are left alone
+    _archive_batch(fh, chain(competitions, participants.iterator()))
+
+    qn = connection.ops.quote_name
+    ids = [ScheduledCompetition._meta.pk.get_db_prep_value(obj.id, connection) for obj in competitions]
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {qn(ParticipantPresent._meta.db_table)} '
+            f'WHERE scheduled_competition_id IN ({placeholders})',
+            ids,
+        )
+        cursor.execute(
+            f'DELETE FROM {qn(ScheduledCompetition._meta.db_table)} WHERE id IN ({placeholders})',
+            ids,
+        )
+        return cursor.rowcount
+
+
+def reset_sector_schedule(sector_id, batch_size=None):
+    """
+    Archive and delete, batch by batch, every scheduled competition of the
+    sector and its presence rows. Returns (archive path, number of
+    competitions deleted).
+    """
+    batch_size = batch_size or settings.SCHEDULE_RESET_BATCH_SIZE
+    directory = os.path.join(settings.SCHEDULE_ARCHIVE_DIR, str(sector_id))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, timezone.now().strftime('%Y%m%dT%H%M%S%fZ') + '.json.gz')
+    deleted = 0
+    with open(path, 'xb') as fh:
+        while True:
+            with transaction.atomic():
+                count = _delete_batch(sector_id, batch_size, fh)
+                # Raw deletes send no post_delete signals
+                if count:
+                    _invalidate_sector_schedule(sector_id)
+            if not count:
+                return path, deleted
+            deleted += count
+
+
+def restore_schedule_archive(path):
+    """
+    Re-insert the rows of an archive. Rows that still exist are left as they
+    are. An archived competition is skipped, together with its presence
+    rows, when it fails the checks ScheduledCompetition.save() runs: its
+    stage was deleted, it was rescheduled since (same competition and sector
+    under a new id), or it now overlaps another competition on its stage.
+    Presence rows whose unit has since been deleted are skipped too.
+    created_at/updated_at are set to the time of the restore.
+    Returns (competitions restored, presence rows restored, skipped), with
+    skipped a list of (competition id, reason).
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        objects = [
+            deserialized.object
+            for line in fh if line.strip()
+            for deserialized in serializers.deserialize('json', line)
+        ]
+    competitions = [obj for obj in objects if isinstance(obj, ScheduledCompetition)]
+    participants = [obj for obj in objects if isinstance(obj, ParticipantPresent)]
+
+    unit_ids = set(Unit.objects.filter(
+        id__in={obj.unit_id for obj in participants}
+    ).values_list('id', flat=True))
+    participants = [obj for obj in participants if obj.unit_id in unit_ids]
+
+    with transaction.atomic():
+        live_ids = set(ScheduledCompetition.objects.filter(
+            id__in=[obj.id for obj in competitions]
+        ).values_list('id', flat=True))
+        restored, skipped = 0, []
+        for obj in sorted(competitions, key=lambda obj: obj.start_time):
+            if obj.id in live_ids:
+                continue
+            try:
+                obj.full_clean()
+            except ValidationError as e:
+                skipped.append((obj.id, ' '.join(e.messages)))
+                continue
+            # One at a time, so the next competition is checked against this
+            # one too. bulk_create skips post_save, so no presence rows are
+            # generated for the restored competitions; the archived ones are
+            # used instead.
+            ScheduledCompetition.objects.bulk_create([obj])
+            live_ids.add(obj.id)
+            restored += 1
+        present = ParticipantPresent.objects.filter(scheduled_competition_id__in=live_ids)
+        participants_before = present.count()
+        ParticipantPresent.objects.bulk_create(
+            [obj for obj in participants if obj.scheduled_competition_id in live_ids],
+            ignore_conflicts=True,
+        )
+        for sector_id in {obj.sector_id for obj in competitions}:
+            _invalidate_sector_schedule(sector_id)
+        return restored, present.count() - participants_before, skipped
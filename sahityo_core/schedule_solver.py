@@ -0,0 +1,153 @@
+"""
+Automatic placement of unscheduled competitions onto stage timelines.
+
+The solver works on plain data so it can be previewed without touching the
+database:
+
+    items   [(key, category, duration)], duration a timedelta
+    stages  [stage_key, ...]
+    days    [(window_start, window_end), ...] in the order they should fill;
+            a repeated window counts once
+    busy    [(stage_key, day_index, start, end, category)] already scheduled
+
+Each item is placed at the earliest start where its stage is free (with
+`changeover` between consecutive competitions on a stage) and no
+competition of the same category runs on another stage, so one age group
+never has to be in two places. Days are tried in order, so fewer days are
+used whenever the items fit.
+
+A single greedy pass places the longest items first (LPT). Local search
+then re-runs the greedy placement on perturbed orders, moving unplaced
+items and items from the last used day towards the front, and keeps the
+best plan by (unplaced items, days used, end of the last day). A full
+catalog (a few hundred items) takes well under a second per pass; the
+search stops at `time_budget` seconds.
+"""
+import random
+import time
+from datetime import timedelta
+
+from sahityo_core.timeline import IntervalIndex
+
+
+class Plan:
+    def __init__(self, placements, unplaced):
+        self.placements = placements  # key -> (stage_key, day_index, start, end)
+        self.unplaced = unplaced
+
+    @property
+    def days_used(self):
+        return len({day for stage, day, start, end in self.placements.values()})
+
+    def score(self):
+        last_day = max((day for stage, day, start, end in self.placements.values()), default=-1)
+        last_end = max(
+            (end for stage, day, start, end in self.placements.values() if day == last_day),
+            default=None,
+        )
+        return (len(self.unplaced), self.days_used, last_day, last_end.timestamp() if last_end else 0)
+
+
+class _State:
+    def __init__(self, stages, days, busy, changeover):
+        self.stages = stages
+        self.days = days
+        self.changeover = changeover
+        # A window listed twice is one day: its capacity lives under the
+        # first index only
+        first = {}
+        self.day_map = [first.setdefault(window, index) for index, window in enumerate(days)]
+        self.day_indices = sorted(set(self.day_map))
+        self.stage_timelines = {}
+        self.category_timelines = {}
+        for stage, day, start, end, category in busy:
+            self.occupy(stage, self.day_map[day], start, end, category)
+
+    def _timeline(self, timelines, key):
+        timeline = timelines.get(key)
+        if timeline is None:
+            timeline = timelines[key] = IntervalIndex()
+        return timeline
+
+    def occupy(self, stage, day, start, end, category):
+        self._timeline(self.stage_timelines, (stage, day)).add(start, end + self.changeover)
+        self._timeline(self.category_timelines, (category, day)).add(start, end)
+
+    def earliest(self, day, stage, category, duration):
+        window_start, window_end = self.days[day]
+        stage_timeline = self.stage_timelines.get((stage, day))
+        category_timeline = self.category_timelines.get((category, day))
+        start = window_start
+        while start + duration <= window_end:
+            end = start + duration
+            blocked = stage_timeline.latest_end(start, end + self.changeover) if stage_timeline else None
+            if blocked is None and category_timeline:
+                blocked = category_timeline.latest_end(start, end)
+            if blocked is None:
+                return start
+            start = blocked
+        return None
+
+
+def _greedy(order, stages, days, busy, changeover):
+    state = _State(stages, days, busy, changeover)
+    placements = {}
+    unplaced = []
+    for key, category, duration in order:
+        best = None
+        for day in state.day_indices:
+            for stage in stages:
+                start = state.earliest(day, stage, category, duration)
+                if start is not None and (best is None or start < best[2]):
+                    best = (stage, day, start)
+            if best is not None:
+                break
+        if best is None:
+            unplaced.append(key)
+            continue
+        stage, day, start = best
+        state.occupy(stage, day, start, start + duration, category)
+        placements[key] = (stage, day, start, start + duration)
+    return Plan(placements, unplaced)
+
+
+def _perturb(order, plan, rng):
+    """
+    Either move part of the items that ended up on the last day (or
+    unplaced) to the front of the order, or swap a few random pairs.
+    """
+    order = list(order)
+    last_day = max((day for stage, day, start, end in plan.placements.values()), default=0)
+    late = set(plan.unplaced) | {
+        key for key, (stage, day, start, end) in plan.placements.items() if day == last_day
+    }
+    if late and rng.random() < 0.5:
+        promoted = [item for item in order if item[0] in late]
+        rng.shuffle(promoted)
+        promoted = promoted[:max(1, len(promoted) // 2)]
+        promoted_keys = {item[0] for item in promoted}
+        return promoted + [item for item in order if item[0] not in promoted_keys]
+    for _ in range(max(1, len(order) // 20)):
+        i, j = rng.randrange(len(order)), rng.randrange(len(order))
+        order[i], order[j] = order[j], order[i]
+    return order
+
+
+def solve(items, stages, days, busy=(), changeover=timedelta(0), time_budget=2.0, seed=0):
+    """
+    Return the best Plan found for placing items; see the module docstring.
+    """
+    if not items or not stages or not days:
+        return Plan({}, [key for key, category, duration in items])
+
+    order = sorted(items, key=lambda item: (-item[2], item[1], item[0]))
+    best_order, best = order, _greedy(order, stages, days, busy, changeover)
+
+    rng = random.Random(seed)
+    deadline = time.monotonic() + time_budget
+    while time.monotonic() < deadline and best.score()[:2] != (0, 1):
+        candidate_order = _perturb(best_order, best, rng)
+        candidate = _greedy(candidate_order, stages, days, busy, changeover)
+        if candidate.score() < best.score():
+            best_order, best = candidate_order, candidate
+    return best
@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from sahityo_core import snapshots
+from sahityo_core.cache import CATALOG, invalidate_tags_on_commit, sector_tag, stage_tag, unit_tag
+from sahityo_core.events import schedule_changed
+from sahityo_core.models import (
+    Result, News, Gallery, Category, Competition, Sector, Stage, Unit, ScheduledCompetition,
+)
+
+
+def _publish_on_commit(publisher, *args):
+    if snapshots.snapshots_enabled():
+        transaction.on_commit(lambda: snapshots.safe_publish(publisher, *args))
+
+
+@receiver([post_save, post_delete], sender=Result)
+def publish_result_snapshot(sender, instance, **kwargs):
+    _publish_on_commit(snapshots.publish_result, instance.competition_id)
+
+
+@receiver([post_save, post_delete], sender=News)
+@receiver([post_save, post_delete], sender=Gallery)
+def publish_news_gallery_snapshot(sender, instance, **kwargs):
+    _publish_on_commit(snapshots.publish_news_gallery)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Competition)
+def publish_categories_snapshot(sender, instance, **kwargs):
+    _publish_on_commit(snapshots.publish_categories)
+
+
+# Cache tag invalidation. Queryset update()/bulk_create()/raw SQL bypass these
+# signals, so code using them must call invalidate_tags_on_commit() itself.
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Competition)
+def invalidate_catalog(sender, instance, **kwargs):
+    invalidate_tags_on_commit(CATALOG)
+
+
+@receiver([post_save, post_delete], sender=Sector)
+def invalidate_sector(sender, instance, **kwargs):
+    invalidate_tags_on_commit(sector_tag(instance.id))
+
+
+@receiver([post_save, post_delete], sender=Stage)
+def invalidate_stage(sender, instance, **kwargs):
+    invalidate_tags_on_commit(sector_tag(instance.sector_id), stage_tag(instance.id))
+
+
+@receiver([post_save, post_delete], sender=Unit)
+def invalidate_unit(sender, instance, **kwargs):
+    invalidate_tags_on_commit(sector_tag(instance.sector_id), unit_tag(instance.id))
+
+
+@receiver([post_save, post_delete], sender=ScheduledCompetition)
+def invalidate_scheduled_competition(sender, instance, **kwargs):
+    invalidate_tags_on_commit(sector_tag(instance.sector_id), stage_tag(instance.stage_id))
+
+
+# ParticipantPresent has no receivers on purpose: a post_delete receiver
+# disables fast deletes of the rows cascading from a ScheduledCompetition,
+# and a per-row receiver costs a query per row. Code writing presence rows
+# invalidates the sector and unit tags once per operation instead.
+
+
+@receiver(schedule_changed)
+def invalidate_changed_schedule(sender, sector_id, stage_id=None, **kwargs):
+    if stage_id is not None:
+        stage_ids = [stage_id]
+    else:
+        stage_ids = Stage.objects.filter(sector_id=sector_id).values_list('id', flat=True)
+    invalidate_tags_on_commit(sector_tag(sector_id), *(stage_tag(id) for id in stage_ids))
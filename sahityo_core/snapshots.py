@@ -0,0 +1,139 @@
+"""
+Static JSON snapshots of the public endpoints.
+
+With PUBLIC_SNAPSHOTS_ENABLED on, every write to Result, News, Gallery,
+Category or Competition regenerates the affected public documents under
+PUBLIC_SNAPSHOTS_DIR, each with a gzip sibling (and a brotli one when the
+brotli package is installed). The files mirror the public-api URLs, so a
+plain web server can serve them directly, e.g. nginx:
+
+    location /public-api/ {
+        root <MEDIA_ROOT>;
+        gzip_static on;
+        brotli_static on;  # with ngx_brotli
+        try_files $uri/index.json @django;
+    }
+"""
+import gzip
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+from sahityo_core.compression import brotli
+from sahityo_core.models import Result, News, Gallery, Category
+from sahityo_core.serializers import ResultSerializer, NewsSerializer, GallerySerializer, CategoryCompetitionSerializer
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = 'categories'
+NEWS_GALLERY = 'news-gallery'
+
+
+def categories_document():
+    categories = Category.objects.prefetch_related('competition_set')
+    return CategoryCompetitionSerializer(categories, many=True).data
+
+
+def news_gallery_document():
+    top_news = News.objects.order_by('-created_at')[:5]
+    top_gallery = Gallery.objects.order_by('-created_at')[:5]
+
+    all_news = News.objects.all()
+    all_gallery = Gallery.objects.all()
+
+    return {
+        'top_news': NewsSerializer(top_news, many=True).data,
+        'top_gallery': GallerySerializer(top_gallery, many=True).data,
+        'all_news': NewsSerializer(all_news, many=True).data,
+        'all_gallery': GallerySerializer(all_gallery, many=True).data,
+    }
+
+
+def result_document(competition_id):
+    """
+    Returns None when the competition has no result yet.
+    """
+    try:
+        result = Result.objects.get(competition__id=competition_id)
+    except Result.DoesNotExist:
+        return None
+    return ResultSerializer(result).data
+
+
+def snapshots_enabled():
+    return getattr(settings, 'PUBLIC_SNAPSHOTS_ENABLED', False)
+
+
+def _snapshot_path(*parts):
+    return os.path.join(settings.PUBLIC_SNAPSHOTS_DIR, *parts, 'index.json')
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _remove(path):
+    for candidate in (path, path + '.gz', path + '.br'):
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+
+
+def write_document(parts, data):
+    """
+    Write data rendered exactly as the API renders it, plus compressed copies.
+    A None document removes the snapshot so the web server falls back to Django.
+    """
+    path = _snapshot_path(*parts)
+    if data is None:
+        _remove(path)
+        return
+    content = JSONRenderer().render(data)
+    _write_atomic(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_atomic(path + '.br', brotli.compress(content, quality=11))
+    _write_atomic(path, content)
+
+
+def publish_categories():
+    write_document((CATEGORIES,), categories_document())
+
+
+def publish_news_gallery():
+    write_document((NEWS_GALLERY,), news_gallery_document())
+
+
+def publish_result(competition_id):
+    write_document(('result', str(competition_id)), result_document(competition_id))
+
+
+def publish_all():
+    publish_categories()
+    publish_news_gallery()
+    competition_ids = Result.objects.values_list('competition_id', flat=True)
+    for competition_id in competition_ids:
+        publish_result(competition_id)
+
+
+def safe_publish(publisher, *args):
+    """
+    Snapshot failures must never fail the write that triggered them;
+    the next write (or publish_public_snapshots) regenerates the file.
+    """
+    try:
+        publisher(*args)
+    except Exception:
+        logger.exception('Failed to publish public snapshot via %s', publisher.__name__)
@@ -0,0 +1,234 @@
+"""
+Automatic status transitions driven by the schedule.
+
+StatusTimer keeps a heap with the next due transition of every unfinished
+ScheduledCompetition: not_started -> reporting at reporting_time,
+reporting -> ongoing at start_time, ongoing -> finished at end_time. Due
+transitions go through sahityo_core.transitions.transition_status, so the
+one-ongoing/one-reporting rule holds (a blocked transition is retried
+later), actual times feed the ETA drift, and one status_changed event is
+published per transition.
+
+Only one process runs the timer: the holder of the 'status-timer'
+SchedulerLease. Other processes only read the lease until it expires, and
+a new holder catches up on the transitions due since the previous
+holder's last run. Every poll the timer also compares the sector cache tag
+generations with the ones it loaded; any write to a sector's schedule (in
+any process) bumps that tag, so only changed sectors are reloaded, with one
+query each.
+
+Run it with `manage.py run_status_timer`, or set STATUS_TIMER_ENABLED to
+start it in a background thread of each web worker (the lease still keeps
+a single leader).
+"""
+import heapq
+import itertools
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from sahityo_core.cache import sector_tag, tag_versions
+from sahityo_core.models import ScheduledCompetition, SchedulerLease, Sector
+from sahityo_core.transitions import TransitionBlocked, transition_status
+from sahityo_core.versioning import VersionConflict
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'status-timer'
+
+# status -> (time field, next status)
+NEXT_TRANSITION = {
+    'not_started': ('reporting_time', 'reporting'),
+    'reporting': ('start_time', 'ongoing'),
+    'ongoing': ('end_time', 'finished'),
+}
+
+
+def acquire_lease(name, holder, ttl, now=None, last_run=None):
+    """
+    Return the lease if holder leads, else None. While another holder's
+    lease is unexpired this only reads; an expired or missing lease is
+    taken with a compare-and-swap, and holder renews its own once half of
+    it has run out, recording last_run.
+    """
+    now = now or timezone.now()
+    lease = SchedulerLease.objects.filter(name=name).first()
+    if lease is None:
+        try:
+            with transaction.atomic():
+                return SchedulerLease.objects.create(name=name, holder=holder, expires_at=now + ttl)
+        except IntegrityError:
+            return None
+    if lease.holder != holder and lease.expires_at >= now:
+        return None
+    if lease.holder == holder and lease.expires_at - now > ttl / 2:
+        return lease
+
+    values = {'holder': holder, 'expires_at': now + ttl}
+    if lease.holder == holder and last_run is not None:
+        values['last_run_at'] = last_run
+    taken = SchedulerLease.objects.filter(
+        name=name, holder=lease.holder, expires_at=lease.expires_at
+    ).update(**values)
+    if not taken:
+        return None  # another contender won
+    # last_run_at is returned as it was, for a new holder to catch up from
+    lease.holder, lease.expires_at = holder, now + ttl
+    return lease
+
+
+def release_lease(name, holder, last_run=None):
+    values = {'expires_at': timezone.now()}
+    if last_run is not None:
+        values['last_run_at'] = last_run
+    SchedulerLease.objects.filter(name=name, holder=holder).update(**values)
+
+
+class StatusTimer:
+    def __init__(self, holder=None):
+        self.holder = holder or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+        self.heap = []  # (due, sequence, competition_id, status_from, status_to)
+        self.tokens = {}  # competition_id -> sequence of its live heap entry
+        self.sector_versions = {}
+        # Time up to which due transitions were applied, while leading
+        self.last_run = None
+        self._sequence = itertools.count()
+        self._stop = threading.Event()
+
+    def _push(self, competition_id, due, current, target):
+        sequence = next(self._sequence)
+        self.tokens[competition_id] = sequence
+        heapq.heappush(self.heap, (due, sequence, competition_id, current, target))
+
+    def load_sector(self, sector_id, now=None):
+        now = now or timezone.now()
+        # Transitions due since the last run are caught up however late;
+        # older ones are left to the stage managers after the grace period
+        since = now - timedelta(seconds=settings.STATUS_TIMER_GRACE_SECONDS)
+        if self.last_run is not None:
+            since = min(since, self.last_run)
+        competitions = ScheduledCompetition.objects.filter(sector_id=sector_id).exclude(status='finished').values_list(
+            'id', 'status', 'reporting_time', 'start_time', 'end_time'
+        )
+        for competition_id, current, reporting_time, start_time, end_time in competitions:
+            field, target = NEXT_TRANSITION[current]
+            due = {'reporting_time': reporting_time, 'start_time': start_time, 'end_time': end_time}[field]
+            if due < since:
+                self.tokens.pop(str(competition_id), None)
+                continue
+            self._push(str(competition_id), due, current, target)
+
+    def refresh(self, now=None):
+        """
+        Reload the sectors whose schedule changed since they were loaded.
+        """
+        sector_ids = [str(id) for id in Sector.objects.values_list('id', flat=True)]
+        versions = tag_versions([sector_tag(id) for id in sector_ids])
+        for sector_id, version in zip(sector_ids, versions):
+            if self.sector_versions.get(sector_id) != version:
+                self.sector_versions[sector_id] = version
+                self.load_sector(sector_id, now)
+
+    def run_due(self, now=None):
+        """
+        Apply every transition due by now; returns how many were applied.
+        """
+        now = now or timezone.now()
+        retry = timedelta(seconds=settings.STATUS_TIMER_RETRY_SECONDS)
+        applied = 0
+        while self.heap and self.heap[0][0] <= now:
+            due, sequence, competition_id, current, target = heapq.heappop(self.heap)
+            if self.tokens.get(competition_id) != sequence:
+                continue  # superseded by a reload
+            try:
+                with transaction.atomic():
+                    competition = ScheduledCompetition.objects.select_for_update().get(id=competition_id)
+                    if competition.status != current:
+                        continue  # changed by hand; the next reload reschedules it
+                    transition_status(competition, target, automatic=True, expected_version=competition.version)
+                applied += 1
+            except (ScheduledCompetition.DoesNotExist, VersionConflict):
+                # Deleted, or changed meanwhile; a change is picked up on reload
+                self.tokens.pop(competition_id, None)
+                continue
+            except TransitionBlocked:
+                self._push(competition_id, now + retry, current, target)
+                continue
+            except ValidationError as e:
+                # full_clean() rejected the row (say it overlaps another on
+                # the stage); retried until fixed by hand or reloaded
+                logger.warning('Status timer could not move %s to %s: %s', competition_id, target, ' '.join(e.messages))
+                self._push(competition_id, now + retry, current, target)
+                continue
+            if target in NEXT_TRANSITION:
+                field, following = NEXT_TRANSITION[target]
+                self._push(competition_id, getattr(competition, field), target, following)
+            else:
+                self.tokens.pop(competition_id, None)
+        return applied
+
+    def step(self, now=None):
+        """
+        One poll: renew leadership, pick up schedule changes, apply due
+        transitions. Returns whether this process is the leader.
+        """
+        now = now or timezone.now()
+        ttl = timedelta(seconds=settings.STATUS_TIMER_LEASE_SECONDS)
+        lease = acquire_lease(LEASE_NAME, self.holder, ttl, now, self.last_run)
+        if lease is None:
+            # Another process leads; start from scratch if we take over later
+            self.heap, self.tokens, self.sector_versions, self.last_run = [], {}, {}, None
+            return False
+        if self.last_run is None:
+            # Just took over: catch up from where the previous holder got to
+            self.last_run = lease.last_run_at
+        self.refresh(now)
+        self.run_due(now)
+        self.last_run = now
+        return True
+
+    def run(self):
+        poll = settings.STATUS_TIMER_POLL_SECONDS
+        try:
+            while not self._stop.is_set():
+                try:
+                    leader = self.step()
+                except Exception:
+                    logger.exception('Status timer step failed')
+                    leader = False
+                finally:
+                    close_old_connections()
+                wait = poll
+                if leader and self.heap:
+                    wait = min(poll, max(0, (self.heap[0][0] - timezone.now()).total_seconds()))
+                self._stop.wait(wait)
+        finally:
+            release_lease(LEASE_NAME, self.holder, self.last_run)
+            close_old_connections()
+
+    def stop(self):
+        self._stop.set()
+
+
+_timer_thread = None
+_timer_lock = threading.Lock()
+
+
+def start_status_timer_thread(sender=None, **kwargs):
+    """
+    request_started receiver used when STATUS_TIMER_ENABLED is set: starts
+    the timer in a daemon thread of this worker once.
+    """
+    global _timer_thread
+    with _timer_lock:
+        if _timer_thread is not None:
+            return
+        _timer_thread = threading.Thread(target=StatusTimer().run, name='status-timer', daemon=True)
+        _timer_thread.start()
@@ -1,3 +1,1392 @@
-from django.test import TestCase
+import gzip
+import json
+import random
+import tempfile
+import threading
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+
+from sahityo_core import cache as tag_cache, presence, schedule_reset
+from sahityo_core.cache import sector_tag, tag_versions, unit_tag
+from sahityo_core.catalog import catalog_registry
+from sahityo_core.clashes import ClashIndex
+from sahityo_core.eta import record_transition
+from sahityo_core.live_board import get_live_board
+from sahityo_core.middleware import CompressionMiddleware
+from sahityo_core.models import (
+    Category, Competition, ParticipantPresent, ScheduledCompetition, SchedulerLease, Sector, Stage, StageDrift, Unit, User,
+)
+from sahityo_core.presence import backfill_presence
+from sahityo_core.presence_buffer import presence_buffer
+from sahityo_core.renderers import FastJSONRenderer, msgpack
+from sahityo_core.schedule_reset import reset_sector_schedule, restore_schedule_archive
+from sahityo_core.schedule_solver import solve
+from sahityo_core.status_timer import StatusTimer
+from sahityo_core.timeline import IntervalIndex, find_overlaps, free_slots
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ScheduleTestCase(TestCase):
+    """
+    A sector with three units, two stages and four competitions; nothing is
+    scheduled yet.
+    """
+    day = datetime(2025, 8, 1).date()
+
+    def setUp(self):
+        # LocMemCache outlives the test; start from fresh tag generations
+        cache.clear()
+        self.admin = User.objects.create(email='admin@example.com', role='admin')
+        self.sector = Sector.objects.create(name='Sector', user=self.admin)
+        self.units = [
+            Unit.objects.create(name=f'Unit {i}', sector=self.sector, user=User.objects.create(email=f'unit{i}@example.com', role='unit'))
+            for i in range(3)
+        ]
+        self.stages = [
+            Stage.objects.create(name=f'Stage {i}', sector=self.sector, user=User.objects.create(email=f'stage{i}@example.com', role='stage'))
+            for i in range(2)
+        ]
+        category = Category.objects.create(name='Category')
+        self.competitions = [Competition.objects.create(name=f'Competition {i}', category=category) for i in range(4)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.day, datetime.min.time()) + timedelta(hours=hour, minutes=minute))
+
+    def schedule(self, competition, stage, start_hour, minutes=50):
+        start = self.at(start_hour)
+        return ScheduledCompetition.objects.create(
+            competition=competition, stage=stage, sector=self.sector, date=self.day,
+            reporting_time=start - timedelta(minutes=30), start_time=start, end_time=start + timedelta(minutes=minutes),
+        )
+
+
+class ScheduledCompetitionBatchTests(ScheduleTestCase):
+    def test_ids_in_any_uuid_form_are_found(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)
+        response = self.client.get('/api/scheduled-competitions/', {'ids': f'{scheduled.id.hex},{str(scheduled.id).upper()}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d['id'] for d in response.json()['scheduled_competition_details']], [str(scheduled.id)])
+
+    def test_invalid_id_is_rejected(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)
+        response = self.client.get('/api/scheduled-competitions/', {'ids': f'{scheduled.id},not-a-uuid'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not-a-uuid', response.json()['error'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReadOnlyDetailTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(admin)
+        self.sector = Sector.objects.create(name='Sector', user=admin)
+        stage = Stage.objects.create(name='Stage', sector=self.sector, user=User.objects.create(email='stage@example.com', role='stage'))
+        Unit.objects.create(name='Early', sector=self.sector, user=User.objects.create(email='early@example.com', role='unit'))
+        with self.captureOnCommitCallbacks(execute=True):
+            competition = Competition.objects.create(name='Poem', category=Category.objects.create(name='Juniors'))
+        start = datetime(2025, 8, 1, 9, tzinfo=dt_timezone.utc)
+        self.scheduled = ScheduledCompetition.objects.create(
+            competition=competition, stage=stage, sector=self.sector, date=start.date(),
+            reporting_time=start - timedelta(minutes=30), start_time=start, end_time=start + timedelta(hours=1),
+        )
+        # Joins after the competition was scheduled, so has no presence row
+        with self.captureOnCommitCallbacks(execute=True):
+            self.late = Unit.objects.create(name='Late', sector=self.sector, user=User.objects.create(email='late@example.com', role='unit'))
+
+    def mark(self, unit, **flags):
+        return self.client.patch(f'/api/mark-participant-presence/{self.scheduled.id}/{unit.id}/', flags, format='json')
+
+    def test_detail_lists_units_without_a_row_and_creates_nothing(self):
+        response = self.client.get(f'/api/scheduled-competition-detail/{self.scheduled.id}/')
+        self.assertEqual(response.status_code, 200)
+        participants = {p['unit']['name']: p for p in response.json()['scheduled_competition_details']['participants']}
+        self.assertIsNotNone(participants['Early']['id'])
+        self.assertEqual(participants['Late'], {
+            'id': None, 'unit': {'id': str(self.late.id), 'name': 'Late'}, 'participant_1_present': False,
+            'participant_2_present': False, 'version': None, 'created_at': None, 'updated_at': None,
+        })
+        self.assertFalse(ParticipantPresent.objects.filter(unit=self.late).exists())
+
+    def test_first_mark_creates_the_row_and_later_marks_update_it(self):
+        response = self.mark(self.late, participant_1_present=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json()['participant_1_present'])
+        response = self.mark(self.late, participant_2_present=True)
+        self.assertEqual(response.status_code, 200)
+        participant = ParticipantPresent.objects.get(scheduled_competition=self.scheduled, unit=self.late)
+        self.assertEqual((participant.participant_1_present, participant.participant_2_present), (True, True))
+
+    def test_unit_of_another_sector_cannot_be_marked(self):
+        other = Sector.objects.create(name='Other', user=User.objects.create(email='other@example.com', role='admin'))
+        stranger = Unit.objects.create(name='Stranger', sector=other, user=User.objects.create(email='stranger@example.com', role='unit'))
+        response = self.mark(stranger, participant_1_present=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ParticipantPresent.objects.filter(unit=stranger).exists())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CompetitionsByCategoryTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create(email='admin@example.com', role='admin'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name='Songs')
+            self.competition = Competition.objects.create(name='Solo', category=self.category)
+
+    def test_any_uuid_form_of_the_category_is_found(self):
+        for category_id in (str(self.category.id), self.category.id.hex, str(self.category.id).upper()):
+            response = self.client.get('/api/get-competitions-by-category/', {'category_id': category_id})
+            self.assertEqual(response.status_code, 200, category_id)
+            self.assertEqual(response.json()['competitions'], [{'id': str(self.competition.id), 'name': 'Solo'}])
+
+    def test_malformed_category_id_is_rejected(self):
+        response = self.client.get('/api/get-competitions-by-category/', {'category_id': 'songs'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('songs', response.json()['error'])
+
+
+class SingleFlightTests(SimpleTestCase):
+    def join(self, key):
+        for thread in threading.enumerate():
+            if thread.name == f'single-flight:{key}':
+                thread.join(5)
+
+    def test_only_one_background_call_per_key(self):
+        flights, gate, calls = tag_cache.SingleFlight(), threading.Event(), []
+
+        def call():
+            calls.append(1)
+            gate.wait(5)
+
+        self.assertTrue(flights.start('board', call))
+        self.assertFalse(flights.start('board', call))
+        gate.set()
+        self.join('board')
+        self.assertEqual(calls, [1])
+        self.assertTrue(flights.start('board', call))
+        self.join('board')
+        self.assertEqual(calls, [1, 1])
+
+    def test_background_failure_is_logged(self):
+        def fail():
+            raise RuntimeError('builder broke')
+
+        with self.assertLogs('sahityo_core.cache', 'ERROR') as logs:
+            tag_cache.SingleFlight().start('board', fail)
+            self.join('board')
+        self.assertIn('builder broke', logs.output[0])
+
+
+class LiveBoardTests(ScheduleTestCase):
+    def test_competition_rename_reaches_the_board(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)
+        ScheduledCompetition.objects.filter(id=scheduled.id).update(status='ongoing')
+        self.assertEqual(get_live_board(self.sector.id, self.day)[0]['ongoing']['name'], 'Competition 0')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.competitions[0].name = 'Renamed'
+            self.competitions[0].save()
+        # Rebuilt in this thread, which sees the test's transaction
+        with mock.patch.object(tag_cache, '_rebuild_in_background', tag_cache._rebuild):
+            self.assertEqual(get_live_board(self.sector.id, self.day)[0]['ongoing']['name'], 'Competition 0')
+        self.assertEqual(get_live_board(self.sector.id, self.day)[0]['ongoing']['name'], 'Renamed')
+
+
+class UnitStageCompetitionsTests(ScheduleTestCase):
+    def fetch(self, **params):
+        return self.client.get(
+            f'/api/get-stage-competitions-for-unit/{self.stages[0].id}/{self.units[0].id}/', {'sector_id': self.sector.id, **params}
+        )
+
+    def test_presence_is_read_in_one_query(self):
+        first = self.schedule(self.competitions[0], self.stages[0], 9)
+        ParticipantPresent.objects.filter(scheduled_competition=first, unit=self.units[0]).update(participant_2_present=True)
+        self.fetch()  # loads the catalog
+        with CaptureQueriesContext(connection) as one:
+            self.fetch()
+        for i in range(1, 4):
+            self.schedule(self.competitions[i], self.stages[0], 9 + 2 * i)
+        with CaptureQueriesContext(connection) as four:
+            response = self.fetch()
+        self.assertEqual(len(one), len(four))
+        rows = {row['id']: row for row in response.json()['scheduled_competitions']}
+        self.assertEqual(len(rows), 4)
+        self.assertEqual((rows[str(first.id)]['participant1_present_status'], rows[str(first.id)]['participant2_present_status']), (False, True))
+
+    def test_competition_missing_from_the_catalog_is_skipped(self):
+        self.schedule(self.competitions[0], self.stages[0], 9)
+        catalog_registry.current()
+        late = Competition.objects.create(name='Late', category=self.competitions[0].category)
+        self.schedule(late, self.stages[0], 11)
+        response = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.json()['scheduled_competitions']], ['Competition 0'])
+
+    def test_unknown_nested_field_is_rejected(self):
+        response = self.fetch(fields='id,status.label')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status.label', response.json()['error'])
+
+
+class PresenceInvalidationTests(ScheduleTestCase):
+    def reset_queries(self, unit_count, slot):
+        for i in range(len(self.units), unit_count):
+            self.units.append(Unit.objects.create(
+                name=f'Unit {i}', sector=self.sector, user=User.objects.create(email=f'unit{i}@example.com', role='unit')
+            ))
+        scheduled = self.schedule(self.competitions[slot], self.stages[0], 9 + slot)
+        ScheduledCompetition.objects.filter(id=scheduled.id).update(status='reporting')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                f'/api/update-scheduled-competition-status/{scheduled.id}/', {'status': 'not_started'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ParticipantPresent.objects.filter(scheduled_competition=scheduled).exists())
+        return len(queries)
+
+    def test_status_reset_cost_does_not_grow_with_units(self):
+        self.assertEqual(self.reset_queries(3, 0), self.reset_queries(30, 1))
+
+    def test_presence_write_invalidates_the_sector_board(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)
+        participant = ParticipantPresent.objects.get(scheduled_competition=scheduled, unit=self.units[0])
+        versions = tag_versions([sector_tag(self.sector.id), unit_tag(self.units[0].id)])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/update-participant-presence/{participant.id}/', {'participant_1_present': True}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        new_versions = tag_versions([sector_tag(self.sector.id), unit_tag(self.units[0].id)])
+        self.assertNotEqual(versions[0], new_versions[0])
+        self.assertNotEqual(versions[1], new_versions[1])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PresenceBackfillTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Seniors')
+            competitions = [Competition.objects.create(name=f'Debate {i}', category=category) for i in range(2)]
+        start = datetime(2025, 8, 1, 9, tzinfo=dt_timezone.utc)
+        self.sectors, self.late_units = [], []
+        for name in ('North', 'South'):
+            admin = User.objects.create(email=f'{name}@example.com', role='admin')
+            sector = Sector.objects.create(name=name, user=admin)
+            stage = Stage.objects.create(name='Stage', sector=sector, user=User.objects.create(email=f'{name}-stage@example.com', role='stage'))
+            Unit.objects.create(name='Early', sector=sector, user=User.objects.create(email=f'{name}-early@example.com', role='unit'))
+            for hour, competition in enumerate(competitions):
+                ScheduledCompetition.objects.create(
+                    competition=competition, stage=stage, sector=sector, date=start.date(),
+                    reporting_time=start + timedelta(hours=hour), start_time=start + timedelta(hours=hour, minutes=30),
+                    end_time=start + timedelta(hours=hour, minutes=50),
+                )
+            self.late_units.append(
+                Unit.objects.create(name='Late', sector=sector, user=User.objects.create(email=f'{name}-late@example.com', role='unit'))
+            )
+            self.sectors.append(sector)
+
+    def late_rows(self):
+        return ParticipantPresent.objects.filter(unit__in=self.late_units)
+
+    def test_only_the_missing_pairs_of_the_sector_are_inserted(self):
+        versions = tag_versions([sector_tag(self.sectors[0].id)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(backfill_presence(self.sectors[0].id), 2)
+        self.assertNotEqual(tag_versions([sector_tag(self.sectors[0].id)]), versions)
+        self.assertEqual({row.unit_id for row in self.late_rows()}, {self.late_units[0].id})
+        for row in self.late_rows():
+            self.assertIsInstance(row.id, uuid.UUID)
+            self.assertEqual((row.participant_1_present, row.participant_2_present, row.version), (False, False, 1))
+        self.assertEqual(backfill_presence(self.sectors[0].id), 0)
+
+    def test_every_sector_is_reconciled_without_a_sector(self):
+        self.assertEqual(backfill_presence(), 4)
+        self.assertEqual(ParticipantPresent.objects.count(), 8)
+
+    def test_orm_fallback_inserts_the_same_rows(self):
+        with mock.patch.dict(presence._UUID_SQL, clear=True):
+            self.assertEqual(backfill_presence(self.sectors[1].id), 2)
+            self.assertEqual(backfill_presence(self.sectors[1].id), 0)
+        self.assertEqual({row.unit_id for row in self.late_rows()}, {self.late_units[1].id})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class UnitItineraryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(admin)
+        self.sector = Sector.objects.create(name='Sector', user=admin)
+        stages = [
+            Stage.objects.create(name=name, sector=self.sector, user=User.objects.create(email=f'{name}@example.com', role='stage'))
+            for name in ('Hall', 'Lawn')
+        ]
+        self.unit = Unit.objects.create(name='Unit', sector=self.sector, user=User.objects.create(email='unit@example.com', role='unit'))
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Juniors')
+            competitions = [Competition.objects.create(name=f'Story {i}', category=category) for i in range(3)]
+        # Created out of order: the second day first, then two stages on the first day
+        self.scheduled = []
+        for day, hour, stage, competition in ((2, 9, stages[0], competitions[0]), (1, 11, stages[0], competitions[1]), (1, 10, stages[1], competitions[2])):
+            start = datetime(2025, 8, day, hour, tzinfo=dt_timezone.utc)
+            self.scheduled.append(ScheduledCompetition.objects.create(
+                competition=competition, stage=stage, sector=self.sector, date=start.date(),
+                reporting_time=start - timedelta(minutes=30), start_time=start, end_time=start + timedelta(minutes=50),
+            ))
+        self.presence = ParticipantPresent.objects.get(scheduled_competition=self.scheduled[1], unit=self.unit)
+
+    def fetch(self, **headers):
+        return self.client.get(f'/api/get-unit-itinerary/{self.unit.id}/', {'sector_id': self.sector.id}, **headers)
+
+    def test_itinerary_is_in_date_and_time_order_with_presence(self):
+        ParticipantPresent.objects.filter(id=self.presence.id).update(participant_2_present=True)
+        response = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        itinerary = json.loads(b''.join(response.streaming_content))['itinerary']
+        self.assertEqual([row['id'] for row in itinerary], [str(self.scheduled[i].id) for i in (2, 1, 0)])
+        self.assertEqual([row['stage']['name'] for row in itinerary], ['Lawn', 'Hall', 'Hall'])
+        self.assertEqual(
+            [(row['participant_1_present'], row['participant_2_present']) for row in itinerary],
+            [(False, False), (False, True), (False, False)],
+        )
+
+    def test_repeat_fetch_is_answered_without_the_database(self):
+        etag = self.fetch()['ETag']
+        for if_none_match in (etag, f'W/{etag}', f'"stale", {etag}'):
+            with self.assertNumQueries(0):
+                response = self.fetch(HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_presence_change_gives_a_new_etag(self):
+        etag = self.fetch()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/update-participant-presence/{self.presence.id}/', {'participant_1_present': True}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        response = self.fetch(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertTrue(json.loads(b''.join(response.streaming_content))['itinerary'][1]['participant_1_present'])
+
+    def test_unit_outside_the_sector_is_not_found(self):
+        other = Sector.objects.create(name='Other', user=User.objects.create(email='other@example.com', role='admin'))
+        response = self.client.get(f'/api/get-unit-itinerary/{self.unit.id}/', {'sector_id': other.id})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(f'/api/get-unit-itinerary/{self.unit.id}/').status_code, 400)
+
+
+class StreamingCompressionTests(ScheduleTestCase):
+    def fetch_itinerary(self, accept_encoding):
+        self.schedule(self.competitions[0], self.stages[0], 9)
+        return self.client.get(
+            f'/api/get-unit-itinerary/{self.units[0].id}/', {'sector_id': self.sector.id}, HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+
+    def test_stream_is_gzipped_for_gzip_clients(self):
+        response = self.fetch_itinerary('br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(b''.join(response.streaming_content)))['unit']['id'], str(self.units[0].id))
+
+    def test_stream_passes_through_for_clients_without_gzip(self):
+        response = self.fetch_itinerary('br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['unit']['id'], str(self.units[0].id))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}, RESPONSE_COMPRESSION_MIN_SIZE=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class CompressionMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='admin@example.com', password=make_password('secret-password'), role='admin')
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Songs')
+            for i in range(20):
+                Competition.objects.create(name=f'Solo {i}', category=category)
+        self.category = category
+
+    def test_token_responses_are_neither_compressed_nor_stored(self):
+        response = self.client.post(
+            '/api/token/', {'email': 'admin@example.com', 'password': 'secret-password'}, HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertIn('access', response.json())
+
+    def test_authenticated_json_gets_padded_gzip(self):
+        self.client.force_authenticate(self.user)
+        bodies = set()
+        for _ in range(5):
+            response = self.client.get(
+                '/api/get-competitions-by-category/', {'category_id': self.category.id}, HTTP_ACCEPT_ENCODING='gzip'
+            )
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(len(json.loads(gzip.decompress(response.content))['competitions']), 20)
+            bodies.add(response.content)
+        # Django's random-length gzip filename: the same body compresses differently
+        self.assertGreater(len(bodies), 1)
+
+    def test_no_transform_is_honoured(self):
+        request = APIRequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = HttpResponse(b'x' * 1000, headers={'Cache-Control': 'private, no-transform'})
+        self.assertIs(CompressionMiddleware(lambda request: response)(request), response)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_matches_drf_json(self):
+        data = {
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'utc': datetime(2025, 8, 1, 9, 30, 15, 250000, tzinfo=dt_timezone.utc),
+            'local': datetime(2025, 8, 1, 15, 0, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))),
+            'date': datetime(2025, 8, 1).date(),
+            'score': Decimal('7.5'),
+            'name': 'ഒപ്പന',
+            'rows': [None, True, 3, 1.5],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_no_data_renders_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class FastJSONEndpointTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(admin)
+        sector = Sector.objects.create(name='Sector', user=admin)
+        self.stage = Stage.objects.create(name='Stage', sector=sector, user=User.objects.create(email='stage@example.com', role='stage'))
+        with self.captureOnCommitCallbacks(execute=True):
+            competition = Competition.objects.create(name='Elocution', category=Category.objects.create(name='Seniors'))
+        self.start = datetime(2025, 8, 1, 9, 0, tzinfo=dt_timezone.utc)
+        self.scheduled = ScheduledCompetition.objects.create(
+            competition=competition, stage=self.stage, sector=sector, date=self.start.date(),
+            reporting_time=self.start - timedelta(minutes=30), start_time=self.start, end_time=self.start + timedelta(hours=1),
+        )
+
+    def fetch(self, **headers):
+        return self.client.get(f'/api/scheduled-competitions-by-stage-date/{self.stage.id}/', {'date': '2025-08-01'}, **headers)
+
+    def test_stage_schedule_is_plain_json(self):
+        for accept in ('*/*', 'application/json'):
+            response = self.fetch(HTTP_ACCEPT=accept)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            [row] = response.json()['scheduled_competitions']
+            self.assertEqual(row['id'], str(self.scheduled.id))
+            self.assertEqual(row['start_time'], '2025-08-01T09:00:00Z')
+            self.assertEqual(row['competition']['name'], 'Elocution')
+
+    def test_cached_bytes_follow_a_status_change(self):
+        self.assertEqual(self.fetch().json()['scheduled_competitions'][0]['status'], 'not_started')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/update-scheduled-competition-status/{self.scheduled.id}/', {'status': 'reporting'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.fetch().json()['scheduled_competitions'][0]['status'], 'reporting')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CompactFormatTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(admin)
+        self.sector = Sector.objects.create(name='Kasaragod', user=admin)
+        self.stage = Stage.objects.create(name='Stage', sector=self.sector, user=User.objects.create(email='stage@example.com', role='stage'))
+        self.unit = Unit.objects.create(name='Unit', sector=self.sector, user=User.objects.create(email='unit@example.com', role='unit'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name='Seniors')
+            competitions = [Competition.objects.create(name=name, category=self.category) for name in ('Speech', 'Essay')]
+        self.scheduled = []
+        for hour, competition in zip((9, 11), competitions):
+            start = datetime(2025, 8, 1, hour, tzinfo=dt_timezone.utc)
+            self.scheduled.append(ScheduledCompetition.objects.create(
+                competition=competition, stage=self.stage, sector=self.sector, date=start.date(),
+                reporting_time=start - timedelta(minutes=30), start_time=start, end_time=start + timedelta(hours=1),
+            ))
+        ParticipantPresent.objects.filter(scheduled_competition=self.scheduled[1], unit=self.unit).update(participant_1_present=True)
+
+    def test_stage_schedule_rows_reference_lookup_tables(self):
+        response = self.client.get(
+            f'/api/scheduled-competitions-by-stage-date/{self.stage.id}/', {'date': '2025-08-01', 'format': 'compact'}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['format'], 'compact')
+        self.assertEqual(data['columns'], ['id', 'competition', 'sector', 'reporting_time', 'start_time', 'end_time', 'status'])
+        self.assertEqual(data['categories'], [[str(self.category.id), 'Seniors']])
+        self.assertEqual(data['sectors'], [[str(self.sector.id), 'Kasaragod']])
+        rows = {row[0]: dict(zip(data['columns'], row)) for row in data['rows']}
+        first = rows[str(self.scheduled[0].id)]
+        self.assertEqual(data['competitions'][first['competition']][1:], ['Speech', 0])
+        self.assertEqual(first['sector'], 0)
+        self.assertEqual(first['start_time'], int(self.scheduled[0].start_time.timestamp()))
+        self.assertEqual(first['status'], 'not_started')
+
+    def test_unit_view_carries_presence_in_rows(self):
+        response = self.client.get(
+            f'/api/get-stage-competitions-for-unit/{self.stage.id}/{self.unit.id}/',
+            {'sector_id': self.sector.id, 'format': 'compact'},
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['stage_name'], 'Stage')
+        presence = {
+            row[0]: (row[data['columns'].index('participant1_present_status')], row[data['columns'].index('participant2_present_status')])
+            for row in data['rows']
+        }
+        self.assertEqual(presence, {str(self.scheduled[0].id): (False, False), str(self.scheduled[1].id): (True, False)})
+
+    def test_default_json_is_unchanged(self):
+        response = self.client.get(f'/api/scheduled-competitions-by-stage-date/{self.stage.id}/', {'date': '2025-08-01'})
+        self.assertNotIn('format', response.json())
+        self.assertEqual(len(response.json()['scheduled_competitions']), 2)
+
+    def test_views_without_compact_reject_the_format(self):
+        response = self.client.get(f'/api/scheduled-competition-detail/{self.scheduled[0].id}/', {'format': 'compact'})
+        self.assertEqual(response.status_code, 404)
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MessagePackTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(admin)
+        sector = Sector.objects.create(name='Sector', user=admin)
+        stage = Stage.objects.create(name='Stage', sector=sector, user=User.objects.create(email='stage@example.com', role='stage'))
+        Unit.objects.create(name='Unit', sector=sector, user=User.objects.create(email='unit@example.com', role='unit'))
+        with self.captureOnCommitCallbacks(execute=True):
+            competition = Competition.objects.create(name='Quiz', category=Category.objects.create(name='Juniors'))
+        start = datetime(2025, 8, 1, 9, tzinfo=dt_timezone.utc)
+        self.scheduled = ScheduledCompetition.objects.create(
+            competition=competition, stage=stage, sector=sector, date=start.date(),
+            reporting_time=start - timedelta(minutes=30), start_time=start, end_time=start + timedelta(hours=1),
+        )
+
+    def patch_status(self, body):
+        return self.client.patch(
+            f'/api/update-scheduled-competition-status/{self.scheduled.id}/', body, content_type='application/msgpack'
+        )
+
+    def test_msgpack_carries_the_same_values_as_json(self):
+        url = f'/api/scheduled-competition-detail/{self.scheduled.id}/'
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content, raw=False), self.client.get(url).json())
+
+    def test_msgpack_body_is_parsed(self):
+        response = self.patch_status(msgpack.packb({'status': 'reporting'}))
+        self.assertEqual(response.status_code, 200)
+        self.scheduled.refresh_from_db()
+        self.assertEqual(self.scheduled.status, 'reporting')
+
+    def test_malformed_body_is_rejected_with_the_error_named(self):
+        for body, error in ((b'\xc1', 'FormatError'), (b'\x82\xa6status', 'Unpack failed: incomplete input')):
+            response = self.patch_status(body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['detail'], f'MessagePack parse error - {error}')
+        self.scheduled.refresh_from_db()
+        self.assertEqual(self.scheduled.status, 'not_started')
+
+
+class ScheduleArchiveTests(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        override = override_settings(SCHEDULE_ARCHIVE_DIR=archive_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_restore_after_reschedule_skips_the_rescheduled_competition(self):
+        first = self.schedule(self.competitions[0], self.stages[0], 9)
+        second = self.schedule(self.competitions[1], self.stages[1], 9)
+        ParticipantPresent.objects.filter(scheduled_competition=second).update(participant_1_present=True)
+        path, deleted = reset_sector_schedule(self.sector.id)
+        self.assertEqual(deleted, 2)
+
+        rescheduled = self.schedule(self.competitions[0], self.stages[1], 14)
+        restored, participants, skipped = restore_schedule_archive(path)
+
+        self.assertEqual((restored, participants), (1, len(self.units)))
+        self.assertEqual([competition_id for competition_id, reason in skipped], [first.id])
+        self.assertFalse(ScheduledCompetition.objects.filter(id=first.id).exists())
+        self.assertEqual(ScheduledCompetition.objects.get(competition=self.competitions[0]).id, rescheduled.id)
+        self.assertEqual(ParticipantPresent.objects.filter(scheduled_competition=rescheduled).count(), len(self.units))
+        self.assertEqual(
+            ParticipantPresent.objects.filter(scheduled_competition_id=second.id, participant_1_present=True).count(),
+            len(self.units),
+        )
+
+
+    def test_round_trip_restores_rows_and_flags(self):
+        scheduled = [self.schedule(self.competitions[i], self.stages[i % 2], 9 + i) for i in range(3)]
+        ParticipantPresent.objects.filter(scheduled_competition=scheduled[1], unit=self.units[2]).update(participant_2_present=True)
+        before = sorted(ParticipantPresent.objects.values_list('scheduled_competition_id', 'unit_id', 'participant_2_present'))
+
+        path, deleted = reset_sector_schedule(self.sector.id, batch_size=2)
+        self.assertEqual(deleted, 3)
+        self.assertFalse(ScheduledCompetition.objects.exists())
+        self.assertFalse(ParticipantPresent.objects.exists())
+
+        self.assertEqual(restore_schedule_archive(path), (3, 3 * len(self.units), []))
+        self.assertCountEqual(ScheduledCompetition.objects.values_list('id', flat=True), [obj.id for obj in scheduled])
+        self.assertEqual(
+            sorted(ParticipantPresent.objects.values_list('scheduled_competition_id', 'unit_id', 'participant_2_present')),
+            before,
+        )
+
+    def test_competition_created_during_reset_is_archived_with_its_batch(self):
+        self.schedule(self.competitions[0], self.stages[0], 9)
+        archive_batch = schedule_reset._archive_batch
+        late = []
+
+        def archive_then_write(fh, objects):
+            archive_batch(fh, objects)
+            if not late:
+                # Lands after the first batch was taken
+                late.append(self.schedule(self.competitions[1], self.stages[1], 10))
+
+        with mock.patch.object(schedule_reset, '_archive_batch', archive_then_write):
+            path, deleted = reset_sector_schedule(self.sector.id, batch_size=1)
+        self.assertEqual(deleted, 2)
+        self.assertFalse(ScheduledCompetition.objects.exists())
+
+        restored, participants, skipped = restore_schedule_archive(path)
+        self.assertEqual((restored, participants, skipped), (2, 2 * len(self.units), []))
+        self.assertTrue(ScheduledCompetition.objects.filter(id=late[0].id).exists())
+
+    def test_restore_skips_a_competition_clashing_on_its_stage(self):
+        kept = self.schedule(self.competitions[0], self.stages[0], 9)
+        clashing = self.schedule(self.competitions[1], self.stages[0], 11)
+        path, deleted = reset_sector_schedule(self.sector.id)
+
+        manual = self.schedule(self.competitions[2], self.stages[0], 11)
+        restored, participants, skipped = restore_schedule_archive(path)
+
+        self.assertEqual((restored, participants), (1, len(self.units)))
+        self.assertEqual([competition_id for competition_id, reason in skipped], [clashing.id])
+        self.assertIn('already scheduled', skipped[0][1])
+        self.assertCountEqual(ScheduledCompetition.objects.values_list('id', flat=True), [kept.id, manual.id])
+
+
+class TimelineTests(SimpleTestCase):
+    def test_interval_index_matches_brute_force(self):
+        rng = random.Random(1)
+        base = datetime(2025, 8, 1, 8)
+        entries = []
+        for key in range(60):
+            start = base + timedelta(minutes=rng.randrange(0, 600))
+            entries.append((start, start + timedelta(minutes=rng.randrange(5, 90)), key))
+        index = IntervalIndex(entries[:30])
+        for start, end, key in entries[30:]:
+            index.add(start, end, key)
+        for _ in range(200):
+            start = base + timedelta(minutes=rng.randrange(-60, 700))
+            end = start + timedelta(minutes=rng.randrange(1, 120))
+            expected = [entry for entry in entries if entry[0] < end and entry[1] > start]
+            self.assertCountEqual(list(index.overlapping(start, end)), expected)
+            self.assertEqual(index.latest_end(start, end), max((entry[1] for entry in expected), default=None))
+
+    def test_touching_intervals_do_not_overlap(self):
+        base = datetime(2025, 8, 1, 8)
+        entries = [(base, base + timedelta(hours=1), 'a'), (base + timedelta(hours=1), base + timedelta(hours=2), 'b')]
+        self.assertEqual(find_overlaps(entries), [])
+        self.assertIsNone(IntervalIndex(entries).latest_end(base + timedelta(hours=2), base + timedelta(hours=3)))
+        self.assertEqual(find_overlaps(entries + [(base + timedelta(minutes=30), base + timedelta(minutes=90), 'c')]), [('a', 'c'), ('c', 'b')])
+
+    def test_query_under_a_long_interval_does_not_scan_everything(self):
+        base = datetime(2025, 8, 1, 8)
+        entries = [(base, base + timedelta(days=2), 'day')]
+        entries += [(base + timedelta(minutes=i), base + timedelta(minutes=i + 1), i) for i in range(2000)]
+        index = IntervalIndex(entries)
+        start = base + timedelta(minutes=1500, seconds=30)
+        self.assertEqual([key for s, e, key in index.overlapping(start, start + timedelta(seconds=10))], [1500, 'day'])
+
+        reads = []
+
+        class CountingList(list):
+            def __getitem__(self, position):
+                reads.append(position)
+                return super().__getitem__(position)
+
+        size, tree = index._tree
+        index._tree = size, CountingList(tree)
+        self.assertEqual(len(list(index.overlapping(start, start + timedelta(seconds=10)))), 2)
+        self.assertLess(len(reads), 200)
+
+    def test_empty_index_and_queries_outside_every_interval(self):
+        base = datetime(2025, 8, 1, 8)
+        empty = IntervalIndex()
+        self.assertEqual(list(empty.overlapping(base, base + timedelta(hours=1))), [])
+        self.assertIsNone(empty.latest_end(base, base + timedelta(hours=1)))
+
+        index = IntervalIndex([(base, base + timedelta(hours=1), 'a')])
+        self.assertEqual(list(index.overlapping(base - timedelta(hours=1), base)), [])
+        self.assertEqual(list(index.overlapping(base + timedelta(hours=1), base + timedelta(hours=2))), [])
+
+    def test_add_after_a_query_is_seen_by_the_next_one(self):
+        base = datetime(2025, 8, 1, 8)
+        index = IntervalIndex([(base, base + timedelta(hours=1), 'a')])
+        query = (base + timedelta(minutes=30), base + timedelta(minutes=40))
+        self.assertEqual([key for s, e, key in index.overlapping(*query)], ['a'])
+        index.add(base + timedelta(minutes=20), base + timedelta(minutes=35), 'b')
+        index.add(base - timedelta(hours=1), base + timedelta(hours=3), 'c')
+        self.assertEqual([key for s, e, key in index.overlapping(*query)], ['b', 'a', 'c'])
+        self.assertEqual(index.latest_end(*query), base + timedelta(hours=3))
+
+    def test_intervals_sharing_a_start_are_all_found(self):
+        base = datetime(2025, 8, 1, 8)
+        index = IntervalIndex([(base, base + timedelta(minutes=minutes), minutes) for minutes in (10, 60, 30)])
+        found = index.overlapping(base + timedelta(minutes=20), base + timedelta(minutes=25))
+        self.assertCountEqual([key for s, e, key in found], [60, 30])
+
+
+class ScheduleSolverTests(SimpleTestCase):
+    def window(self, day, start_hour=9, end_hour=17):
+        date = datetime(2025, 8, 1) + timedelta(days=day)
+        return date + timedelta(hours=start_hour), date + timedelta(hours=end_hour)
+
+    def assert_no_overlaps(self, plan, items, busy=(), changeover=timedelta(0)):
+        categories = {key: category for key, category, duration in items}
+        by_stage, by_category = defaultdict(list), defaultdict(list)
+        for key, (stage, day, start, end) in plan.placements.items():
+            by_stage[stage, day].append((start, end + changeover, key))
+            by_category[categories[key], day].append((start, end, key))
+        for stage, day, start, end, category in busy:
+            by_stage[stage, day].append((start, end + changeover, 'busy'))
+            by_category[category, day].append((start, end, 'busy'))
+        for entries in [*by_stage.values(), *by_category.values()]:
+            self.assertEqual(find_overlaps(entries), [])
+
+    def test_placements_never_overlap(self):
+        rng = random.Random(2)
+        items = [(f'item{i}', f'category{i % 5}', timedelta(minutes=rng.choice([30, 45, 60, 90]))) for i in range(40)]
+        days = [self.window(0), self.window(1)]
+        busy = [('stage0', 0, days[0][0], days[0][0] + timedelta(hours=2), 'category0')]
+        changeover = timedelta(minutes=10)
+        plan = solve(items, ['stage0', 'stage1', 'stage2'], days, busy, changeover, time_budget=0.2)
+        self.assertEqual(plan.unplaced, [])
+        self.assert_no_overlaps(plan, items, busy, changeover)
+        for key, (stage, day, start, end) in plan.placements.items():
+            self.assertGreaterEqual(start, days[day][0])
+            self.assertLessEqual(end, days[day][1])
+
+    def test_repeated_day_counts_once(self):
+        items = [(f'item{i}', f'category{i}', timedelta(hours=4)) for i in range(3)]
+        day = self.window(0, 9, 17)
+        plan = solve(items, ['stage0'], [day, day], time_budget=0)
+        self.assertEqual(len(plan.placements), 2)
+        self.assertEqual(len(plan.unplaced), 1)
+        self.assertEqual({day for stage, day, start, end in plan.placements.values()}, {0})
+        self.assert_no_overlaps(plan, items)
+
+    def test_item_longer_than_every_window_is_left_unplaced(self):
+        items = [('long', 'seniors', timedelta(hours=9)), ('short', 'juniors', timedelta(hours=1))]
+        plan = solve(items, ['stage0'], [self.window(0), self.window(1)], time_budget=0)
+        self.assertEqual(plan.unplaced, ['long'])
+        self.assertEqual(plan.placements['short'], ('stage0', 0, self.window(0)[0], self.window(0)[0] + timedelta(hours=1)))
+
+    def test_one_category_never_runs_on_two_stages_at_once(self):
+        items = [(f'item{i}', 'seniors', timedelta(hours=2)) for i in range(3)]
+        plan = solve(items, ['stage0', 'stage1'], [self.window(0)], time_budget=0)
+        self.assertEqual(plan.unplaced, [])
+        self.assertEqual(
+            sorted(start.hour for stage, day, start, end in plan.placements.values()), [9, 11, 13]
+        )
+        self.assert_no_overlaps(plan, items)
+
+    def test_fitting_items_use_a_single_day(self):
+        items = [(f'item{i}', f'category{i % 3}', timedelta(minutes=45)) for i in range(12)]
+        plan = solve(items, ['stage0', 'stage1'], [self.window(0), self.window(1)], time_budget=0.1)
+        self.assertEqual((plan.unplaced, plan.days_used), ([], 1))
+
+    def test_fully_busy_stage_is_skipped(self):
+        day = self.window(0)
+        busy = [('stage0', 0, day[0], day[1], 'other')]
+        items = [(f'item{i}', f'category{i}', timedelta(hours=1)) for i in range(3)]
+        plan = solve(items, ['stage0', 'stage1'], [day], busy, time_budget=0)
+        self.assertEqual({stage for stage, day, start, end in plan.placements.values()}, {'stage1'})
+        self.assert_no_overlaps(plan, items, busy)
+
+    def test_nothing_to_place_on(self):
+        items = [('item0', 'seniors', timedelta(hours=1))]
+        self.assertEqual(solve(items, [], [self.window(0)]).unplaced, ['item0'])
+        self.assertEqual(solve(items, ['stage0'], []).unplaced, ['item0'])
+
+
+@override_settings(SCHEDULE_SOLVER_TIME_BUDGET=0.05)
+class GenerateScheduleTests(ScheduleTestCase):
+    def generate(self, commit=True):
+        return self.client.post(f'/api/generate-sector-schedule/?sector_id={self.sector.id}', {
+            'days': [{'date': '2025-08-01', 'start': self.at(9).isoformat(), 'end': self.at(18).isoformat()}],
+            'commit': commit,
+        }, format='json')
+
+    def test_manual_write_during_generation_aborts_the_commit(self):
+        def solve_then_schedule(*args, **kwargs):
+            plan = solve(*args, **kwargs)
+            # A manager schedules by hand while the plan is computed
+            self.schedule(self.competitions[3], self.stages[0], 9)
+            return plan
+
+        with mock.patch('sahityo_core.views.solve', solve_then_schedule):
+            response = self.generate()
+        self.assertEqual(response.status_code, 409)
+        # Nothing of the plan was written (the hand-made row shares this
+        # test's connection, so it is rolled back with it)
+        self.assertFalse(ScheduledCompetition.objects.exists())
+
+        response = self.generate()
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(ScheduledCompetition.objects.count(), 1)
+        for stage in self.stages:
+            self.assertEqual(find_overlaps([
+                (competition.start_time, competition.end_time, competition.id)
+                for competition in ScheduledCompetition.objects.filter(stage=stage)
+            ]), [])
+
+    def test_competition_missing_from_the_catalog_is_tolerated(self):
+        catalog_registry.current()
+        # Created after the catalog was loaded, before any reload
+        late = Competition.objects.create(name='Late', category=self.competitions[0].category)
+        self.schedule(late, self.stages[0], 9)
+        response = self.generate(commit=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['scheduled_competitions'])
+        self.assertNotIn(str(late.id), [competition['id'] for competition in response.json()['unplaced_competitions']])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class StageShiftTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(admin)
+        sector = Sector.objects.create(name='Sector', user=admin)
+        self.stage = Stage.objects.create(name='Stage', sector=sector, user=User.objects.create(email='stage@example.com', role='stage'))
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Seniors')
+            competitions = [Competition.objects.create(name=f'Recitation {i}', category=category) for i in range(3)]
+        self.start = datetime(2025, 8, 1, 9, tzinfo=dt_timezone.utc)
+        # 9:00, 10:00 and 11:00, fifty minutes each
+        self.scheduled = [
+            ScheduledCompetition.objects.create(
+                competition=competition, stage=self.stage, sector=sector, date=self.start.date(),
+                reporting_time=self.start + timedelta(hours=hour, minutes=-30),
+                start_time=self.start + timedelta(hours=hour), end_time=self.start + timedelta(hours=hour, minutes=50),
+            )
+            for hour, competition in enumerate(competitions)
+        ]
+
+    def shift(self, after_hours, delta_minutes):
+        return self.client.post(f'/api/shift-stage-schedule/{self.stage.id}/', {
+            'date': '2025-08-01', 'after': (self.start + timedelta(hours=after_hours)).isoformat(), 'delta_minutes': delta_minutes,
+        }, format='json')
+
+    def start_times(self):
+        return [ScheduledCompetition.objects.get(id=sc.id).start_time for sc in self.scheduled]
+
+    def test_competitions_from_after_move_together(self):
+        response = self.shift(1, 5)
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(response.json()['shifted'], [str(sc.id) for sc in self.scheduled[1:]])
+        self.assertEqual(self.start_times(), [
+            self.start, self.start + timedelta(hours=1, minutes=5), self.start + timedelta(hours=2, minutes=5),
+        ])
+        moved = ScheduledCompetition.objects.get(id=self.scheduled[2].id)
+        self.assertEqual(moved.reporting_time, self.start + timedelta(hours=1, minutes=35))
+        self.assertEqual(moved.end_time, self.start + timedelta(hours=2, minutes=55))
+        self.assertEqual(moved.version, self.scheduled[2].version + 1)
+
+    def test_started_competitions_stay_put(self):
+        ScheduledCompetition.objects.filter(id=self.scheduled[1].id).update(status='ongoing')
+        response = self.shift(1, 5)
+        self.assertEqual(response.json()['shifted'], [str(self.scheduled[2].id)])
+        self.assertEqual(self.start_times()[1], self.start + timedelta(hours=1))
+
+    def test_shift_into_an_earlier_competition_is_rejected(self):
+        response = self.shift(1, -20)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['conflicts'], [[str(self.scheduled[0].id), str(self.scheduled[1].id)]])
+        self.assertEqual(self.start_times(), [self.start + timedelta(hours=hour) for hour in range(3)])
+
+    def test_nothing_to_shift_or_no_shift(self):
+        self.assertEqual(self.shift(3, 5).status_code, 404)
+        self.assertEqual(self.shift(1, 0).status_code, 400)
+
+
+class FreeSlotTests(ScheduleTestCase):
+    def test_window_without_offset_is_taken_as_local_time(self):
+        self.schedule(self.competitions[0], self.stages[0], 10)
+        response = self.client.get('/api/get-free-slots/', {
+            'sector_id': self.sector.id, 'stage_id': self.stages[0].id, 'date': '2025-08-01',
+            'from': '2025-08-01T09:00:00', 'to': '2025-08-01T12:00:00Z', 'min_duration_minutes': 30,
+        })
+        self.assertEqual(response.status_code, 200)
+        slots = response.json()['stages'][0]['free_slots']
+        self.assertEqual(
+            [(slot['start_time'], slot['end_time']) for slot in slots],
+            [(self.at(9).isoformat(), self.at(10).isoformat()), (self.at(10, 50).isoformat(), self.at(12).isoformat())],
+        )
+
+    def test_bad_window_or_duration_is_rejected(self):
+        query = {'sector_id': self.sector.id, 'date': '2025-08-01'}
+        for params in ({'min_duration_minutes': 0}, {'min_duration_minutes': 'half'}, {'from': '2025-08-01T12:00:00Z', 'to': '2025-08-01T12:00:00Z'}):
+            self.assertEqual(self.client.get('/api/get-free-slots/', {**query, **params}).status_code, 400, params)
+        response = self.client.get('/api/get-free-slots/', {**query, 'stage_id': uuid.uuid4()})
+        self.assertEqual(response.status_code, 404)
+
+
+class FreeSlotFinderTests(SimpleTestCase):
+    base = datetime(2025, 8, 1, 9)
+
+    def at(self, minutes):
+        return self.base + timedelta(minutes=minutes)
+
+    def slots(self, busy, window_end, min_minutes):
+        entries = [(self.at(start), self.at(end), None) for start, end in busy]
+        return [
+            ((start - self.base).seconds // 60, (end - self.base).seconds // 60)
+            for start, end in free_slots(entries, self.base, self.at(window_end), timedelta(minutes=min_minutes))
+        ]
+
+    def test_empty_timeline_is_one_slot(self):
+        self.assertEqual(self.slots([], 120, 30), [(0, 120)])
+        self.assertEqual(self.slots([], 20, 30), [])
+
+    def test_gap_of_exactly_the_minimum_counts(self):
+        self.assertEqual(self.slots([(30, 60), (90, 100)], 130, 30), [(0, 30), (60, 90), (100, 130)])
+        self.assertEqual(self.slots([(30, 60), (89, 100)], 129, 30), [(0, 30)])
+
+    def test_nested_and_overlapping_entries_are_merged(self):
+        self.assertEqual(self.slots([(10, 100), (20, 30), (90, 110)], 180, 30), [(110, 180)])
+
+    def test_entries_beyond_the_window_are_clipped(self):
+        entries = [(self.at(-30), self.at(20), None), (self.at(100), self.at(200), None)]
+        self.assertEqual(
+            free_slots(entries, self.base, self.at(120), timedelta(minutes=30)), [(self.at(20), self.at(100))]
+        )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class IntegrityReportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(self.admin)
+        self.sector = Sector.objects.create(name='North', user=self.admin)
+        self.stage = Stage.objects.create(name='Stage', sector=self.sector, user=User.objects.create(email='stage@example.com', role='stage'))
+        self.unit = Unit.objects.create(name='Unit', sector=self.sector, user=User.objects.create(email='unit@example.com', role='unit'))
+        other = Sector.objects.create(name='South', user=User.objects.create(email='south@example.com', role='admin'))
+        self.other_stage = Stage.objects.create(name='Away', sector=other, user=User.objects.create(email='away@example.com', role='stage'))
+        self.other_unit = Unit.objects.create(name='Away', sector=other, user=User.objects.create(email='away-unit@example.com', role='unit'))
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Seniors')
+            competitions = [Competition.objects.create(name=f'Mime {i}', category=category) for i in range(3)]
+        self.start = datetime(2025, 8, 1, 9, tzinfo=dt_timezone.utc)
+        self.scheduled = [
+            ScheduledCompetition.objects.create(
+                competition=competition, stage=self.stage, sector=self.sector, date=self.start.date(),
+                reporting_time=self.start + timedelta(hours=hour, minutes=-30),
+                start_time=self.start + timedelta(hours=hour), end_time=self.start + timedelta(hours=hour, minutes=50),
+            )
+            for hour, competition in enumerate(competitions)
+        ]
+        self.ids = [str(sc.id) for sc in self.scheduled]
+
+    def report(self):
+        response = self.client.get('/api/get-sector-integrity-report/', {'sector_id': self.sector.id})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_consistent_sector_is_ok(self):
+        report = self.report()
+        self.assertTrue(report['ok'])
+        self.assertEqual(report['scheduled_competitions'], 3)
+
+    def test_schedule_rule_breaks_are_reported(self):
+        # Written around ScheduledCompetition.clean(), as bulk paths can
+        ScheduledCompetition.objects.filter(id=self.scheduled[1].id).update(start_time=self.start + timedelta(minutes=40))
+        ScheduledCompetition.objects.filter(id__in=self.ids[1:]).update(status='ongoing')
+        ScheduledCompetition.objects.filter(id=self.scheduled[2].id).update(end_time=self.start + timedelta(hours=1))
+        report = self.report()
+        self.assertFalse(report['ok'])
+        self.assertCountEqual([overlap['scheduled_competition_ids'] for overlap in report['overlaps']], [self.ids[:2]])
+        [duplicate] = report['duplicate_statuses']
+        self.assertEqual((duplicate['status'], sorted(duplicate['scheduled_competition_ids'])), ('ongoing', sorted(self.ids[1:])))
+        self.assertEqual(report['invalid_times'], [self.ids[2]])
+
+    def test_presence_and_stage_mismatches_are_reported(self):
+        ParticipantPresent.objects.filter(scheduled_competition=self.scheduled[0], unit=self.unit).delete()
+        orphan = ParticipantPresent.objects.create(scheduled_competition=self.scheduled[1], unit=self.other_unit)
+        ScheduledCompetition.objects.filter(id=self.scheduled[2].id).update(stage=self.other_stage)
+        report = self.report()
+        self.assertFalse(report['ok'])
+        self.assertEqual(report['missing_presence'], [{'scheduled_competition_id': self.ids[0], 'missing_units': 1}])
+        self.assertEqual(report['orphan_presence'], [str(orphan.id)])
+        self.assertEqual(report['stage_sector_mismatches'], [self.ids[2]])
+        self.assertEqual(report['overlaps'], [])
+
+    def test_only_admins_get_the_report(self):
+        self.client.force_authenticate(self.unit.user)
+        response = self.client.get('/api/get-sector-integrity-report/', {'sector_id': self.sector.id})
+        self.assertEqual(response.status_code, 403)
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/get-sector-integrity-report/', {'sector_id': uuid.uuid4()})
+        self.assertEqual(response.status_code, 404)
+
+
+class ClashWarningTests(ScheduleTestCase):
+    def create(self, competition, stage, unit_ids=None):
+        body = {
+            'competition_id': str(competition.id), 'date': '2025-08-01',
+            'reporting_time': self.at(9, 30).isoformat(), 'start_time': self.at(10).isoformat(), 'end_time': self.at(11).isoformat(),
+        }
+        if unit_ids is not None:
+            body['unit_ids'] = [str(unit_id) for unit_id in unit_ids]
+        return self.client.post(f'/api/create-scheduled-competition/{stage.id}?sector_id={self.sector.id}', body, format='json')
+
+    def test_only_units_busy_elsewhere_are_flagged(self):
+        other = self.schedule(self.competitions[0], self.stages[0], 10)
+        ParticipantPresent.objects.filter(scheduled_competition=other, unit=self.units[0]).update(participant_1_present=True)
+
+        response = self.create(self.competitions[1], self.stages[1], [self.units[0].id, self.units[1].id])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['clash_warnings'], [
+            {'unit_id': str(self.units[0].id), 'scheduled_competition_ids': [str(other.id)]},
+        ])
+
+    def test_presence_rows_alone_are_not_clashes(self):
+        self.schedule(self.competitions[0], self.stages[0], 10)
+        response = self.create(self.competitions[1], self.stages[1])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['clash_warnings'], [])
+        # Nobody was known to check, which the response says
+        self.assertEqual(response.json()['clash_check'], 'no_participants')
+        report = self.client.get('/api/get-sector-clash-report/', {'sector_id': self.sector.id})
+        self.assertEqual(report.json()['clashes'], [])
+
+
+    def test_times_without_offset_are_checked_against_marked_units(self):
+        other = self.schedule(self.competitions[0], self.stages[0], 10)
+        moved = self.schedule(self.competitions[1], self.stages[1], 14)
+        ParticipantPresent.objects.filter(scheduled_competition__in=[other, moved], unit=self.units[0]).update(
+            participant_1_present=True
+        )
+        naive = lambda hour, minute=0: timezone.make_naive(self.at(hour, minute)).isoformat()
+        response = self.client.patch(f'/api/update-scheduled-competition-times/{moved.id}/', {
+            'reporting_time': naive(9, 30), 'start_time': naive(10, 30), 'end_time': naive(11, 30),
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['clash_check'], 'checked')
+        self.assertEqual(response.json()['clash_checked_units'], [str(self.units[0].id)])
+        self.assertEqual(response.json()['clash_warnings'], [
+            {'unit_id': str(self.units[0].id), 'scheduled_competition_ids': [str(other.id)]},
+        ])
+        moved.refresh_from_db()
+        self.assertEqual(moved.start_time, self.at(10, 30))
+
+    def test_report_tolerates_competitions_without_a_date(self):
+        index = ClashIndex(
+            [('a', 'stage-1', None, self.at(10), self.at(11)), ('b', 'stage-2', self.day, self.at(10, 30), self.at(12))],
+            [('a', 'unit'), ('b', 'unit')],
+        )
+        self.assertEqual([clash['scheduled_competition_ids'] for clash in index.all_clashes()], [['a', 'b']])
+
+
+@override_settings(STATUS_TIMER_LEASE_SECONDS=30, STATUS_TIMER_GRACE_SECONDS=15 * 60)
+class StatusTimerTests(ScheduleTestCase):
+    def test_follower_only_reads_the_lease(self):
+        leader, follower = StatusTimer('leader'), StatusTimer('follower')
+        now = self.at(6)
+        self.assertTrue(leader.step(now))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(follower.step(now + timedelta(seconds=10)))
+        self.assertEqual([query['sql'].split()[0] for query in queries], ['SELECT'])
+
+    def test_lease_is_taken_over_only_after_expiry(self):
+        leader, follower = StatusTimer('leader'), StatusTimer('follower')
+        now = self.at(6)
+        self.assertTrue(leader.step(now))
+        self.assertFalse(follower.step(now + timedelta(seconds=29)))
+        self.assertTrue(leader.step(now + timedelta(seconds=20)))  # renewed until now + 50s
+        self.assertFalse(follower.step(now + timedelta(seconds=45)))
+        self.assertTrue(follower.step(now + timedelta(seconds=51)))
+        self.assertFalse(leader.step(now + timedelta(seconds=52)))
+        self.assertEqual(SchedulerLease.objects.get().holder, 'follower')
+
+    def test_transitions_follow_the_schedule(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)  # reports 8:30, 9:00-9:50
+        timer = StatusTimer('leader')
+        for time, expected in [((8, 0), 'not_started'), ((8, 31), 'reporting'), ((9, 1), 'ongoing'), ((9, 51), 'finished')]:
+            timer.step(self.at(*time))
+            scheduled.refresh_from_db()
+            self.assertEqual(scheduled.status, expected)
+
+    def test_new_holder_catches_up_since_the_last_run(self):
+        missed = self.schedule(self.competitions[0], self.stages[0], 9)  # reports 8:30
+        stale = self.schedule(self.competitions[1], self.stages[1], 6)  # reports 5:30, before the last run
+        leader = StatusTimer('leader')
+        leader.step(self.at(8, 0))
+        leader.step(self.at(8, 0) + timedelta(seconds=20))  # renewal records the last run
+        # The leader dies; the follower takes over well past the grace period
+        follower = StatusTimer('follower')
+        self.assertTrue(follower.step(self.at(11)))
+        missed.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual(missed.status, 'finished')
+        self.assertEqual(stale.status, 'not_started')
+
+
+    @override_settings(STATUS_TIMER_RETRY_SECONDS=60)
+    def test_rejected_transition_is_retried(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)  # reports 8:30
+        other = self.schedule(self.competitions[1], self.stages[0], 11)
+        # Overlapping rows only an update() bypassing clean() can produce
+        ScheduledCompetition.objects.filter(id=other.id).update(start_time=self.at(9, 30), end_time=self.at(10, 30))
+        timer = StatusTimer('leader')
+        with self.assertLogs('sahityo_core.status_timer', 'WARNING'):
+            self.assertTrue(timer.step(self.at(8, 31)))
+        scheduled.refresh_from_db()
+        self.assertEqual(scheduled.status, 'not_started')
+        self.assertIn(str(scheduled.id), timer.tokens)
+
+        ScheduledCompetition.objects.filter(id=other.id).update(start_time=self.at(11), end_time=self.at(11, 50))
+        timer.step(self.at(8, 32))
+        scheduled.refresh_from_db()
+        self.assertEqual(scheduled.status, 'reporting')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}, ETA_DRIFT_ALPHA=0.5)
+class StageEtaTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(email='admin@example.com', role='admin')
+        self.client.force_authenticate(admin)
+        sector = Sector.objects.create(name='Sector', user=admin)
+        self.stage = Stage.objects.create(name='Stage', sector=sector, user=User.objects.create(email='stage@example.com', role='stage'))
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Seniors')
+            competitions = [Competition.objects.create(name=f'Drama {i}', category=category) for i in range(3)]
+        self.start = datetime(2025, 8, 1, 9, tzinfo=dt_timezone.utc)
+        # 9:00, 10:00 and 11:00, fifty minutes each, reporting half an hour before
+        self.scheduled = [
+            ScheduledCompetition.objects.create(
+                competition=competition, stage=self.stage, sector=sector, date=self.start.date(),
+                reporting_time=self.start + timedelta(hours=hour, minutes=-30),
+                start_time=self.start + timedelta(hours=hour), end_time=self.start + timedelta(hours=hour, minutes=50),
+            )
+            for hour, competition in enumerate(competitions)
+        ]
+
+    def at(self, minutes):
+        return self.start + timedelta(minutes=minutes)
+
+    def drift(self):
+        return StageDrift.objects.get(stage=self.stage, date=self.start.date())
+
+    def transition(self, scheduled, new_status, minutes):
+        with mock.patch('sahityo_core.eta.timezone.now', return_value=self.at(minutes)):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    f'/api/update-scheduled-competition-status/{scheduled.id}/', {'status': new_status}, format='json'
+                )
+        self.assertEqual(response.status_code, 200)
+
+    def predictions(self):
+        response = self.client.get(f'/api/get-stage-eta-predictions/{self.stage.id}/', {'date': '2025-08-01'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_delays_fold_into_a_weighted_average(self):
+        with transaction.atomic():
+            self.assertEqual(record_transition(self.scheduled[0], 'ongoing', now=self.at(10)), ['started_at'])
+        self.assertEqual((self.drift().start_delay, self.drift().start_samples), (600, 1))
+        with transaction.atomic():
+            record_transition(self.scheduled[1], 'ongoing', now=self.at(60))
+        self.assertEqual(self.drift().start_delay, 300)
+        with transaction.atomic():
+            record_transition(self.scheduled[2], 'ongoing', now=self.at(140))
+        self.assertEqual((self.drift().start_delay, self.drift().start_samples), (750, 3))
+        # Reporting delays are averaged separately
+        with transaction.atomic():
+            self.assertEqual(record_transition(self.scheduled[1], 'reporting', now=self.at(35)), ['reported_at'])
+        self.assertEqual((self.drift().reporting_delay, self.drift().start_delay), (300, 750))
+
+    def test_finishing_or_resetting_leaves_the_drift_alone(self):
+        scheduled = self.scheduled[0]
+        self.assertEqual(record_transition(scheduled, 'finished', now=self.at(55)), ['finished_at'])
+        self.assertEqual(scheduled.finished_at, self.at(55))
+        self.assertEqual(
+            record_transition(scheduled, 'not_started', now=self.at(60)), ['reported_at', 'started_at', 'finished_at']
+        )
+        self.assertIsNone(scheduled.finished_at)
+        self.assertFalse(StageDrift.objects.exists())
+
+    def test_predictions_follow_the_drift_and_the_competition_ahead(self):
+        self.transition(self.scheduled[0], 'ongoing', 10)
+        data = self.predictions()
+        self.assertEqual((data['start_delay_seconds'], data['reporting_delay_seconds']), (600, 0))
+        self.assertEqual(
+            [(eta['id'], eta['predicted_reporting_time'], eta['predicted_start_time']) for eta in data['etas']],
+            [
+                (str(self.scheduled[1].id), self.at(40).isoformat(), self.at(70).isoformat()),
+                (str(self.scheduled[2].id), self.at(100).isoformat(), self.at(130).isoformat()),
+            ],
+        )
+        self.assertEqual(data['etas'][0]['competition']['name'], 'Drama 1')
+
+        # Cached until the next transition
+        self.transition(self.scheduled[1], 'reporting', 45)
+        data = self.predictions()
+        self.assertEqual(data['reporting_delay_seconds'], 900)
+        self.assertEqual(
+            [eta['predicted_reporting_time'] for eta in data['etas']], [self.at(45).isoformat(), self.at(105).isoformat()]
+        )
+
+    def test_late_running_competition_pushes_the_next_one_back(self):
+        # Starts 40 minutes late with no other drift: ends at 10:30
+        ScheduledCompetition.objects.filter(id=self.scheduled[0].id).update(status='ongoing', started_at=self.at(40))
+        [first, second] = self.predictions()['etas']
+        self.assertEqual((first['predicted_reporting_time'], first['predicted_start_time']), (self.at(60).isoformat(), self.at(90).isoformat()))
+        self.assertEqual(second['predicted_start_time'], self.at(140).isoformat())
+
+
+class OptimisticConcurrencyTests(ScheduleTestCase):
+    def times(self, scheduled, version, start_hour):
+        start = self.at(start_hour)
+        return self.client.patch(f'/api/update-scheduled-competition-times/{scheduled.id}/', {
+            'reporting_time': (start - timedelta(minutes=30)).isoformat(), 'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=50)).isoformat(), 'version': version,
+        }, format='json')
+
+    def test_schedule_write_with_stale_version_conflicts(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)
+        response = self.times(scheduled, 1, 10)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 2)
+
+        response = self.times(scheduled, 1, 11)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['current']['version'], 2)
+        self.assertEqual(response.json()['current']['start_time'], self.at(10).isoformat())
+
+        response = self.client.patch(
+            f'/api/update-scheduled-competition-status/{scheduled.id}/', {'status': 'reporting', 'version': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, 409)
+        response = self.client.patch(
+            f'/api/update-scheduled-competition-status/{scheduled.id}/', {'status': 'reporting', 'version': 2}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        scheduled.refresh_from_db()
+        self.assertEqual((scheduled.status, scheduled.version, scheduled.start_time), ('reporting', 3, self.at(10)))
+
+    def test_presence_write_with_stale_version_conflicts(self):
+        scheduled = self.schedule(self.competitions[0], self.stages[0], 9)
+        participant = ParticipantPresent.objects.get(scheduled_competition=scheduled, unit=self.units[0])
+        url = f'/api/update-participant-presence/{participant.id}/'
+
+        response = self.client.patch(url, {'participant_1_present': True, 'version': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 2)
+
+        response = self.client.patch(url, {'participant_2_present': True, 'version': 1}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['current']['version'], 2)
+        self.assertTrue(response.json()['current']['participant_1_present'])
+
+        response = self.client.patch(
+            f'/api/mark-participant-presence/{scheduled.id}/{self.units[0].id}/', {'participant_2_present': True, 'version': 2},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        participant.refresh_from_db()
+        self.assertEqual((participant.participant_1_present, participant.participant_2_present, participant.version), (True, True, 3))
+
+
+@override_settings(PRESENCE_WRITE_BEHIND=True, PRESENCE_FLUSH_INTERVAL_MS=3600000, PRESENCE_FLUSH_MAX_ITEMS=100)
+class PresenceBufferTests(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.scheduled = self.schedule(self.competitions[0], self.stages[0], 9)
+        self.participants = [
+            ParticipantPresent.objects.get(scheduled_competition=self.scheduled, unit=unit) for unit in self.units
+        ]
+        self.addCleanup(setattr, presence_buffer, 'pending', {})
+
+    def mark(self, participant, value):
+        return self.client.patch(
+            f'/api/update-participant-presence/{participant.id}/', {'participant_1_present': value}, format='json'
+        )
+
+    def test_bad_value_is_rejected_and_does_not_block_good_ones(self):
+        self.assertEqual(self.mark(self.participants[0], 'maybe').status_code, 400)
+        self.assertFalse(presence_buffer.is_pending(self.scheduled.id, self.units[0].id))
+
+        self.assertEqual(self.mark(self.participants[0], True).status_code, 202)
+        self.assertEqual(self.mark(self.participants[1], 'true').status_code, 202)
+        self.assertEqual(presence_buffer.flush(), 2)
+        self.assertEqual(
+            [p.participant_1_present for p in ParticipantPresent.objects.filter(id__in=[p.id for p in self.participants]).order_by('unit__name')],
+            [True, True, False],
+        )
+
+    def test_flush_drops_a_tick_that_cannot_be_written(self):
+        self.assertEqual(self.mark(self.participants[0], True).status_code, 202)
+        # Bypasses add()'s checks, as a row that no longer accepts the value would
+        presence_buffer.pending[(str(self.scheduled.id), str(self.units[1].id))] = (
+            self.sector.id, {'participant_1_present': 'maybe'}
+        )
+        self.assertEqual(self.mark(self.participants[2], True).status_code, 202)
+
+        with self.assertLogs('sahityo_core.presence_buffer', 'ERROR') as logs:
+            presence_buffer.flush()
+        self.assertIn('Dropped presence tick', logs.output[-1])
+        self.assertEqual(presence_buffer.pending, {})
+        self.assertEqual(
+            [p.participant_1_present for p in ParticipantPresent.objects.filter(id__in=[p.id for p in self.participants]).order_by('unit__name')],
+            [True, False, True],
+        )
+
+    def test_unexpected_error_requeues_the_batch(self):
+        self.assertEqual(self.mark(self.participants[0], True).status_code, 202)
+        with mock.patch.object(presence_buffer, '_write', side_effect=TypeError('bug')):
+            with self.assertLogs('sahityo_core.presence_buffer', 'ERROR'), self.assertRaises(TypeError):
+                presence_buffer.flush()
+        self.assertTrue(presence_buffer.is_pending(self.scheduled.id, self.units[0].id))
+        presence_buffer.flush()
+        self.participants[0].refresh_from_db()
+        self.assertTrue(self.participants[0].participant_1_present)
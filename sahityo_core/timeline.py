@@ -0,0 +1,126 @@
+"""
+Interval helpers for a stage's timeline on one date.
+
+Entries are (start, end, key) tuples with half-open [start, end) intervals,
+matching the overlap rule in ScheduledCompetition.clean(): two competitions
+conflict when one starts before the other ends. Everything here works on
+sorted lists in memory, so callers load a day's rows with one query and
+validate a whole new timeline in a single pass. IntervalIndex answers
+repeated overlap questions against a fixed set of intervals.
+"""
+import bisect
+
+
+def find_overlaps(entries):
+    """
+    Return (earlier_key, later_key) for every pair of overlapping entries,
+    sweeping in start order while tracking the entry that ends last.
+    """
+    overlaps = []
+    active = []  # entries not yet ended at the current start, as (end, key)
+    for start, end, key in sorted(entries, key=lambda entry: (entry[0], entry[1])):
+        active = [(active_end, active_key) for active_end, active_key in active if active_end > start]
+        overlaps.extend((active_key, key) for active_end, active_key in active)
+        active.append((end, key))
+    return overlaps
+
+
+def free_slots(entries, window_start, window_end, min_duration):
+    """
+    Gaps of at least min_duration inside [window_start, window_end) that no
+    entry covers, as (start, end) pairs in order.
+    """
+    slots = []
+    cursor = window_start
+    for start, end, key in sorted(entries, key=lambda entry: entry[0]):
+        if start >= window_end:
+            break
+        if start - cursor >= min_duration:
+            slots.append((cursor, start))
+        cursor = max(cursor, end)
+    if window_end - cursor >= min_duration:
+        slots.append((cursor, window_end))
+    return slots
+
+
+class IntervalIndex:
+    """
+    Intervals sorted by start, with two views of their ends: a running
+    maximum, so latest_end() is one bisect, and a max-end segment tree over
+    the same order, so overlapping() costs O((k + 1) log n) for k results
+    however long or nested the intervals are (walking back over the running
+    maximum is O(n) once one long interval covers everything). add() is
+    O(n) for the list inserts and leaves the tree to be rebuilt by the next
+    overlapping().
+    """
+
+    def __init__(self, entries=()):
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.starts = [start for start, end, key in entries]
+        self.ends = [end for start, end, key in entries]
+        self.keys = [key for start, end, key in entries]
+        self.max_ends = []
+        running = None
+        for end in self.ends:
+            running = end if running is None else max(running, end)
+            self.max_ends.append(running)
+        self._tree = None
+
+    def add(self, start, end, key=None):
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.keys.insert(index, key)
+        self.max_ends.insert(index, end)
+        running = self.max_ends[index - 1] if index else end
+        for position in range(index, len(self.ends)):
+            running = max(running, self.ends[position])
+            self.max_ends[position] = running
+        self._tree = None
+
+    def latest_end(self, start, end):
+        """
+        Latest end among intervals overlapping [start, end), or None.
+        """
+        index = bisect.bisect_left(self.starts, end)
+        if index and self.max_ends[index - 1] > start:
+            return self.max_ends[index - 1]
+        return None
+
+    def _build_tree(self):
+        # Leaves at size + position; a node holds the latest end below it,
+        # None where there is no interval
+        size = 1
+        while size < len(self.ends):
+            size *= 2
+        tree = [None] * size + self.ends + [None] * (size - len(self.ends))
+        for node in range(size - 1, 0, -1):
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if right is None or (left is not None and left > right) else right
+        self._tree = (size, tree)
+
+    def overlapping(self, start, end):
+        """
+        (start, end, key) of every interval overlapping [start, end), latest
+        start first.
+        """
+        # Intervals at positions below limit start before end
+        limit = bisect.bisect_left(self.starts, end)
+        if not limit:
+            return
+        if self._tree is None:
+            self._build_tree()
+        size, tree = self._tree
+        stack = [(1, 0, size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or tree[node] is None or tree[node] <= start:
+                continue  # nothing below ends after start
+            if node >= size:
+                position = node - size
+                yield self.starts[position], self.ends[position], self.keys[position]
+                continue
+            middle = (low + high) // 2
+            # The right half is popped first
+            stack.append((2 * node, low, middle))
+            stack.append((2 * node + 1, middle, high))
@@ -0,0 +1,49 @@
+"""
+Per-sector topology: the sector with its stages and units (names and login
+emails), read with a single UNION ALL query and cached under the sector's
+tag, which Stage and Unit writes invalidate.
+"""
+from django.conf import settings
+from django.db.models import F, Value, CharField
+
+from sahityo_core.cache import cached, sector_tag
+from sahityo_core.models import Sector, Stage, Unit
+
+
+def _rows(queryset, kind):
+    return queryset.annotate(
+        kind=Value(kind, output_field=CharField()),
+        email=F('user__email'),
+    ).values_list('kind', 'id', 'name', 'email')
+
+
+def build_sector_topology(sector_id):
+    rows = _rows(Sector.objects.filter(id=sector_id), 'sector').union(
+        _rows(Stage.objects.filter(sector_id=sector_id), 'stage'),
+        _rows(Unit.objects.filter(sector_id=sector_id), 'unit'),
+        all=True,
+    )
+
+    topology = {'sector': None, 'stages': [], 'units': []}
+    for kind, row_id, name, email in rows:
+        entry = {'id': str(row_id), 'name': name, 'email': email}
+        if kind == 'sector':
+            topology['sector'] = {'id': entry['id'], 'name': name}
+        else:
+            topology[kind + 's'].append(entry)
+
+    if topology['sector'] is None:
+        return None
+    return topology
+
+
+def get_sector_topology(sector_id):
+    """
+    Returns None when the sector does not exist.
+    """
+    return cached(
+        f'topology:{sector_id}',
+        [sector_tag(sector_id)],
+        lambda: build_sector_topology(sector_id),
+        settings.TOPOLOGY_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,50 @@
+"""
+ScheduledCompetition status transitions, shared by the status endpoint and
+the automatic status timer (sahityo_core.status_timer).
+
+A transition enforces the one-ongoing/one-reporting rule per stage and
+date, records the actual transition time and stage drift for the ETA
+predictions, saves with a version check, and publishes one status_changed
+event on commit.
+"""
+from django.db import transaction
+
+from sahityo_core.eta import record_transition
+from sahityo_core.events import send_status_changed_on_commit
+from sahityo_core.models import ParticipantPresent, ScheduledCompetition
+from sahityo_core.versioning import save_versioned
+
+SINGLE_PER_STAGE_STATUSES = ('ongoing', 'reporting')
+
+
+class TransitionBlocked(Exception):
+    pass
+
+
+def transition_status(competition, new_status, automatic=False, expected_version=None):
+    """
+    Move competition to new_status, raising TransitionBlocked when another
+    competition on the stage and date already holds it and VersionConflict
+    when the row changed since competition (or expected_version) was read.
+    """
+    if new_status in SINGLE_PER_STAGE_STATUSES:
+        exists = ScheduledCompetition.objects.filter(
+            stage_id=competition.stage_id,
+            date=competition.date,
+            status=new_status
+        ).exclude(id=competition.id).exists()
+        if exists:
+            raise TransitionBlocked(
+                f'Another competition with status "{new_status}" already exists for this stage and date.'
+            )
+
+    old_status = competition.status
+    with transaction.atomic():
+        if new_status == 'not_started':
+            ParticipantPresent.objects.filter(scheduled_competition=competition).delete()
+        # Record the actual transition time and the stage drift for ETAs
+        transition_fields = record_transition(competition, new_status) if new_status != old_status else []
+        competition.status = new_status
+        save_versioned(competition, ['status', *transition_fields], expected_version, clean=True)
+        if new_status != old_status:
+            send_status_changed_on_commit(competition, old_status, automatic)
@@ -1,9 +1,9 @@
 from django.urls import path, include
 from sahityo_core.views import create_stage, create_unit, get_units,get_stages,edit_stage, edit_unit, \
-    get_categories,get_competitions_by_category,get_unscheduled_competitions,create_scheduled_competition, \
-    scheduled_competitions_by_stage_date,update_scheduled_competition_status,scheduled_competition_detail,\
-        update_participant_presence,get_stages_with_competition_details,update_scheduled_competition_times,\
-            reset_sector_schedules_and_participants,get_stage_competitions_for_unit,delete_scheduled_competition,\
+    get_categories,get_competitions_by_category,get_unscheduled_competitions,generate_sector_schedule,create_scheduled_competition, \
+    scheduled_competitions_by_stage_date,update_scheduled_competition_status,get_stage_eta_predictions,scheduled_competition_detail,scheduled_competitions_detail_batch,\
+        update_participant_presence,mark_participant_presence,get_stages_with_competition_details,update_scheduled_competition_times,shift_stage_schedule,get_free_slots,\
+            reset_sector_schedules_and_participants,get_sector_integrity_report,get_sector_clash_report,get_stage_competitions_for_unit,get_unit_itinerary,delete_scheduled_competition,\
                 get_admin_dashboard_data
         
         
@@ -27,6 +27,8 @@ urlpatterns = [
     path('get-competitions-by-category/', get_competitions_by_category, name='get_competitions_by_category'),
     # get unscheduled competitions
     path('get-unscheduled-competitions/<uuid:category_id>/', get_unscheduled_competitions, name='get_unscheduled_competitions'),
+    # place unscheduled competitions on the sector's stages automatically (preview or commit)
+    path('generate-sector-schedule/', generate_sector_schedule, name='generate_sector_schedule'),
 
     # create scheduled competition
     path('create-scheduled-competition/<uuid:stage_id>', create_scheduled_competition, name='create_scheduled_competition'),
@@ -37,23 +39,47 @@ urlpatterns = [
     # update scheduled competition status
     path('update-scheduled-competition-status/<uuid:scheduled_competition_id>/', update_scheduled_competition_status, name='update_scheduled_competition_status'),
     
+    # predicted reporting and start times of a stage's upcoming competitions
+    path('get-stage-eta-predictions/<uuid:stage_id>/', get_stage_eta_predictions, name='get_stage_eta_predictions'),
+    
     # get scheduled competition details
     path('scheduled-competition-detail/<uuid:scheduled_competition_id>/', scheduled_competition_detail, name='scheduled_competition_detail'),
     
+    # get details of several scheduled competitions: ?ids=<uuid>,<uuid>
+    path('scheduled-competitions/', scheduled_competitions_detail_batch, name='scheduled_competitions_detail_batch'),
+    
     # update participant presence
     path('update-participant-presence/<uuid:participant_present_id>/', update_participant_presence, name='update_participant_presence'),
     
+    # update participant presence of a unit, creating the entry on first mark
+    path('mark-participant-presence/<uuid:scheduled_competition_id>/<uuid:unit_id>/', mark_participant_presence, name='mark_participant_presence'),
+    
     # get stages with competition details
     path('get-stages-with-competition-details/<uuid:unit_id>/<str:date>/', get_stages_with_competition_details, name='get_stages_with_competition_details'),
     
     # update scheduled competition times
     path('update-scheduled-competition-times/<uuid:scheduled_competition_id>/', update_scheduled_competition_times, name='update_scheduled_competition_times'),
     
+    # shift every not-started competition on a stage and date after a point in time
+    path('shift-stage-schedule/<uuid:stage_id>/', shift_stage_schedule, name='shift_stage_schedule'),
+    
+    # free intervals on the stages of a sector for a date and minimum duration
+    path('get-free-slots/', get_free_slots, name='get_free_slots'),
+    
     # reset sector schedules and participants
     path('reset-sector-schedules-and-participants/', reset_sector_schedules_and_participants, name='reset_sector_schedules_and_participants'),
 
+    # schedule conflicts and presence inconsistencies of a sector
+    path('get-sector-integrity-report/', get_sector_integrity_report, name='get_sector_integrity_report'),
+
+    # units booked on two stages at overlapping times
+    path('get-sector-clash-report/', get_sector_clash_report, name='get_sector_clash_report'),
+
     # 
     path('get-stage-competitions-for-unit/<uuid:stage_id>/<uuid:unit_id>/', get_stage_competitions_for_unit, name='get_stage_competitions_for_unit'),
+
+    # every scheduled competition of the unit's sector with the unit's presence flags
+    path('get-unit-itinerary/<uuid:unit_id>/', get_unit_itinerary, name='get_unit_itinerary'),
     
     # delete scheduled competition
     path('delete-scheduled-competition/<uuid:scheduled_competition_id>/', delete_scheduled_competition, name='delete_scheduled_competition'),
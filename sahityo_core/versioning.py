@@ -0,0 +1,71 @@
+"""
+Optimistic concurrency for ScheduledCompetition and ParticipantPresent.
+
+Both carry a version that every write bumps. save_versioned() writes only
+the given fields; when the client sent the version it read, with one
+conditional
+
+    UPDATE ... SET ..., version = version + 1 WHERE id = %s AND version = %s
+
+so a write based on a stale read matches no row and raises VersionConflict
+(the endpoints answer 409 with the current state) instead of silently
+overwriting another manager's change. No row lock is held between the read
+and the write.
+"""
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+
+class VersionConflict(Exception):
+    def __init__(self, current):
+        # The row as it is now, or None when it was deleted
+        self.current = current
+        super().__init__('The record was changed by someone else.')
+
+
+def parse_version(value):
+    """
+    The version a client sent, or None when it sent none; ValueError when
+    it is not a positive integer.
+    """
+    if value is None or value == '':
+        return None
+    version = int(value)
+    if version < 1:
+        raise ValueError('version must be a positive integer')
+    return version
+
+
+def save_versioned(instance, fields, expected_version=None, clean=False):
+    """
+    Write fields of instance and bump its version, then send post_save so
+    the cache receivers run. With expected_version the write only applies
+    while the row is still at that version and raises VersionConflict
+    otherwise; without it only the given fields are overwritten. clean runs
+    full_clean() first, as ScheduledCompetition.save() does.
+    """
+    model = type(instance)
+    if clean:
+        instance.full_clean()
+    fields = list(fields)
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) and field.name not in fields:
+            setattr(instance, field.attname, timezone.now())
+            fields.append(field.name)
+
+    attnames = [model._meta.get_field(field).attname for field in fields]
+    values = {attname: getattr(instance, attname) for attname in attnames}
+    rows = model.objects.filter(pk=instance.pk)
+    if expected_version is not None:
+        rows = rows.filter(version=expected_version)
+    if not rows.update(version=F('version') + 1, **values):
+        raise VersionConflict(model.objects.filter(pk=instance.pk).first())
+    if expected_version is not None:
+        instance.version = expected_version + 1
+    else:
+        instance.version = model.objects.filter(pk=instance.pk).values_list('version', flat=True).first()
+    post_save.send(
+        sender=model, instance=instance, created=False, raw=False,
+        using=instance._state.db, update_fields=frozenset([*fields, 'version']),
+    )
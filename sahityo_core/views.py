@@ -8,28 +8,243 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 from .models import Sector, Unit,User,Stage,Category,Competition,ScheduledCompetition,ParticipantPresent
 from sahityo_core.serializers import ScheduledCompetitionCreateSerializer
-from django.db import transaction
+from sahityo_core.catalog import catalog_registry
+from sahityo_core.topology import get_sector_topology
+from sahityo_core.presence import backfill_presence, invalidate_presence_on_commit
+from sahityo_core.presence_buffer import PRESENCE_FIELDS, clean_presence_changes, presence_buffer, write_presence
+from sahityo_core.schedule_reset import reset_sector_schedule
+from sahityo_core.timeline import find_overlaps, free_slots
+from sahityo_core.events import send_schedule_changed_on_commit
+from sahityo_core.schedule_solver import solve
+from sahityo_core.integrity import sector_integrity_report
+from sahityo_core.itinerary import itinerary_etag, stream_itinerary
+from sahityo_core.clashes import clash_check_fields, get_clash_index
+from sahityo_core.eta import get_stage_etas
+from sahityo_core.transitions import TransitionBlocked, transition_status
+from sahityo_core.versioning import VersionConflict, parse_version, save_versioned
+from sahityo_core.live_board import get_live_board, unit_live_board
+from sahityo_core.renderers import fast_json, cached_render, wants_compact
+from sahityo_core.compact import CompactTable, epoch
+from sahityo_core.fieldsets import FieldSelection, InvalidFields
+from sahityo_core.cache import CATALOG, stage_tag
+from django.conf import settings
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.db import IntegrityError, transaction
+import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from django.utils import timezone
 import pytz
-from django.db.models import Q
+from django.db.models import F, Q
 import traceback
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.exceptions import InvalidToken
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError
 
 
 
 
 def parse_utc_datetime(dt_str):
-    return datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+    value = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+    # Without an offset, take it in the default time zone as Django would,
+    # so it compares with the stored (aware) times
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+# Fields selectable with ?fields= on the read endpoints (see sahityo_core/fieldsets.py)
+PARTICIPANT_FIELDS = dict.fromkeys([
+    'id', 'unit', 'participant_1_present', 'participant_2_present', 'version', 'created_at', 'updated_at',
+])
+SCHEDULED_COMPETITION_DETAIL_FIELDS = {
+    **dict.fromkeys([
+        'id', 'competition', 'sector', 'reporting_time', 'date', 'start_time', 'end_time', 'status', 'version',
+    ]),
+    'participants': PARTICIPANT_FIELDS,
+}
+STAGE_SCHEDULE_FIELDS = dict.fromkeys([
+    'id', 'competition', 'sector', 'reporting_time', 'start_time', 'end_time', 'status',
+])
+UNIT_STAGE_COMPETITION_FIELDS = dict.fromkeys([
+    'id', 'name', 'category', 'participant1_present_status', 'participant2_present_status',
+    'reporting_time', 'date', 'start_time', 'end_time', 'status',
+])
+SCHEDULE_COLUMNS = {
+    'id': ['id'],
+    'competition': ['competition_id'],
+    'reporting_time': ['reporting_time'],
+    'date': ['date'],
+    'start_time': ['start_time'],
+    'end_time': ['end_time'],
+    'status': ['status'],
+    'version': ['version'],
+}
+
+MAX_BATCH_IDS = 100
+
+
+def build_scheduled_competition_details(ids, fields):
+    """
+    Detail payloads for several scheduled competitions, keyed by id, with one
+    query per table: scheduled competitions (joined with their sector when
+    asked for) and participant presence joined with units. The roster is the
+    sector's units from the cached topology, so units with no presence row
+    yet are still listed. Competition and category names come from the
+    catalog registry. Read-only: nothing is created here.
+    """
+    catalog = catalog_registry.current()
+
+    competitions = ScheduledCompetition.objects.filter(id__in=ids)
+    columns = fields.columns(SCHEDULE_COLUMNS, always=['id', 'sector_id'])
+    if 'sector' in fields:
+        competitions = competitions.select_related('sector')
+        columns += ['sector__id', 'sector__name']
+    competitions = {str(competition.id): competition for competition in competitions.only(*columns)}
+
+    participants = {competition_id: [] for competition_id in competitions}
+    participant_fields = fields.nested('participants')
+    if 'participants' in fields and competitions:
+        rows = ParticipantPresent.objects.filter(scheduled_competition_id__in=list(competitions)).values(
+            'scheduled_competition_id', 'unit_id',
+            *participant_fields.columns({
+                'id': ['id'],
+                'unit': ['unit__name'],
+                'participant_1_present': ['participant_1_present'],
+                'participant_2_present': ['participant_2_present'],
+                'version': ['version'],
+                'created_at': ['created_at'],
+                'updated_at': ['updated_at'],
+            })
+        )
+        marked_units = {competition_id: set() for competition_id in competitions}
+        # Ticks still queued in this process's write-behind buffer
+        queued = {}
+        if settings.PRESENCE_WRITE_BEHIND:
+            queued = {competition_id: presence_buffer.overlay(competition_id) for competition_id in competitions}
+        for participant in rows:
+            competition_id = str(participant['scheduled_competition_id'])
+            marked_units[competition_id].add(str(participant['unit_id']))
+            if competition_id in queued:
+                participant.update(queued[competition_id].get(str(participant['unit_id']), {}))
+            participants[competition_id].append(participant_fields.pick({
+                'id': lambda: str(participant['id']),
+                'unit': lambda: {
+                    'id': str(participant['unit_id']),
+                    'name': participant['unit__name']
+                },
+                'participant_1_present': lambda: participant['participant_1_present'],
+                'participant_2_present': lambda: participant['participant_2_present'],
+                'version': lambda: participant['version'],
+                'created_at': lambda: participant['created_at'].isoformat(),
+                'updated_at': lambda: participant['updated_at'].isoformat()
+            }))
+
+        # Units without a presence row yet get an unsaved entry (id None);
+        # the row is created when presence is first marked.
+        for competition_id, competition in competitions.items():
+            topology = get_sector_topology(competition.sector_id)
+            for unit in topology['units'] if topology else []:
+                if unit['id'] in marked_units[competition_id]:
+                    continue
+                participants[competition_id].append(participant_fields.pick({
+                    'id': lambda: None,
+                    'unit': lambda: {'id': unit['id'], 'name': unit['name']},
+                    'participant_1_present': lambda: False,
+                    'participant_2_present': lambda: False,
+                    'version': lambda: None,
+                    'created_at': lambda: None,
+                    'updated_at': lambda: None
+                }))
+
+    details = {}
+    for competition_id, competition in competitions.items():
+        details[competition_id] = fields.pick({
+            'id': lambda: competition_id,
+            'competition': lambda: catalog.competition(competition.competition_id),
+            'sector': lambda: {
+                'id': str(competition.sector.id),
+                'name': competition.sector.name
+            },
+            'reporting_time': lambda: competition.reporting_time.isoformat(),
+            'date': lambda: competition.date.isoformat() if competition.date else None,
+            'start_time': lambda: competition.start_time.isoformat(),
+            'end_time': lambda: competition.end_time.isoformat(),
+            'status': lambda: competition.status,
+            'version': lambda: competition.version,
+            'participants': lambda: participants[competition_id],
+        })
+    return details
+
+
+def participant_presence_data(participant, unit):
+    return {
+        'id': str(participant.id),
+        'unit': {
+            'id': str(unit.id),
+            'name': unit.name
+        },
+        'participant_1_present': participant.participant_1_present,
+        'participant_2_present': participant.participant_2_present,
+        'version': participant.version,
+        'created_at': participant.created_at.isoformat(),
+        'updated_at': participant.updated_at.isoformat()
+    }
+
+
+def scheduled_competition_state(competition):
+    return {
+        'id': str(competition.id),
+        'reporting_time': competition.reporting_time.isoformat(),
+        'date': competition.date.isoformat() if competition.date else None,
+        'start_time': competition.start_time.isoformat(),
+        'end_time': competition.end_time.isoformat(),
+        'status': competition.status,
+        'version': competition.version,
+    }
+
+
+def requested_unit_ids(data):
+    """
+    Optional unit_ids of a schedule write: the units entering the
+    competition, checked for clashes on other stages.
+    """
+    unit_ids = data.get('unit_ids') or []
+    if not isinstance(unit_ids, list):
+        raise ValueError('unit_ids must be a list')
+    return [str(unit_id) for unit_id in unit_ids]
+
+
+def version_conflict_response(conflict, state):
+    """
+    409 for a write based on a stale version, with the record as it is now
+    (state() formats it) so the client can merge and retry.
+    """
+    if conflict.current is None:
+        return Response({'error': 'Record no longer exists'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'error': 'Conflict: the record was changed by someone else.',
+        'current': state(conflict.current),
+    }, status=status.HTTP_409_CONFLICT)
+
+class TokenResponseMixin:
+    """
+    Token responses carry credentials: they are never stored, and
+    no-transform keeps CompressionMiddleware off them (BREACH).
+    """
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_cache_control(response, no_store=True, no_transform=True)
+        return response
 
-class CustomTokenObtainPairView(TokenObtainPairView):
+
+class CustomTokenObtainPairView(TokenResponseMixin, TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
-class DebugTokenRefreshView(TokenRefreshView):
+class DebugTokenRefreshView(TokenResponseMixin, TokenRefreshView):
     def post(self, request, *args, **kwargs):
         try:
             return super().post(request, *args, **kwargs)
@@ -116,6 +331,9 @@ def create_unit(request):
         user=user
     )
 
+    # Give the new unit presence rows for the competitions already scheduled
+    transaction.on_commit(lambda: backfill_presence(sector.id))
+
     return Response({'message': 'Unit created successfully', 'user_id': str(user.id)}, status=status.HTTP_201_CREATED)
 
 @api_view(['PUT'])
@@ -156,7 +374,9 @@ def get_admin_dashboard_data(request):
     if not sector_id:
         return Response({'error': 'sector_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        sector = Sector.objects.get(id=sector_id)
+        topology = get_sector_topology(sector_id)
+        if topology is None:
+            raise Sector.DoesNotExist
 
         # Total competitions remaining (not scheduled in this sector)
         all_competitions = Competition.objects.all()
@@ -181,10 +401,10 @@ def get_admin_dashboard_data(request):
             })
 
         # Total stages in this sector
-        total_stages = Stage.objects.filter(sector=sector).count()
+        total_stages = len(topology['stages'])
 
         # Total units in this sector
-        total_units = Unit.objects.filter(sector=sector).count()
+        total_units = len(topology['units'])
 
         dashboard_data = {
             'total_remaining_competitions': total_remaining,
@@ -236,14 +456,11 @@ def get_units(request):
     if not sector_id:
         return Response({'error': 'Sector ID is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        sector = Sector.objects.get(id=sector_id)
-    except Sector.DoesNotExist:
+    topology = get_sector_topology(sector_id)
+    if topology is None:
         return Response({'error': 'Sector not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    units = sector.units.all()
-    unit_list = [{'id': str(unit.id), 'name': unit.name, 'email': unit.user.email} for unit in units]
-    return Response({'units': unit_list}, status=status.HTTP_200_OK)
+    return Response({'units': topology['units']}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -253,15 +470,11 @@ def get_stages(request):
     if not sector_id:
         return Response({'error': 'Sector ID is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        sector = Sector.objects.get(id=sector_id)
-    except Sector.DoesNotExist:
+    topology = get_sector_topology(sector_id)
+    if topology is None:
         return Response({'error': 'Sector not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    stages = sector.stages.all()
-    stage_list = [{'id': str(stage.id), 'name': stage.name, 'email': stage.user.email} for stage in stages]
-
-    return Response({'stages': stage_list}, status=status.HTTP_200_OK)
+    return Response({'stages': topology['stages']}, status=status.HTTP_200_OK)
 
 
 
@@ -270,8 +483,7 @@ def get_stages(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_categories(request):
-    categories = Category.objects.all()
-    data = [{'id': str(category.id), 'name': category.name} for category in categories]
+    data = catalog_registry.current().categories()
     return Response({'categories': data}, status=status.HTTP_200_OK)
 
 
@@ -282,14 +494,18 @@ def get_competitions_by_category(request):
     category_id = request.GET.get('category_id')
     if not category_id:
         return Response({'error': 'category_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-
     try:
-        category = Category.objects.get(id=category_id)
-    except Category.DoesNotExist:
+        # The catalog is keyed by canonical UUID strings
+        category_id = str(uuid.UUID(category_id))
+    except ValueError:
+        return Response({'error': f'Invalid category_id: {category_id}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    catalog = catalog_registry.current()
+    if catalog.category(category_id) is None:
         return Response({'error': 'Category not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    competitions = category.competition_set.all()
-    data = [{'id': str(comp.id), 'name': comp.name} for comp in competitions]
+    competitions = catalog.competitions_in_category(category_id)
+    data = [{'id': comp['id'], 'name': comp['name']} for comp in competitions]
     return Response({'competitions': data}, status=status.HTTP_200_OK)
 
 
@@ -304,32 +520,159 @@ def get_unscheduled_competitions(request,category_id):
         return Response({"error": "category_id is required as a query parameter"}, status=status.HTTP_400_BAD_REQUEST)
 
     # All competitions in this category
-    competitions = Competition.objects.filter(category_id=category_id)
+    competitions = catalog_registry.current().competitions_in_category(category_id)
 
     # Already scheduled competitions for this sector
-    scheduled_ids = ScheduledCompetition.objects.filter(sector_id=sector_id).values_list('competition_id', flat=True)
-    print(f"Scheduled competition IDs: {scheduled_ids}")
+    scheduled_ids = set(
+        str(competition_id) for competition_id in
+        ScheduledCompetition.objects.filter(sector_id=sector_id).values_list('competition_id', flat=True)
+    )
 
     # Filter unscheduled competitions
-    unscheduled = competitions.exclude(id__in=scheduled_ids)
-    print(f"Unscheduled competitions: {unscheduled}")
-
-    # Manually serialize the required fields
-    data = [
-        {
-            "id": comp.id,
-            "name": comp.name,
-            "category": {
-                "id": comp.category.id,
-                "name": comp.category.name
-            }
-        }
-        for comp in unscheduled
-    ]
+    data = [comp for comp in competitions if comp['id'] not in scheduled_ids]
 
     return Response({"unscheduled_competitions": data}, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generate_sector_schedule(request):
+    """
+    Admin-only view to place the sector's unscheduled competitions on its
+    stages automatically (see sahityo_core/schedule_solver.py).
+    Body:
+        days: [{"date": "2025-08-01", "start": <UTC ISO>, "end": <UTC ISO>}, ...]
+        stage_ids (optional, default all stages of the sector)
+        durations (optional): {competition_id: minutes}
+        default_duration_minutes (default 60), reporting_lead_minutes (default 30),
+        changeover_minutes (default 0)
+        commit (default false): save the plan instead of only previewing it
+    """
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    sector_id = request.query_params.get('sector_id')
+    if not sector_id:
+        return Response({'error': 'sector_id is required as a query parameter'}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = request.data
+    try:
+        days = [
+            (datetime.strptime(day['date'], '%Y-%m-%d').date(), parse_utc_datetime(day['start']), parse_utc_datetime(day['end']))
+            for day in data.get('days') or []
+        ]
+        durations = {
+            str(competition_id): timedelta(minutes=int(minutes))
+            for competition_id, minutes in (data.get('durations') or {}).items()
+        }
+        default_duration = timedelta(minutes=int(data.get('default_duration_minutes', 60)))
+        reporting_lead = timedelta(minutes=int(data.get('reporting_lead_minutes', 30)))
+        changeover = timedelta(minutes=int(data.get('changeover_minutes', 0)))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return Response({'error': 'Invalid days, durations or minutes'}, status=status.HTTP_400_BAD_REQUEST)
+    # A date listed twice would be filled twice over; keep its first window
+    first_windows = {}
+    for date, start, end in days:
+        first_windows.setdefault(date, (date, start, end))
+    days = list(first_windows.values())
+    if not days or any(start >= end for date, start, end in days):
+        return Response({'error': 'days must be a non-empty list of windows with start before end'}, status=status.HTTP_400_BAD_REQUEST)
+    if any(duration <= timedelta(0) for duration in [default_duration, *durations.values()]):
+        return Response({'error': 'Durations must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        topology = get_sector_topology(sector_id)
+        if topology is None:
+            return Response({'error': 'Sector not found'}, status=status.HTTP_404_NOT_FOUND)
+        stage_ids = [stage['id'] for stage in topology['stages']]
+        if data.get('stage_ids'):
+            requested = [str(stage_id) for stage_id in data['stage_ids']]
+            if not set(requested) <= set(stage_ids):
+                return Response({'error': 'Stage not found in this sector'}, status=status.HTTP_404_NOT_FOUND)
+            stage_ids = requested
+
+        catalog = catalog_registry.current()
+        day_index = {date: index for index, (date, start, end) in enumerate(days)}
+
+        existing = ScheduledCompetition.objects.filter(sector_id=sector_id).values_list(
+            'stage_id', 'date', 'start_time', 'end_time', 'competition_id'
+        )
+        with transaction.atomic():
+            if data.get('commit'):
+                # Generations of the same sector run one at a time
+                Sector.objects.select_for_update().filter(id=sector_id).exists()
+            # One query for the sector's existing schedule
+            scheduled_ids = set()
+            busy = []
+            rows = list(existing)
+            for stage_id, date, start, end, competition_id in rows:
+                scheduled_ids.add(str(competition_id))
+                if date in day_index:
+                    # Missing from a catalog not yet reloaded after an edit
+                    competition = catalog.competition(competition_id)
+                    category = competition['category']['id'] if competition else None
+                    busy.append((str(stage_id), day_index[date], start, end, category))
+
+            unscheduled = {
+                competition['id']: competition
+                for competition in catalog.competitions() if competition['id'] not in scheduled_ids
+            }
+            items = [
+                (competition_id, competition['category']['id'], durations.get(competition_id, default_duration))
+                for competition_id, competition in unscheduled.items()
+            ]
+            plan = solve(
+                items, stage_ids, [(start, end) for date, start, end in days], busy,
+                changeover=changeover, time_budget=settings.SCHEDULE_SOLVER_TIME_BUDGET,
+            )
+
+            placements = sorted(plan.placements.items(), key=lambda placement: (placement[1][1], placement[1][2], placement[1][0]))
+            scheduled = [
+                ScheduledCompetition(
+                    id=uuid.uuid4(),
+                    competition_id=competition_id,
+                    sector_id=sector_id,
+                    stage_id=stage_id,
+                    date=days[day][0],
+                    reporting_time=start - reporting_lead,
+                    start_time=start,
+                    end_time=end,
+                )
+                for competition_id, (stage_id, day, start, end) in placements
+            ]
+
+            committed = bool(data.get('commit')) and bool(scheduled)
+            if committed:
+                # bulk_create skips save(): the plan is overlap free as long
+                # as the schedule it was computed from still holds, so a
+                # manual write that landed meanwhile aborts the commit.
+                # Presence rows are added set-based afterwards.
+                if set(existing.all()) != set(rows):
+                    raise IntegrityError('The sector schedule changed while the plan was computed')
+                ScheduledCompetition.objects.bulk_create(scheduled)
+                backfill_presence(sector_id)
+                send_schedule_changed_on_commit('generated', sector_id, ids=[competition.id for competition in scheduled])
+
+        return Response({
+            'committed': committed,
+            'days_used': plan.days_used,
+            'scheduled_competitions': [{
+                'id': str(competition.id) if committed else None,
+                'competition': catalog.competition(competition.competition_id),
+                'stage_id': competition.stage_id,
+                'date': competition.date.isoformat(),
+                'reporting_time': competition.reporting_time.isoformat(),
+                'start_time': competition.start_time.isoformat(),
+                'end_time': competition.end_time.isoformat(),
+            } for competition in scheduled],
+            'unplaced_competitions': [unscheduled[competition_id] for competition_id in plan.unplaced],
+        }, status=status.HTTP_201_CREATED if committed else status.HTTP_200_OK)
+    except IntegrityError:
+        return Response({'error': 'Conflict: the schedule changed while generating, try again.'}, status=status.HTTP_409_CONFLICT)
+    except Exception as e:
+        print(traceback.format_exc())
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_scheduled_competition(request, stage_id):
@@ -343,6 +686,10 @@ def create_scheduled_competition(request, stage_id):
     for field in required_fields:
         if field not in data:
             return Response({'error': f'{field} is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        unit_ids = requested_unit_ids(data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
         sector = Sector.objects.get(id=sector_id)
@@ -351,9 +698,9 @@ def create_scheduled_competition(request, stage_id):
 
         # Always assuming frontend sent valid UTC strings
         date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-        reporting_time = datetime.fromisoformat(data['reporting_time'].replace("Z", "+00:00"))
-        start_time = datetime.fromisoformat(data['start_time'].replace("Z", "+00:00"))
-        end_time = datetime.fromisoformat(data['end_time'].replace("Z", "+00:00"))
+        reporting_time = parse_utc_datetime(data['reporting_time'])
+        start_time = parse_utc_datetime(data['start_time'])
+        end_time = parse_utc_datetime(data['end_time'])
 
         overlapping = ScheduledCompetition.objects.filter(
             stage=stage,
@@ -365,6 +712,11 @@ def create_scheduled_competition(request, stage_id):
         if overlapping.exists():
             return Response({'error': 'Conflict: another competition exists in this time range.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Only the units named as entering are checked for clashes
+        clashes = {}
+        if unit_ids:
+            clashes = get_clash_index(sector.id, date).clashes_for(str(stage.id), start_time, end_time, unit_ids)
+
         scheduled = ScheduledCompetition.objects.create(
             id=uuid.uuid4(),
             competition=competition,
@@ -376,7 +728,11 @@ def create_scheduled_competition(request, stage_id):
             end_time=end_time,
         )
 
-        return Response({'message': 'Scheduled competition created', 'id': str(scheduled.id)}, status=status.HTTP_201_CREATED)
+        return Response({
+            'message': 'Scheduled competition created',
+            'id': str(scheduled.id),
+            **clash_check_fields(clashes, unit_ids),
+        }, status=status.HTTP_201_CREATED)
 
     except (Sector.DoesNotExist, Stage.DoesNotExist, Competition.DoesNotExist) as e:
         return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
@@ -407,6 +763,7 @@ def delete_scheduled_competition(request, scheduled_competition_id):
     
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@fast_json(compact=True)
 def scheduled_competitions_by_stage_date(request, stage_id):
     date_str = request.query_params.get('date')
     
@@ -418,32 +775,63 @@ def scheduled_competitions_by_stage_date(request, stage_id):
     except ValueError:
         return Response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    competitions = ScheduledCompetition.objects.filter(stage_id=stage_id, date=date)
+    try:
+        fields = FieldSelection.from_request(request, STAGE_SCHEDULE_FIELDS)
+    except InvalidFields as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    data = []
-    
-    for sc in competitions:
-        data.append({
-            'id': str(sc.id),
-            'competition': {
-                'id': str(sc.competition.id),
-                'name': sc.competition.name,
-                'category': {
-                    'id': str(sc.competition.category.id),
-                    'name': sc.competition.category.name,
-                }
-            },
-            'sector': {
-                'id': str(sc.sector.id),
-                'name': sc.sector.name,
-            },
-            'reporting_time': sc.reporting_time,
-            'start_time': sc.start_time,
-            'end_time': sc.end_time,
-            'status': sc.status,
-        })
+    def build():
+        competitions = ScheduledCompetition.objects.filter(stage_id=stage_id, date=date)
+        catalog = catalog_registry.current()
 
-    return Response({'scheduled_competitions': data}, status=status.HTTP_200_OK)
+        if wants_compact(request):
+            competitions = competitions.select_related('sector').only(
+                'id', 'competition_id', 'sector__id', 'sector__name', 'reporting_time', 'start_time', 'end_time', 'status'
+            )
+            table = CompactTable(['id', 'competition', 'sector', 'reporting_time', 'start_time', 'end_time', 'status'])
+            for sc in competitions:
+                table.add(
+                    str(sc.id),
+                    table.competition_ref(catalog.competition(sc.competition_id)),
+                    table.ref('sectors', sc.sector.id, sc.sector.name),
+                    epoch(sc.reporting_time),
+                    epoch(sc.start_time),
+                    epoch(sc.end_time),
+                    sc.status,
+                )
+            return table.as_data()
+
+        columns = fields.columns(SCHEDULE_COLUMNS, always=['id'])
+        if 'sector' in fields:
+            competitions = competitions.select_related('sector')
+            columns += ['sector__id', 'sector__name']
+        competitions = competitions.only(*columns)
+
+        data = []
+
+        for sc in competitions:
+            data.append(fields.pick({
+                'id': lambda: str(sc.id),
+                'competition': lambda: catalog.competition(sc.competition_id),
+                'sector': lambda: {
+                    'id': str(sc.sector.id),
+                    'name': sc.sector.name,
+                },
+                'reporting_time': lambda: sc.reporting_time,
+                'start_time': lambda: sc.start_time,
+                'end_time': lambda: sc.end_time,
+                'status': lambda: sc.status,
+            }))
+        return {'scheduled_competitions': data}
+
+    # Identical for every caller, so the rendered bytes are cached per stage and date
+    return cached_render(
+        request,
+        f'stage-schedule:{stage_id}:{date}:{fields.cache_key()}',
+        [stage_tag(stage_id), CATALOG],
+        build,
+        settings.SCHEDULE_CACHE_TIMEOUT,
+    )
 
 
 @api_view(['PATCH'])
@@ -454,33 +842,26 @@ def update_scheduled_competition_status(request, scheduled_competition_id):
 
     if new_status not in dict(ScheduledCompetition.STATUS_CHOICES):
         return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        version = parse_version(request.data.get('version'))
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid version'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
         competition = ScheduledCompetition.objects.get(id=scheduled_competition_id)
 
-        # Manual validation for unique 'ongoing' and 'reporting' statuses per stage per date
-        if new_status in ['ongoing', 'reporting']:
-            exists = ScheduledCompetition.objects.filter(
-                stage=competition.stage,
-                date=competition.date,
-                status=new_status
-            ).exclude(id=competition.id).exists()
-
-            if exists:
-                return Response(
-                    {'error': f'Another competition with status "{new_status}" already exists for this stage and date.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        if new_status == "not_started":
-                presents_to_delete = ParticipantPresent.objects.filter(
-                    scheduled_competition=competitionx
-                )
-                presents_to_delete.delete()
-        # Update status
-        competition.status = new_status
-        competition.save(update_fields=['status'])
-        return Response({'message': 'Status updated successfully'}, status=status.HTTP_200_OK)
+        # Enforces unique 'ongoing' and 'reporting' statuses per stage per date,
+        # clears presence on a reset to 'not_started' and records the transition
+        try:
+            transition_status(competition, new_status, expected_version=version)
+        except TransitionBlocked as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except VersionConflict as e:
+            return version_conflict_response(e, scheduled_competition_state)
+        return Response({
+            'message': 'Status updated successfully',
+            'version': competition.version,
+        }, status=status.HTTP_200_OK)
 
     except ScheduledCompetition.DoesNotExist:
         return Response({'error': 'Scheduled competition not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -491,68 +872,91 @@ def update_scheduled_competition_status(request, scheduled_competition_id):
     
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@fast_json
+def get_stage_eta_predictions(request, stage_id):
+    """
+    Predicted reporting and start times of the stage's upcoming competitions
+    for a date (?date=YYYY-MM-DD), from the stage's drift so far that day.
+    """
+    date_str = request.query_params.get('date')
+    if not date_str:
+        return Response({'error': 'Date is required (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        data = get_stage_etas(stage_id, date)
+        catalog = catalog_registry.current()
+        etas = []
+        for eta in data['etas']:
+            eta = dict(eta)
+            eta['competition'] = catalog.competition(eta.pop('competition_id'))
+            etas.append(eta)
+        data['etas'] = etas
+        return Response(data, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@fast_json
 def scheduled_competition_detail(request, scheduled_competition_id):
     """
     Retrieve detailed information for a ScheduledCompetition by ID.
-    If participants do not exist, create them for all units in the sector.
+    Units without a presence row are listed with id None and nothing marked.
     """
     try:
-        competition = ScheduledCompetition.objects.get(id=scheduled_competition_id)
-        
-        # If no participants exist, create them for all units in the sector
-        if not competition.participants.exists():
-            units = Unit.objects.filter(sector=competition.sector)
-            participant_records = []
-            for unit in units:
-                participant_records.append(
-                    ParticipantPresent(
-                        scheduled_competition=competition,
-                        unit=unit,
-                        participant_1_present=False,
-                        participant_2_present=False
-                    )
-                )
-            ParticipantPresent.objects.bulk_create(participant_records)
-        
-        # Construct the response data manually
-        response_data = {
-            'id': str(competition.id),
-            'competition': {
-                'id': str(competition.competition.id),
-                'name': competition.competition.name,
-                'category': {
-                    'id': str(competition.competition.category.id),
-                    'name': competition.competition.category.name
-                }
-            },
-            'sector': {
-                'id': str(competition.sector.id),
-                'name': competition.sector.name
-            },
-            'reporting_time': competition.reporting_time.isoformat(),
-            'date': competition.date.isoformat() if competition.date else None,
-            'start_time': competition.start_time.isoformat(),
-            'end_time': competition.end_time.isoformat(),
-            'status': competition.status,
-            'participants': [
-                {
-                    'id': str(participant.id),
-                    'unit': {
-                        'id': str(participant.unit.id),
-                        'name': participant.unit.name
-                    },
-                    'participant_1_present': participant.participant_1_present,
-                    'participant_2_present': participant.participant_2_present,
-                    'created_at': participant.created_at.isoformat(),
-                    'updated_at': participant.updated_at.isoformat()
-                }
-                for participant in competition.participants.all()
-            ]
-        }
+        fields = FieldSelection.from_request(request, SCHEDULED_COMPETITION_DETAIL_FIELDS)
+    except InvalidFields as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        details = build_scheduled_competition_details([scheduled_competition_id], fields)
+        if str(scheduled_competition_id) not in details:
+            return Response({'error': 'Competition not found'}, status=status.HTTP_404_NOT_FOUND)
+        response_data = details[str(scheduled_competition_id)]
         
         return Response({'scheduled_competition_details': response_data}, status=status.HTTP_200_OK)
-    except ScheduledCompetition.DoesNotExist:
-        return Response({'error': 'Competition not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@fast_json
+def scheduled_competitions_detail_batch(request):
+    """
+    Retrieve details for several ScheduledCompetitions at once:
+    ?ids=<uuid>,<uuid>,... (up to MAX_BATCH_IDS). Details come back in the
+    order asked for; ids that do not exist are listed under 'not_found'.
+    """
+    try:
+        fields = FieldSelection.from_request(request, SCHEDULED_COMPETITION_DETAIL_FIELDS)
+    except InvalidFields as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    raw_ids = [part.strip() for part in request.query_params.get('ids', '').split(',') if part.strip()]
+    if not raw_ids:
+        return Response({'error': 'ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(raw_ids) > MAX_BATCH_IDS:
+        return Response({'error': f'At most {MAX_BATCH_IDS} ids are allowed'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = []
+    for raw_id in raw_ids:
+        try:
+            ids.append(str(uuid.UUID(raw_id)))
+        except ValueError:
+            return Response({'error': f'Invalid id in ids: {raw_id}'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = list(dict.fromkeys(ids))
+
+    try:
+        details = build_scheduled_competition_details(ids, fields)
+        return Response({
+            'scheduled_competition_details': [details[id] for id in ids if id in details],
+            'not_found': [id for id in ids if id not in details],
+        }, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -561,48 +965,103 @@ def scheduled_competition_detail(request, scheduled_competition_id):
 def update_participant_presence(request, participant_present_id):
     """
     Update participant presence for a ParticipantPresent entry by ID.
+    Only the flags sent are written; send the version read to have the
+    update rejected with 409 if the entry changed since. With
+    PRESENCE_WRITE_BEHIND on, unversioned updates are queued (202).
     """
     try:
-        participant = ParticipantPresent.objects.get(id=participant_present_id)
-        
-        # Get data from request body
-        data = request.data
-        participant_1_present = data.get('participant_1_present', participant.participant_1_present)
-        participant_2_present = data.get('participant_2_present', participant.participant_2_present)
-        
-        # Update only provided fields
-        if 'participant_1_present' in data:
-            participant.participant_1_present = participant_1_present
-        if 'participant_2_present' in data:
-            participant.participant_2_present = participant_2_present
+        version = parse_version(request.data.get('version'))
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid version'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        changes = clean_presence_changes(
+            {field: request.data[field] for field in PRESENCE_FIELDS if field in request.data}
+        )
+    except ValidationError as e:
+        return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        participant = ParticipantPresent.objects.select_related('unit', 'scheduled_competition').get(
+            id=participant_present_id
+        )
         
         # Save the updated participant
-        participant.save()
-        
-        # Construct the response data
-        response_data = {
-            'id': str(participant.id),
-            'unit': {
-                'id': str(participant.unit.id),
-                'name': participant.unit.name
-            },
-            'participant_1_present': participant.participant_1_present,
-            'participant_2_present': participant.participant_2_present,
-            'created_at': participant.created_at.isoformat(),
-            'updated_at': participant.updated_at.isoformat()
-        }
+        try:
+            queued = write_presence(participant, participant.scheduled_competition.sector_id, changes, version)
+        except VersionConflict as e:
+            return version_conflict_response(e, lambda current: participant_presence_data(current, participant.unit))
         
-        return Response(response_data, status=status.HTTP_200_OK)
+        return Response(
+            participant_presence_data(participant, participant.unit),
+            status=status.HTTP_202_ACCEPTED if queued else status.HTTP_200_OK
+        )
     except ParticipantPresent.DoesNotExist:
         return Response({'error': 'Participant not found'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated])
+def mark_participant_presence(request, scheduled_competition_id, unit_id):
+    """
+    Update participant presence of a unit for a ScheduledCompetition,
+    creating the ParticipantPresent entry on first mark. As with
+    update_participant_presence, a version sent makes the update conditional
+    and updates of existing entries may be queued.
+    """
+    try:
+        version = parse_version(request.data.get('version'))
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid version'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        changes = clean_presence_changes(
+            {field: request.data[field] for field in PRESENCE_FIELDS if field in request.data}
+        )
+    except ValidationError as e:
+        return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        competition = ScheduledCompetition.objects.only('id', 'sector_id').get(id=scheduled_competition_id)
+        unit = Unit.objects.only('id', 'name', 'sector_id').get(id=unit_id)
+        if unit.sector_id != competition.sector_id:
+            return Response({'error': 'Unit does not belong to the competition sector'}, status=status.HTTP_400_BAD_REQUEST)
+
+        participant, created = ParticipantPresent.objects.get_or_create(
+            scheduled_competition=competition,
+            unit=unit,
+            defaults={
+                'participant_1_present': changes.get('participant_1_present', False),
+                'participant_2_present': changes.get('participant_2_present', False),
+            }
+        )
+        queued = False
+        if created:
+            invalidate_presence_on_commit([competition.sector_id], [unit.id])
+        else:
+            try:
+                queued = write_presence(participant, competition.sector_id, changes, version)
+            except VersionConflict as e:
+                return version_conflict_response(e, lambda current: participant_presence_data(current, unit))
+
+        response_data = participant_presence_data(participant, unit)
+
+        if created:
+            return Response(response_data, status=status.HTTP_201_CREATED)
+        return Response(response_data, status=status.HTTP_202_ACCEPTED if queued else status.HTTP_200_OK)
+    except ScheduledCompetition.DoesNotExist:
+        return Response({'error': 'Competition not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Unit.DoesNotExist:
+        return Response({'error': 'Unit not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@fast_json
 def get_stages_with_competition_details(request, unit_id, date):
     try:
         sector_id = request.query_params.get('sector_id')
@@ -618,86 +1077,13 @@ def get_stages_with_competition_details(request, unit_id, date):
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
 
-        stages = Stage.objects.filter(sector_id=sector_id)
-        if not stages.exists():
+        topology = get_sector_topology(sector_id)
+        if not (topology and topology['stages']):
             return Response({"error": "No stages found for the given sector"}, status=status.HTTP_404_NOT_FOUND)
 
-        response_data = []
-
-        for stage in stages:
-            stage_data = {
-                "id": str(stage.id),
-                "name": stage.name,
-                "ongoing_competition": None,
-                "reporting_competition": None,
-                "reporting_time": None,
-                "date": None,
-                "start_time": None,
-                "end_time": None
-            }
-
-            scheduled_competitions = ScheduledCompetition.objects.filter(
-                stage=stage,
-                date=date
-            ).select_related('competition__category', 'sector')
-
-            # Ongoing competition
-            ongoing = scheduled_competitions.filter(status='ongoing').first()
-            if ongoing:
-                presence = ParticipantPresent.objects.filter(
-                    scheduled_competition=ongoing,
-                    unit_id=unit_id
-                ).first()
-
-                stage_data["ongoing_competition"] = {
-                    "id": str(ongoing.id),
-                    "name": ongoing.competition.name,
-                    "category": {
-                        "id": str(ongoing.competition.category.id),
-                        "name": ongoing.competition.category.name
-                    },
-                    "status": ongoing.status,
-                    "start_time": ongoing.start_time.isoformat(),
-                    "end_time": ongoing.end_time.isoformat(),
-                    "is_your_first_candidate_present": presence.participant_1_present if presence else False,
-                    "is_your_second_candidate_present": presence.participant_2_present if presence else False
-                }
-
-                stage_data["reporting_time"] = ongoing.reporting_time.isoformat()
-                stage_data["date"] = ongoing.date.isoformat()
-                stage_data["start_time"] = ongoing.start_time.isoformat()
-                stage_data["end_time"] = ongoing.end_time.isoformat()
-
-            # Reporting competition
-            reporting = scheduled_competitions.filter(status='reporting').first()
-            if reporting:
-                presence = ParticipantPresent.objects.filter(
-                    scheduled_competition=reporting,
-                    unit_id=unit_id
-                ).first()
-
-                stage_data["reporting_competition"] = {
-                    "id": str(reporting.id),
-                    "name": reporting.competition.name,
-                    "category": {
-                        "id": str(reporting.competition.category.id),
-                        "name": reporting.competition.category.name
-                    },
-                    "status": reporting.status,
-                    "reporting_time": reporting.reporting_time.isoformat(),
-                    "start_time": reporting.start_time.isoformat(),
-                    "end_time": reporting.end_time.isoformat(),
-                    "is_your_first_candidate_present": presence.participant_1_present if presence else False,
-                    "is_your_second_candidate_present": presence.participant_2_present if presence else False
-                }
-
-                if not stage_data["reporting_time"]:
-                    stage_data["reporting_time"] = reporting.reporting_time.isoformat()
-                    stage_data["date"] = reporting.date.isoformat()
-                    stage_data["start_time"] = reporting.start_time.isoformat()
-                    stage_data["end_time"] = reporting.end_time.isoformat()
-
-            response_data.append(stage_data)
+        # One board per sector and date is shared by every unit polling it
+        board = get_live_board(sector_id, date)
+        response_data = unit_live_board(board, unit_id)
 
         return Response(response_data, status=status.HTTP_200_OK)
 
@@ -713,7 +1099,18 @@ def get_stages_with_competition_details(request, unit_id, date):
 def update_scheduled_competition_times(request, scheduled_competition_id):
     """
     Update reporting_time, start_time, and end_time for a ScheduledCompetition.
+    Send the version read to have the update rejected with 409 if the
+    competition changed since.
     """
+    try:
+        version = parse_version(request.data.get('version'))
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid version'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        unit_ids = requested_unit_ids(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
         competition = ScheduledCompetition.objects.get(id=scheduled_competition_id)
         data = request.data
@@ -726,14 +1123,28 @@ def update_scheduled_competition_times(request, scheduled_competition_id):
             return Response({'error': 'reporting_time, start_time, and end_time are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Parse UTC ISO datetime strings
-        competition.reporting_time = datetime.fromisoformat(reporting_time.replace("Z", "+00:00"))
-        competition.start_time = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-        competition.end_time = datetime.fromisoformat(end_time.replace("Z", "+00:00"))
+        competition.reporting_time = parse_utc_datetime(reporting_time)
+        competition.start_time = parse_utc_datetime(start_time)
+        competition.end_time = parse_utc_datetime(end_time)
+
+        index = get_clash_index(competition.sector_id, competition.date)
+        # Units marked present for it, and those named as entering
+        unit_ids = index.units[str(competition.id)] | set(unit_ids)
+        clashes = index.clashes_for(
+            str(competition.stage_id), competition.start_time, competition.end_time, unit_ids, exclude=str(competition.id),
+        )
 
         # Save updated times
-        competition.save()
+        try:
+            save_versioned(competition, ['reporting_time', 'start_time', 'end_time'], version, clean=True)
+        except VersionConflict as e:
+            return version_conflict_response(e, scheduled_competition_state)
 
-        return Response({'message': 'Scheduled competition times updated successfully.'}, status=status.HTTP_200_OK)
+        return Response({
+            'message': 'Scheduled competition times updated successfully.',
+            'version': competition.version,
+            **clash_check_fields(clashes, unit_ids),
+        }, status=status.HTTP_200_OK)
 
     except ScheduledCompetition.DoesNotExist:
         return Response({'error': 'Scheduled competition not found.'}, status=status.HTTP_404_NOT_FOUND)
@@ -744,12 +1155,140 @@ def update_scheduled_competition_times(request, scheduled_competition_id):
 
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def shift_stage_schedule(request, stage_id):
+    """
+    Move every not-started ScheduledCompetition on a stage and date that
+    starts at or after `after` by `delta_minutes` (negative to pull earlier).
+    The whole new timeline of the day is validated once, then the
+    competitions are moved with a single UPDATE.
+    """
+    data = request.data
+    for field in ['date', 'after', 'delta_minutes']:
+        if field not in data:
+            return Response({'error': f'{field} is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        after = parse_utc_datetime(data['after'])
+        delta = timedelta(minutes=int(data['delta_minutes']))
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid date, after or delta_minutes'}, status=status.HTTP_400_BAD_REQUEST)
+    if not delta:
+        return Response({'error': 'delta_minutes must not be zero'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        stage = Stage.objects.only('id', 'sector_id').get(id=stage_id)
+        with transaction.atomic():
+            day = list(
+                ScheduledCompetition.objects.select_for_update()
+                .filter(stage=stage, date=date)
+                .values_list('id', 'status', 'start_time', 'end_time')
+            )
+            moved_ids = [id for id, state, start, end in day if state == 'not_started' and start >= after]
+            if not moved_ids:
+                return Response({'error': 'No not-started competitions to shift'}, status=status.HTTP_404_NOT_FOUND)
+
+            moved = set(moved_ids)
+            timeline = [
+                (start + delta, end + delta, str(id)) if id in moved else (start, end, str(id))
+                for id, state, start, end in day
+            ]
+            overlaps = find_overlaps(timeline)
+            if overlaps:
+                return Response({
+                    'error': 'Conflict: the shifted schedule overlaps other competitions.',
+                    'conflicts': [list(pair) for pair in overlaps],
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            ScheduledCompetition.objects.filter(id__in=moved_ids).update(
+                reporting_time=F('reporting_time') + delta,
+                start_time=F('start_time') + delta,
+                end_time=F('end_time') + delta,
+                version=F('version') + 1,
+            )
+            send_schedule_changed_on_commit('shifted', stage.sector_id, stage.id, date, moved_ids)
+
+        return Response({
+            'message': 'Scheduled competitions shifted successfully.',
+            'shifted': [str(id) for id in moved_ids],
+        }, status=status.HTTP_200_OK)
+    except Stage.DoesNotExist:
+        return Response({'error': 'Stage not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        print(traceback.format_exc())
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_free_slots(request):
+    """
+    Free intervals of at least min_duration_minutes on the sector's stages
+    for a date (?sector_id=...&date=YYYY-MM-DD&min_duration_minutes=30).
+    Optional: stage_id to look at one stage, and from/to (UTC ISO) to narrow
+    the window, which is otherwise the whole date.
+    """
+    sector_id = request.query_params.get('sector_id')
+    stage_id = request.query_params.get('stage_id')
+    date_str = request.query_params.get('date')
+    if not sector_id or not date_str:
+        return Response({'error': 'sector_id and date are required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        min_duration = timedelta(minutes=int(request.query_params.get('min_duration_minutes', 1)))
+        day_start = timezone.make_aware(datetime.combine(date, datetime.min.time()))
+        window_start = request.query_params.get('from')
+        window_end = request.query_params.get('to')
+        window_start = parse_utc_datetime(window_start) if window_start else day_start
+        window_end = parse_utc_datetime(window_end) if window_end else day_start + timedelta(days=1)
+    except ValueError:
+        return Response({'error': 'Invalid date, from, to or min_duration_minutes'}, status=status.HTTP_400_BAD_REQUEST)
+    if min_duration <= timedelta(0) or window_start >= window_end:
+        return Response({'error': 'min_duration_minutes must be positive and from before to'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        topology = get_sector_topology(sector_id)
+        if topology is None:
+            return Response({'error': 'Sector not found'}, status=status.HTTP_404_NOT_FOUND)
+        stages = topology['stages']
+        if stage_id:
+            stages = [stage for stage in stages if stage['id'] == str(stage_id)]
+            if not stages:
+                return Response({'error': 'Stage not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # One query for the day's busy intervals, swept per stage
+        competitions = ScheduledCompetition.objects.filter(
+            sector_id=sector_id, date=date, start_time__lt=window_end, end_time__gt=window_start,
+        )
+        if stage_id:
+            competitions = competitions.filter(stage_id=stage_id)
+        busy = {stage['id']: [] for stage in stages}
+        for competition_stage_id, start, end in competitions.order_by('start_time').values_list('stage_id', 'start_time', 'end_time'):
+            busy.setdefault(str(competition_stage_id), []).append((start, end, None))
+
+        data = [{
+            'stage': {'id': stage['id'], 'name': stage['name']},
+            'free_slots': [
+                {'start_time': start.isoformat(), 'end_time': end.isoformat()}
+                for start, end in free_slots(busy[stage['id']], window_start, window_end, min_duration)
+            ],
+        } for stage in stages]
+        return Response({'stages': data}, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def reset_sector_schedules_and_participants(request):
     """
     Admin-only view to delete ScheduledCompetition and ParticipantPresent records for a specific sector.
     Sector ID should be provided as a query parameter (?sector_id=...).
+    The deleted records are archived first and can be restored with the
+    restore_sector_schedule management command.
     """
     if request.user.role != 'admin':
         return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
@@ -757,14 +1296,13 @@ def reset_sector_schedules_and_participants(request):
     if not sector_id:
         return Response({'error': 'sector_id is required as a query parameter'}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        with transaction.atomic():
-            # Get scheduled competitions for the sector
-            scheduled_ids = ScheduledCompetition.objects.filter(sector_id=sector_id).values_list('id', flat=True)
-            # Delete related ParticipantPresent records
-            ParticipantPresent.objects.filter(scheduled_competition_id__in=scheduled_ids).delete()
-            # Delete ScheduledCompetition records
-            ScheduledCompetition.objects.filter(id__in=scheduled_ids).delete()
-        return Response({'message': 'Schedules and participant presence data for the sector have been reset.'}, status=status.HTTP_200_OK)
+        # Archived first, then deleted in short batches (see sahityo_core/schedule_reset.py)
+        archive_path, deleted = reset_sector_schedule(sector_id)
+        return Response({
+            'message': 'Schedules and participant presence data for the sector have been reset.',
+            'deleted_scheduled_competitions': deleted,
+            'archive': os.path.basename(archive_path),
+        }, status=status.HTTP_200_OK)
     except Exception as e:
         print(traceback.format_exc())
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -775,6 +1313,53 @@ def reset_sector_schedules_and_participants(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def get_sector_integrity_report(request):
+    """
+    Admin-only view listing schedule conflicts and presence inconsistencies
+    of a sector (?sector_id=...); see sahityo_core/integrity.py.
+    """
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    sector_id = request.query_params.get('sector_id')
+    if not sector_id:
+        return Response({'error': 'sector_id is required as a query parameter'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        if not Sector.objects.filter(id=sector_id).exists():
+            return Response({'error': 'Sector not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(sector_integrity_report(sector_id), status=status.HTTP_200_OK)
+    except Exception as e:
+        print(traceback.format_exc())
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_sector_clash_report(request):
+    """
+    Units booked on two stages at overlapping times in a sector
+    (?sector_id=..., optional date=YYYY-MM-DD).
+    """
+    sector_id = request.query_params.get('sector_id')
+    date_str = request.query_params.get('date')
+    if not sector_id:
+        return Response({'error': 'sector_id is required as a query parameter'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else None
+    except ValueError:
+        return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        if get_sector_topology(sector_id) is None:
+            return Response({'error': 'Sector not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'clashes': get_clash_index(sector_id, date).all_clashes()}, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@fast_json(compact=True)
 def get_stage_competitions_for_unit(request, stage_id,unit_id):
     
     sector_id = request.query_params.get('sector_id')
@@ -787,6 +1372,15 @@ def get_stage_competitions_for_unit(request, stage_id,unit_id):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # The compact format always carries every column
+    fields = FieldSelection(UNIT_STAGE_COMPETITION_FIELDS)
+    if not wants_compact(request):
+        try:
+            fields = FieldSelection.from_request(request, UNIT_STAGE_COMPETITION_FIELDS)
+        except InvalidFields as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    wants_presence = 'participant1_present_status' in fields or 'participant2_present_status' in fields
+
     try:
         # Fetch scheduled competitions for the given stage and sector
         
@@ -794,7 +1388,12 @@ def get_stage_competitions_for_unit(request, stage_id,unit_id):
         scheduled_competitions = ScheduledCompetition.objects.filter(
             stage_id=stage_id,
             sector_id=sector_id
-        ).select_related('competition', 'competition__category', 'stage', 'sector')
+        ).only(*fields.columns({
+            **SCHEDULE_COLUMNS,
+            'name': ['competition_id'],
+            'category': ['competition_id'],
+        }, always=['id', 'status', 'reporting_time']))
+        catalog = catalog_registry.current()
 
         # Prepare response data
         response_data = {
@@ -807,45 +1406,67 @@ def get_stage_competitions_for_unit(request, stage_id,unit_id):
         if scheduled_competitions.exists():
             response_data['stage_name'] = stage.name
 
+        # The unit's presence for every competition of the stage, in one query
+        presence = {}
+        if wants_presence:
+            presence = {
+                str(competition_id): (participant1_present, participant2_present)
+                for competition_id, participant1_present, participant2_present in ParticipantPresent.objects.filter(
+                    scheduled_competition__stage_id=stage_id,
+                    scheduled_competition__sector_id=sector_id,
+                    unit_id=unit_id,
+                ).values_list('scheduled_competition_id', 'participant_1_present', 'participant_2_present')
+            }
+
         # Process each scheduled competition
+        rows = []
         for comp in scheduled_competitions:
-            # Fetch participant presence status for the given unit
-            try:
-                participant_status = ParticipantPresent.objects.get(
-                    scheduled_competition_id=comp.id,
-                    unit_id=unit_id
-                )
-                participant1_present = participant_status.participant_1_present
-                participant2_present = participant_status.participant_2_present
-            except ObjectDoesNotExist:
-                participant1_present = False
-                participant2_present = False
-
-            comp_data = {
-                'id': str(comp.id),
-                'name': comp.competition.name,
-                'category': {
-                    'id': str(comp.competition.category.id),
-                    'name': comp.competition.category.name
-                },
-                'participant1_present_status': participant1_present,
-                'participant2_present_status': participant2_present,
-                'reporting_time': comp.reporting_time.isoformat() if comp.reporting_time else None,
-                'date': comp.date.isoformat() if comp.date else None,
-                'start_time': comp.start_time.isoformat() if comp.start_time else None,
-                'end_time': comp.end_time.isoformat() if comp.end_time else None,
-                'status': comp.status
-            }
-            response_data['scheduled_competitions'].append(comp_data)
+            competition = catalog.competition(comp.competition_id)
+            if competition is None:
+                continue  # not in the catalog until it reloads after an edit
+            participant1_present, participant2_present = presence.get(str(comp.id), (False, False))
+            rows.append((comp, competition, participant1_present, participant2_present))
 
         # Sort competitions by status priority and time
         status_priority = {'reporting': 1, 'ongoing': 2, 'not_started': 3, 'finished': 4}
-        response_data['scheduled_competitions'].sort(
-            key=lambda x: (
-                status_priority.get(x['status'], 5),
-                x['reporting_time'] or datetime.datetime.max.isoformat()
+        rows.sort(key=lambda row: (status_priority.get(row[0].status, 5), row[0].reporting_time))
+
+        if wants_compact(request):
+            table = CompactTable([
+                'id', 'competition', 'participant1_present_status', 'participant2_present_status',
+                'reporting_time', 'date', 'start_time', 'end_time', 'status',
+            ])
+            for comp, competition, participant1_present, participant2_present in rows:
+                table.add(
+                    str(comp.id),
+                    table.competition_ref(competition),
+                    participant1_present,
+                    participant2_present,
+                    epoch(comp.reporting_time),
+                    comp.date.isoformat() if comp.date else None,
+                    epoch(comp.start_time),
+                    epoch(comp.end_time),
+                    comp.status,
+                )
+            return Response(
+                table.as_data(stage_id=str(stage_id), stage_name=response_data['stage_name']),
+                status=status.HTTP_200_OK
             )
-        )
+
+        for comp, competition, participant1_present, participant2_present in rows:
+            comp_data = fields.pick({
+                'id': lambda: str(comp.id),
+                'name': lambda: competition['name'],
+                'category': lambda: competition['category'],
+                'participant1_present_status': lambda: participant1_present,
+                'participant2_present_status': lambda: participant2_present,
+                'reporting_time': lambda: comp.reporting_time.isoformat() if comp.reporting_time else None,
+                'date': lambda: comp.date.isoformat() if comp.date else None,
+                'start_time': lambda: comp.start_time.isoformat() if comp.start_time else None,
+                'end_time': lambda: comp.end_time.isoformat() if comp.end_time else None,
+                'status': lambda: comp.status
+            })
+            response_data['scheduled_competitions'].append(comp_data)
 
         return Response(response_data, status=status.HTTP_200_OK)
 
@@ -853,4 +1474,36 @@ def get_stage_competitions_for_unit(request, stage_id,unit_id):
         return Response(
             {'error': f'Failed to fetch stage details: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_unit_itinerary(request, unit_id):
+    """
+    Every scheduled competition of the unit's sector across all stages and
+    dates, in date/time order, with the unit's presence flags
+    (?sector_id=...). Streamed; answers 304 while nothing has changed.
+    """
+    sector_id = request.query_params.get('sector_id')
+    if not sector_id:
+        return Response({'error': 'sector_id is required as a query parameter'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        topology = get_sector_topology(sector_id)
+        unit = next((unit for unit in topology['units'] if unit['id'] == str(unit_id)), None) if topology else None
+        if unit is None:
+            return Response({'error': 'Unit not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = itinerary_etag(sector_id, unit['id'])
+        if etag in (tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))):
+            response = HttpResponseNotModified()
+        else:
+            response = StreamingHttpResponse(
+                stream_itinerary(sector_id, unit, topology['stages'], catalog_registry.current()),
+                content_type='application/json',
+            )
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
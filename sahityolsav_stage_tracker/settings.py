@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "sahityo_core.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -131,10 +132,26 @@ SIMPLE_JWT = {
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+# MessagePack (application/msgpack) is offered when the msgpack package is installed.
+try:
+    import msgpack  # noqa: F401
+    MSGPACK_RENDERER_CLASSES = ['sahityo_core.renderers.MessagePackRenderer']
+    MSGPACK_PARSER_CLASSES = ['sahityo_core.renderers.MessagePackParser']
+except ImportError:
+    MSGPACK_RENDERER_CLASSES = []
+    MSGPACK_PARSER_CLASSES = []
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
+        *MSGPACK_RENDERER_CLASSES,
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        *MSGPACK_PARSER_CLASSES,
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -142,4 +159,73 @@ REST_FRAMEWORK = {
 }
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Publish-on-write static copies of the public-api documents (see sahityo_core/snapshots.py)
+PUBLIC_SNAPSHOTS_ENABLED = False
+PUBLIC_SNAPSHOTS_DIR = os.path.join(MEDIA_ROOT, 'public-api')
+
+# Category/Competition only change through explicit writes, which bump the
+# catalog version, so cached catalog bytes can live for a long time.
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Stages and units of a sector; invalidated whenever they are created or edited.
+TOPOLOGY_CACHE_TIMEOUT = 60 * 60
+
+# Response caches and their invalidation tags (sahityo_core/cache.py) live in
+# the default cache. Django's default LocMemCache is per process, which is
+# enough for a single runserver process. With several worker processes, or
+# with `manage.py run_status_timer` running on its own, every process must
+# share the cache or they miss each other's invalidations: set
+# SAHITYO_FILE_CACHE_DIR to a directory they share (or configure a shared
+# backend such as redis). FileBasedCache culls by scanning its directory and
+# its add() is not atomic across processes; two processes seeding the same
+# tag at once may briefly disagree on its generation, which costs a rebuild.
+if os.environ.get("SAHITYO_FILE_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["SAHITYO_FILE_CACHE_DIR"],
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        }
+    }
+
+# Sector live boards are rebuilt in the background after invalidation; this
+# only bounds how long an unused board lingers.
+LIVE_BOARD_CACHE_TIMEOUT = 60 * 10
+
+# Rendered per-stage schedules; invalidated by any write to the stage's schedule.
+SCHEDULE_CACHE_TIMEOUT = 60 * 10
+
+# gzip/brotli (brotli needs the optional `brotli` package) for bodies at least this large.
+RESPONSE_COMPRESSION_MIN_SIZE = 512
+
+# Archives written batch by batch by a sector schedule reset (sahityo_core/schedule_reset.py);
+# restore one with `manage.py restore_sector_schedule <archive>`.
+SCHEDULE_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archives')
+
+# Scheduled competitions deleted per transaction during a sector reset.
+SCHEDULE_RESET_BATCH_SIZE = 200
+
+# Seconds the schedule generator spends improving its first plan (sahityo_core/schedule_solver.py).
+SCHEDULE_SOLVER_TIME_BUDGET = 2.0
+
+# Weight of the latest delay in each stage's drift average (sahityo_core/eta.py).
+ETA_DRIFT_ALPHA = 0.5
+
+# Automatic status transitions (sahityo_core/status_timer.py). Run
+# `manage.py run_status_timer`, or enable to start the timer in each web
+# worker; a lease keeps a single leader either way.
+STATUS_TIMER_ENABLED = False
+STATUS_TIMER_LEASE_SECONDS = 30
+STATUS_TIMER_POLL_SECONDS = 5
+# Wait before retrying a transition blocked by another competition on the stage.
+STATUS_TIMER_RETRY_SECONDS = 30
+# Transitions overdue by more than this at load time are left to the stage managers.
+STATUS_TIMER_GRACE_SECONDS = 15 * 60
+
+# Write-behind presence updates (sahityo_core/presence_buffer.py): queue ticks
+# per process and write them in one transaction every interval or batch.
+PRESENCE_WRITE_BEHIND = False
+PRESENCE_FLUSH_INTERVAL_MS = 250
+PRESENCE_FLUSH_MAX_ITEMS = 100